@@ -41,11 +41,30 @@ nonebot.load_plugin("src.plugins.ai_config_console")  # SuggarChat 管理系统
 async def init_sv_card():
     """影之诗卡牌插件启动时加载数据。"""
     try:
-        from src.plugins.sv_card._cache import init_cache, _try_register_scheduler
+        from src.plugins.sv_card._cache import (
+            card_cache,
+            init_cache,
+            start_file_watcher,
+            _try_register_scheduler,
+        )
+        from src.plugins.sv_card._langs import language_store
         await init_cache()
+        language_store.warm_default(card_cache.generation)
         _try_register_scheduler()
+        start_file_watcher()
     except Exception as e:
         nonebot.logger.error(f"影之诗卡牌数据加载失败: {e}")
 
+
+@nonebot.get_driver().on_shutdown
+async def stop_sv_card():
+    """停止影之诗卡牌数据文件监视，关闭卡图下载 / 拼图工作池。"""
+    from src.plugins.sv_card._cache import stop_file_watcher
+    from src.plugins.sv_card._grid import grid_composer
+    from src.plugins.sv_card._images import image_service
+    stop_file_watcher()
+    grid_composer.close()
+    image_service.close()
+
 if __name__ == "__main__":
     nonebot.run()
@@ -0,0 +1,351 @@
+"""影之诗查卡器 搜索基准测试。
+
+用法：
+    python scripts/sv_card_benchmark.py [--sizes 735,10000] [--repeat 20]
+    python scripts/sv_card_benchmark.py --sizes 735,10000,100000   # 10 万张需显式指定，耗时数分钟
+    python scripts/sv_card_benchmark.py --save scripts/sv_card_benchmark_baseline.json
+    python scripts/sv_card_benchmark.py --compare scripts/sv_card_benchmark_baseline.json
+    python scripts/sv_card_benchmark.py --topk [--sizes 735,10000,50000]
+
+内容：
+    - 卡池：真实的 735 张卡，以及按真实卡池字段分布生成的合成卡池（见 generate_corpus）
+    - 加载：解析归一化（_parse_cards）、索引构建（_build_indexes，其中相似卡近邻表单独再计一次）耗时，
+      以及 tracemalloc 统计的常驻 / 峰值内存
+    - 查询：精确卡名 / 卡名前缀 / 卡名中段 / 技能文本 / 职业分面 / 拼音 / 布尔查询 / 无结果容错
+      各类查询的 p50 / p99 延迟（查询串从卡池中按固定种子抽取，结果可复现）
+    - 格式化：单卡详情与 10 条结果列表的 p50 / p99
+    - --save 把结果存成基线 JSON，--compare 读取基线并在每行后附 p50 变化（随仓库提交的基线是
+      scripts/sv_card_benchmark_baseline.json，data/ 不入库），
+      用来对比索引 / 缓存改动前后的效果
+    - --topk：旧实现（全部打分 → 排序 → 取前 10）与 search_cards Top-K 的对比
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import nonebot
+
+# 导入 src.plugins.sv_card 的子模块会先执行插件包 __init__（注册 matcher），需要先初始化 NoneBot（不启动驱动）
+nonebot.init(driver="~none")
+
+from src.plugins.sv_card._cache import (
+    CHS_CARDS_FILE,
+    _build_indexes,
+    _iter_raw_cards,
+    _normalize_card,
+    _parse_cards,
+)
+from src.plugins.sv_card._formatter import format_search_results, format_single_card
+from src.plugins.sv_card._normalize import normalize_text
+from src.plugins.sv_card._query import boolean_search, is_boolean_query
+from src.plugins.sv_card._searcher import _calculate_score, search_cards, suggest_cards
+from src.plugins.sv_card._similar import build_similar_table
+
+# --topk 对比用的关键词（命中数由少到多）
+QUERIES = ["不屈的战士", "天使", "谢幕曲 2", "守护", "进化时", "随从"]
+
+# 固定的技能 / 分面 / 拼音查询（卡名类查询从卡池中抽取）
+SKILL_QUERIES = ["守护", "进化时", "抽取", "谢幕曲 2", "ev:守护", "kw:突进"]
+CLASS_QUERIES = ["#精灵", "#龙族 随从 金", "#皇家 3费", "cost<=2 atk>=3 #法师"]
+PINYIN_QUERIES = ["bqdzs", "long", "tianshi", "jl"]
+BOOLEAN_QUERIES = [
+    "(#精灵 OR #皇家) 守护 NOT 中立",
+    "守护 OR 突进 OR 必杀",
+    '"抽取" -#中立 cost<=3',
+    "name:天使 OR skill:天使",
+]
+
+# 每类抽取的卡名查询条数
+SAMPLED_QUERIES = 8
+
+# 默认只跑真实卡池与 1 万张；10 万张的合成卡池需用 --sizes 显式指定
+DEFAULT_SIZES = "735,10000"
+SEED = 20240601
+
+
+# ============== 卡池生成 ==============
+
+def _splice(rng: random.Random, a: str, b: str) -> str:
+    """取 a 的前段 + b 的后段拼出新名字。"""
+    if not a or not b:
+        return a or b
+    return a[:rng.randint(1, len(a))] + b[rng.randint(0, len(b) - 1):]
+
+
+def generate_corpus(raw_cards: list[dict], size: int, seed: int = SEED) -> list[dict]:
+    """按真实卡池的字段分布生成 size 张原始卡牌（前 735 张就是真实卡牌）。
+
+    - 类型 / 费用 / 攻防 / 稀有度 / 种族 / 卡包 / 职业：整体取自一张随机真实卡（保留字段间相关性）
+    - 卡名（中 / 日）：两张随机真实卡名各取一段拼接
+    - 技能文本（中 / 日）：取自同类型的另一张随机真实卡（保留标签与关键词分布）
+    - card_id：沿用模板卡的卡包位与职业位，编号在该前缀下顺延，保证唯一
+    """
+    rng = random.Random(seed)
+    cards = list(raw_cards[:size])
+    by_type: dict[int, list[dict]] = {}
+    next_no: dict[str, int] = {}
+    for raw in raw_cards:
+        by_type.setdefault(raw.get("type", 0), []).append(raw)
+        card_id = str(raw["card_id"])
+        next_no[card_id[:4]] = max(next_no.get(card_id[:4], 0), int(card_id[4:]) + 1)
+
+    while len(cards) < size:
+        template = rng.choice(raw_cards)
+        other = rng.choice(raw_cards)
+        skill = rng.choice(by_type[template.get("type", 0)])
+        prefix = str(template["card_id"])[:4]
+        no = next_no[prefix]
+        if no > 9999:
+            raise ValueError(f"卡牌编号溢出（前缀 {prefix}），请减小卡池规模")
+        next_no[prefix] = no + 1
+
+        raw = dict(template)
+        raw["card_id"] = int(f"{prefix}{no:04d}")
+        raw["name"] = _splice(rng, template.get("name", ""), other.get("name", ""))
+        raw["name_ja"] = _splice(rng, template.get("name_ja", ""), other.get("name_ja", ""))
+        raw["skill_text"] = skill.get("skill_text", "")
+        raw["skill_text_ja"] = skill.get("skill_text_ja", "")
+        cards.append(raw)
+    return cards
+
+
+def _as_raw_data(raw_cards: list[dict]) -> dict:
+    """包装成数据文件的结构（card_id → 卡牌），交给 _parse_cards。"""
+    return {str(raw["card_id"]): raw for raw in raw_cards}
+
+
+# ============== 计时 ==============
+
+def percentiles(samples: list[float]) -> tuple[float, float]:
+    """(p50, p99)，单位与输入相同。"""
+    if len(samples) == 1:
+        return samples[0], samples[0]
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return statistics.median(samples), cuts[98]
+
+
+def sample_ms(func, repeat: int) -> list[float]:
+    """重复执行 func，返回每次耗时（毫秒）。"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def run_search(data: dict, query: str, limit: int = 10) -> list:
+    """与 _handler._search 相同的调用方式；无结果时走"你是不是要找"。"""
+    if is_boolean_query(query):
+        return boolean_search(
+            query,
+            data["cards"],
+            data["ngram_index"],
+            data["facets"],
+            stats=data["stats"],
+            name_index=data["name_index"],
+            pinyin_index=data["pinyin_index"],
+            skill_bm25=data["skill_bm25"],
+            limit=limit,
+        )
+    results = search_cards(
+        query,
+        data["cards"],
+        limit=limit,
+        index=data["ngram_index"],
+        facets=data["facets"],
+        stats=data["stats"],
+        name_index=data["name_index"],
+        pinyin_index=data["pinyin_index"],
+        skill_bm25=data["skill_bm25"],
+    )
+    if not results:
+        suggest_cards(query, data["cards"], data["fuzzy_index"])
+    return results
+
+
+def build_queries(cards: list, seed: int = SEED) -> dict[str, list[str]]:
+    """各类查询串（卡名类从卡池中按固定种子抽取）。"""
+    rng = random.Random(seed)
+    names = [card.name for card in cards if len(card.name) >= 4]
+    picked = [rng.choice(names) for _ in range(SAMPLED_QUERIES)]
+
+    def typo(name: str) -> str:
+        i = rng.randrange(len(name))
+        return name[:i] + "龘" + name[i + 1:]
+
+    return {
+        "exact": picked,
+        "prefix": [name[:2] for name in picked],
+        "contains": [name[1:-1][:3] for name in picked],
+        "skill": SKILL_QUERIES,
+        "class": CLASS_QUERIES,
+        "pinyin": PINYIN_QUERIES,
+        "boolean": BOOLEAN_QUERIES,
+        "fuzzy": [typo(name) for name in picked],
+    }
+
+
+# ============== 基准 ==============
+
+def bench_corpus(raw_cards: list[dict], size: int, repeat: int, memory: bool) -> dict:
+    """对一个规模的卡池跑完整基准，返回 {类别: {p50, p99, n}} 及内存统计。"""
+    corpus = _as_raw_data(generate_corpus(raw_cards, size))
+    result: dict = {}
+
+    start = time.perf_counter()
+    cards, digests = _parse_cards(corpus)
+    parse_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    data = _build_indexes(cards, digests)
+    build_ms = (time.perf_counter() - start) * 1000
+    result["load.parse"] = {"p50": parse_ms, "p99": parse_ms, "n": 1}
+    result["load.index"] = {"p50": build_ms, "p99": build_ms, "n": 1}
+    start = time.perf_counter()
+    build_similar_table(cards, data["ngram_index"], data["facets"])
+    similar_ms = (time.perf_counter() - start) * 1000
+    result["load.similar"] = {"p50": similar_ms, "p99": similar_ms, "n": 1}
+
+    if memory:
+        # 单独再构建一次：tracemalloc 会显著拖慢构建，不与计时混在一起
+        del data
+        tracemalloc.start()
+        data = _build_indexes(*_parse_cards(corpus))
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["memory"] = {"resident_kib": current / 1024, "peak_kib": peak / 1024}
+
+    for category, queries in build_queries(data["cards"]).items():
+        samples: list[float] = []
+        for query in queries:
+            run_search(data, query)  # 预热
+            samples.extend(sample_ms(lambda: run_search(data, query), repeat))
+        p50, p99 = percentiles(samples)
+        result[f"query.{category}"] = {"p50": p50, "p99": p99, "n": len(samples)}
+
+    listed = run_search(data, "随从")
+    single = data["cards"][: SAMPLED_QUERIES]
+    samples = sample_ms(lambda: format_search_results(listed, "随从"), repeat * 4)
+    p50, p99 = percentiles(samples)
+    result["format.list"] = {"p50": p50, "p99": p99, "n": len(samples)}
+    samples = []
+    for card in single:
+        samples.extend(sample_ms(lambda: format_single_card(card), repeat))
+    p50, p99 = percentiles(samples)
+    result["format.single"] = {"p50": p50, "p99": p99, "n": len(samples)}
+    return result
+
+
+def print_report(results: dict[str, dict], baseline: dict[str, dict]):
+    print(f"{'卡池':>8} {'项目':<16} {'次数':>6} {'p50 ms':>10} {'p99 ms':>10}  对比基线")
+    for size, result in results.items():
+        base = baseline.get(size, {})
+        for name, row in result.items():
+            if name == "memory":
+                continue
+            delta = ""
+            base_row = base.get(name)
+            if base_row and base_row["p50"] > 0:
+                delta = f"p50 {row['p50'] / base_row['p50'] - 1:+.1%}"
+            print(f"{size:>8} {name:<16} {row['n']:>6} "
+                  f"{row['p50']:>10.3f} {row['p99']:>10.3f}  {delta}")
+        memory = result.get("memory")
+        if memory:
+            delta = ""
+            base_memory = base.get("memory")
+            if base_memory and base_memory["resident_kib"] > 0:
+                delta = f"常驻 {memory['resident_kib'] / base_memory['resident_kib'] - 1:+.1%}"
+            print(f"{size:>8} {'memory':<16} {'':>6} "
+                  f"常驻 {memory['resident_kib']:.0f} KiB / 峰值 {memory['peak_kib']:.0f} KiB  {delta}")
+
+
+# ============== --topk：旧实现对比 ==============
+
+def legacy_search(keyword: str, cards: list, limit: int = 10) -> list:
+    """旧实现：全部命中打分后整体排序、去重取前 limit。"""
+    keywords = normalize_text(keyword).split()
+    results = []
+    for card in cards:
+        score = _calculate_score(card, keywords, False)
+        if score > 0:
+            results.append((card, score))
+    results.sort(key=lambda x: -x[1])
+    seen, out = set(), []
+    for card, _ in results:
+        if card.id not in seen:
+            seen.add(card.id)
+            out.append(card)
+            if len(out) >= limit:
+                break
+    return out
+
+
+def bench_topk(raw_cards: list[dict], sizes: list[int], repeat: int):
+    print(f"{'卡池':>8} {'关键词':<10} {'命中':>7} {'旧实现ms':>10} {'Top-K ms':>10}")
+    for size in sizes:
+        cards = [_normalize_card(raw) for raw in generate_corpus(raw_cards, size)]
+        data = _build_indexes(cards, {})
+        index, name_index = data["ngram_index"], data["name_index"]
+        for query in QUERIES:
+            keywords = normalize_text(query).split()
+            hits = sum(1 for card in cards if _calculate_score(card, keywords, False) > 0)
+            legacy_ms = statistics.median(sample_ms(lambda: legacy_search(query, cards), repeat))
+            topk_ms = statistics.median(sample_ms(
+                lambda: search_cards(query, cards, index=index, name_index=name_index),
+                repeat,
+            ))
+            print(f"{size:>8} {query:<10} {hits:>7} {legacy_ms:>10.3f} {topk_ms:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--save", metavar="PATH", help="把结果存为基线 JSON")
+    parser.add_argument("--compare", metavar="PATH", help="与基线 JSON 对比")
+    parser.add_argument("--no-memory", action="store_true", help="跳过内存统计（省一次构建）")
+    parser.add_argument("--topk", action="store_true", help="旧实现与 Top-K 搜索对比")
+    args = parser.parse_args()
+
+    with open(CHS_CARDS_FILE, encoding="utf-8") as f:
+        raw_cards = list(_iter_raw_cards(json.load(f)))
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    if args.topk:
+        bench_topk(raw_cards, sizes, args.repeat)
+        return
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = {
+        str(size): bench_corpus(raw_cards, size, args.repeat, not args.no_memory)
+        for size in sizes
+    }
+    print_report(results, baseline)
+
+    if args.save:
+        path = Path(args.save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"created_at": time.strftime("%Y-%m-%d %H:%M:%S"), "repeat": args.repeat,
+                 "results": results},
+                f, ensure_ascii=False, indent=2,
+            )
+        print(f"\n基线已保存到 {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""影之诗查卡器 卡池内存占用对比（旧 dict 布局 vs 紧凑 Card 布局）。
+
+用法：
+    python scripts/sv_card_memory_report.py
+
+统计方式：
+    从卡牌列表出发递归遍历所有可达对象，按 id 去重累加 sys.getsizeof，
+    因此驻留 / 共享的字符串只计一次，与进程实际常驻内存一致。
+"""
+
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import nonebot
+import zhconv
+
+# 导入 src.plugins.sv_card 的子模块会先执行插件包 __init__（注册 matcher），需要先初始化 NoneBot（不启动驱动）
+nonebot.init(driver="~none")
+
+from src.plugins.sv_card._cache import (
+    CHS_CARDS_FILE,
+    RARITY_CODE_TO_NAME,
+    TYPE_INT_TO_NAME,
+    _KANA_RE,
+    _infer_class_info,
+    _normalize_card,
+)
+from src.plugins.sv_card._card import Card
+
+
+def _legacy_normalize(raw: dict) -> dict:
+    """旧版 _normalize_card（25 键 dict，不驻留字符串，保留风味文本）。"""
+    card_id_str = str(raw.get("card_id", "")).zfill(8)
+    card_set_id = raw.get("card_set_id", 10000)
+    class_code, class_name = _infer_class_info(card_id_str, card_set_id)
+    skill_text = raw.get("skill_text", "") or ""
+    raw_name = raw.get("name", "") or ""
+    return {
+        "id": card_id_str,
+        "name": zhconv.convert(raw_name, "zh-cn") if raw_name else "",
+        "name_raw": raw_name,
+        "name_ja": raw.get("name_ja", "") or "",
+        "class_code": class_code,
+        "class_name": class_name,
+        "type": raw.get("type", 0),
+        "type_name": TYPE_INT_TO_NAME.get(raw.get("type", 0), "未知"),
+        "rarity": raw.get("rarity", 1),
+        "rarity_name": RARITY_CODE_TO_NAME.get(str(raw.get("rarity", 1)), "铜"),
+        "cost": raw.get("cost", 0),
+        "atk": raw.get("atk", 0),
+        "life": raw.get("life", 0),
+        "skill_text": skill_text,
+        "skill_text_ja": raw.get("skill_text_ja", "") or "",
+        "evo_skill_text": raw.get("evo_skill_text", "") or "",
+        "flavour_text": raw.get("flavour_text", "") or "",
+        "flavour_text_ja": raw.get("flavour_text_ja", "") or "",
+        "cv": raw.get("cv", "") or "",
+        "illustrator": raw.get("illustrator", "") or "",
+        "tribes": raw.get("tribes", []) or [],
+        "card_set_id": card_set_id,
+        "base_card_image_id": raw.get("base_card_image_id", "") or "",
+        "skill_has_kana": bool(_KANA_RE.search(skill_text)) and bool(skill_text),
+    }
+
+
+def deep_sizeof(root, skip_fields: tuple[str, ...] = ()) -> int:
+    """递归统计对象图的总字节数（按 id 去重，可跳过 Card 的指定字段）。"""
+    seen: set[int] = set()
+    stack = [root]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, Card):
+            stack.extend(
+                getattr(obj, field)
+                for field in Card.__slots__
+                if field not in skip_fields
+            )
+    return total
+
+
+def main():
+    # 两种布局分别读一次 JSON，避免共享同一批原始字符串
+    with open(CHS_CARDS_FILE, encoding="utf-8") as f:
+        raw_legacy = json.load(f)
+    with open(CHS_CARDS_FILE, encoding="utf-8") as f:
+        raw_compact = json.load(f)
+
+    legacy = [
+        _legacy_normalize(v)
+        for k, v in raw_legacy.items()
+        if k != "_meta" and isinstance(v, dict)
+    ]
+    compact = [
+        _normalize_card(v)
+        for k, v in raw_compact.items()
+        if k != "_meta" and isinstance(v, dict)
+    ]
+    del raw_legacy, raw_compact
+
+    # 紧凑布局额外携带查询用的搜索文档 / 拼音 / 技能分段，单独列出便于对比纯记录开销
+    legacy_size = deep_sizeof(legacy)
+    compact_size = deep_sizeof(compact)
+    record_size = deep_sizeof(compact, skip_fields=(
+        "search_doc",
+        "name_pinyin",
+        "skill_segments",
+    ))
+
+    print(f"卡牌数量: {len(legacy)}")
+    print(f"旧 dict 布局:             {legacy_size / 1024:10.1f} KiB")
+    print(f"Card 布局（不含预计算字段）:{record_size / 1024:10.1f} KiB  "
+          f"({record_size / legacy_size:.1%})")
+    print(f"Card 布局（含预计算字段）:  {compact_size / 1024:10.1f} KiB  "
+          f"({compact_size / legacy_size:.1%})")
+
+
+if __name__ == "__main__":
+    main()
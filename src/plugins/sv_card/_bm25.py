@@ -0,0 +1,168 @@
+# plugins/sv_card/_bm25.py
+"""影之诗超凡世界 技能文本 BM25 词项统计（技能层同分排序用）。
+
+设计说明：
+    - 文档：每张卡技能分段中的基础 / 进化 / 超进化文字（中日文，已归一化，见 _segments.py）
+    - 词项：按空白切开后的单字与相邻二字（bigram）；查询关键词同样切成 bigram，
+      单字关键词直接作为一个词项
+    - 加载时预计算：词项 → (卡牌下标数组, 词频饱和权重数组)，数组按下标升序；
+      权重 = tf·(k1+1) / (tf + k1·(1 - b + b·dl/avgdl))，df 即数组长度
+    - 查询时只遍历查询词项的 posting（权重 × idf 累加），代价与 posting 长度成正比，
+      与卡池大小无关
+    - 打分：BM25（k1 = 1.2, b = 0.75，idf 取 ln(1 + (N - df + 0.5) / (df + 0.5)) 恒为正）
+    - 增量刷新：copy() 共享全部 posting，patch() 替换改动词项的数组（不原地修改），
+      旧一代不受影响；avgdl 沿用全量构建时的值，不因个别卡变化而重算全部权重
+"""
+
+import math
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Iterable, Optional
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 参与统计的技能段（SkillSegments 字段名；choices 的文字已包含在这些段中）
+_DOC_FIELDS = ("base", "evolve", "super_evolve")
+
+
+def _terms(texts: Iterable[str]) -> Counter:
+    """切出若干文本的单字与 bigram 词项（不跨空白）。"""
+    counts: Counter = Counter()
+    for text in texts:
+        for run in text.split():
+            counts.update(run)
+            counts.update(run[i:i + 2] for i in range(len(run) - 1))
+    return counts
+
+
+def _doc_terms(segments) -> Counter:
+    if segments is None:
+        return Counter()
+    return _terms(getattr(segments, field) for field in _DOC_FIELDS)
+
+
+def query_terms(keyword: str) -> list[str]:
+    """查询关键词的词项（去重）。"""
+    if len(keyword) <= 1:
+        return [keyword] if keyword else []
+    return list(dict.fromkeys(keyword[i:i + 2] for i in range(len(keyword) - 1)))
+
+
+class SkillBM25:
+    """技能文本 BM25 统计（词项 → posting 数组）。"""
+
+    def __init__(self):
+        # 词项 → (下标数组 'I', 词频饱和权重数组 'f')，下标升序
+        self._postings: dict[str, tuple[array, array]] = {}
+        # 文档（卡牌）数
+        self._doc_count = 0
+        # 全量构建时的平均文档长度（词项总数）
+        self._avg_len = 0.0
+        # 全量构建时的暂存：词项 → (下标数组, tf 数组)，以及各文档长度（finish() 后清空）
+        self._pending: Optional[dict[str, tuple[array, array]]] = {}
+        self._pending_len: list[int] = []
+
+    def add(self, pos: int, segments):
+        """登记一张卡牌的技能分段（仅用于全量构建，下标须连续递增）。"""
+        counts = _doc_terms(segments)
+        self._doc_count = pos + 1
+        self._pending_len.append(sum(counts.values()))
+        pending = self._pending
+        for term, tf in counts.items():
+            try:
+                positions, tfs = pending[term]
+            except KeyError:
+                pending[term] = (array("I", (pos,)), array("I", (tf,)))
+            else:
+                positions.append(pos)
+                tfs.append(tf)
+
+    def finish(self):
+        """全量构建结束：算出 avgdl，把暂存的 posting 压成权重数组。"""
+        doc_len = self._pending_len
+        self._avg_len = sum(doc_len) / len(doc_len) if doc_len else 0.0
+        # 各文档的长度归一项只算一次（同 _weight）
+        norms = [self._norm(length) for length in doc_len]
+        k1 = BM25_K1
+        for term, (positions, tfs) in self._pending.items():
+            self._postings[term] = (
+                array("I", positions),
+                array("f", [tf * (k1 + 1) / (tf + norms[pos]) for pos, tf in zip(positions, tfs)]),
+            )
+        self._pending = None
+        self._pending_len = []
+
+    def _norm(self, length: int) -> float:
+        k1 = BM25_K1
+        return k1 * (1 - BM25_B + BM25_B * length / self._avg_len) if self._avg_len else k1
+
+    def _weight(self, tf: int, length: int) -> float:
+        return tf * (BM25_K1 + 1) / (tf + self._norm(length))
+
+    def keyword_scores(self, keyword: str) -> dict[int, float]:
+        """关键词对各卡牌的 BM25 分（只含 posting 中出现的卡牌）。"""
+        scores: dict[int, float] = {}
+        doc_count = self._doc_count
+        for term in query_terms(keyword):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            positions, weights = posting
+            df = len(positions)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            if not scores:
+                scores = dict(zip(positions, map(idf.__mul__, weights)))
+                continue
+            get = scores.get
+            for pos, weight in zip(positions, weights):
+                scores[pos] = get(pos, 0.0) + idf * weight
+        return scores
+
+    def copy(self) -> "SkillBM25":
+        """浅拷贝：共享全部 posting 数组，之后 patch() 只替换改动的词项。"""
+        clone = SkillBM25()
+        clone._postings = dict(self._postings)
+        clone._doc_count = self._doc_count
+        clone._avg_len = self._avg_len
+        clone._pending = None
+        return clone
+
+    def patch(self, pos: int, old_segments, new_segments):
+        """把下标 pos 的登记内容从 old_segments 换成 new_segments（old 为 None 表示新增）。"""
+        self._doc_count = max(self._doc_count, pos + 1)
+        old_counts = _doc_terms(old_segments)
+        new_counts = _doc_terms(new_segments)
+        if old_counts == new_counts:
+            return
+        length = sum(new_counts.values())
+        # 文档长度变了，该卡的全部词项权重都要重算
+        for term in old_counts.keys() - new_counts.keys():
+            self._replace(term, pos, 0.0)
+        for term, tf in new_counts.items():
+            self._replace(term, pos, self._weight(tf, length))
+
+    def _replace(self, term: str, pos: int, weight: float):
+        """生成 term 的新 posting 数组（pos 的权重改为 weight，0 表示移除）。"""
+        positions, weights = self._postings.get(term, (array("I"), array("f")))
+        positions, weights = array("I", positions), array("f", weights)
+        i = bisect_left(positions, pos)
+        present = i < len(positions) and positions[i] == pos
+        if weight:
+            if present:
+                weights[i] = weight
+            else:
+                positions.insert(i, pos)
+                weights.insert(i, weight)
+        elif present:
+            del positions[i]
+            del weights[i]
+        if positions:
+            self._postings[term] = (positions, weights)
+        else:
+            self._postings.pop(term, None)
+
+    @property
+    def term_count(self) -> int:
+        return len(self._postings)
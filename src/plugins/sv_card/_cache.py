@@ -3,9 +3,13 @@
 
 功能：
     - 启动时从本地 JSON 文件加载中文卡牌数据（用户自制翻译版）
-    - 按 ID 查询单卡
-    - 按名称/技能模糊搜索
-    - 定期或手动刷新缓存
+    - 按 ID 查询单卡；按 ID 区间 / 前缀浏览卡包、卡包内职业（有序 ID 数组二分，见 _idrange.py）
+    - 按名称/技能模糊搜索（字符 n-gram 倒排索引收窄候选，见 _index.py）
+    - 相似卡牌推荐（加载时批量预计算近邻表，见 _similar.py）
+    - 定期或手动刷新缓存（整代构建后原子替换，并发刷新合并为一次）
+    - 按源文件指纹增量刷新：文件未变则跳过，变了按 card_id 对比只重建变化的卡
+    - 可选的轮询监视器：数据文件被替换后数秒内自动增量刷新
+    - 归一化卡牌 + 索引写入二进制快照，源文件未变时重启直接加载快照（见 _snapshot.py）
     - 根据 card_set_id 推断职业
 
 数据源：
@@ -20,19 +24,31 @@
     type (int 1-4) → type_str
     rarity (int 1-4) → 已有映射
     skill_text / skill_text_ja
-    flavour_text / flavour_text_ja（不展示，仅保留供扩展）
+    flavour_text / flavour_text_ja（不展示，加载时丢弃）
     evo_skill_text 恒空（进化效果内嵌在 skill_text 的 <ev>/<sev> 标签中）
     base_card_image_id 恒空（用 card_id 拼 URL 兜底）
 """
 
 import asyncio
+import hashlib
 import json
 import re
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
-
-import zhconv
+from typing import Iterator, NamedTuple, Optional
+
+from ._bm25 import SkillBM25
+from ._card import Card, intern_str, intern_tribes
+from ._config import sv_card_config
+from ._facets import FacetIndex, StatIndex
+from ._fuzzy import FuzzyNameIndex
+from ._idrange import CardIdIndex
+from ._index import NgramIndex
+from ._markup import SkillSegments, parse_skill_segments
+from ._normalize import normalize_text, to_simplified
+from ._pinyin import PinyinIndex, romanize
+from ._similar import SimilarTable, build_similar_table
+from ._snapshot import FileFingerprint, file_fingerprint, load_snapshot, save_snapshot
 
 # 注意：logger 在首次使用时才导入，避免在 NoneBot 初始化前导入
 
@@ -48,9 +64,15 @@ def _get_logger():
 # 中文卡牌数据文件（用户自制翻译版，已移至插件内部 data 目录）
 CHS_CARDS_FILE = Path(__file__).parent / "data" / "cards_cn_translated.json"
 
+# 卡池快照文件（归一化卡牌 + 预建索引，按源文件指纹失效）
+SNAPSHOT_FILE = Path(sv_card_config.snapshot_path)
+
 # 缓存有效期（小时）
 CACHE_EXPIRE_HOURS = 24
 
+# 数据文件轮询间隔（秒），0 表示不监视
+WATCH_INTERVAL_SECONDS = sv_card_config.watch_interval_seconds
+
 # ============== 职业 / 卡包 映射 ==============
 
 # set_id → 卡包系列名（仅参考，不用于推断职业）
@@ -140,6 +162,24 @@ TYPE_INT_TO_NAME = {
     4: "纹章",
 }
 
+# ============== 种族映射 ==============
+
+# 种族代码 → 中文名（与 tribes 字段对应）
+TRIBE_CODE_TO_NAME = {
+    0: "",
+    1: "人类",
+    2: "精灵",
+    3: "野兽",
+    4: "魔法师",
+    5: "龙",
+    6: "恶魔",
+    7: "不死",
+    8: "神",
+    9: "武人",
+    10: "机械",
+    11: "造物",
+}
+
 # 日文假名正则（用于检测翻译残留）
 _KANA_RE = re.compile(r"[\u3040-\u309f\u30a0-\u30ff]")
 
@@ -167,25 +207,96 @@ def _infer_class_info(card_id_str: str, card_set_id: int) -> tuple[str, str]:
     return ("0", "中立")
 
 
-def _normalize_card(raw: dict) -> dict:
-    """把用户数据的原始卡牌转换为内部统一格式。
-
-    内部字段约定：
-        id, name (简体), name_raw (原始繁简混用), name_ja,
-        class_code, class_name, type, type_name, rarity, rarity_name,
-        cost, atk, life,
-        skill_text, skill_text_ja, evo_skill_text, flavour_text, flavour_text_ja,
-        cv, illustrator, tribes, card_set_id, base_card_image_id,
-        skill_has_kana (bool),  # 标记 skill_text 是否含假名
+class SearchDoc(NamedTuple):
+    """单张卡牌的预计算搜索文档（加载时生成一次，查询期只读）。
 
-    注意：name 字段经 zhconv 繁→简转换，name_raw 保留原始数据供参考。
+    所有字段均经 normalize_text 处理：去标签、全半角折叠、繁→简、小写。
     """
+
+    name: str
+    name_ja: str
+    skill_text: str
+    skill_text_ja: str
+    type_name: str
+
+
+def _search_field(text: str) -> str:
+    """归一化单个字段；结果与原文相同时复用原字符串对象，不额外占内存。"""
+    normalized = normalize_text(text)
+    return text if normalized == text else normalized
+
+
+def _build_search_doc(
+    name: str,
+    name_ja: str,
+    skill_text: str,
+    skill_text_ja: str,
+    type_name: str,
+) -> SearchDoc:
+    """根据内部格式的卡牌字段生成搜索文档。"""
+    return SearchDoc(
+        name=_search_field(name),
+        name_ja=_search_field(name_ja),
+        skill_text=_search_field(skill_text),
+        skill_text_ja=_search_field(skill_text_ja),
+        type_name=_search_field(type_name),
+    )
+
+
+def _join_segment(text: str, text_ja: str) -> str:
+    """中日文同一段归一化后用换行拼接（查询词不含空白，不会跨段误命中）。"""
+    parts = [_search_field(t) for t in (text, text_ja) if t]
+    return "\n".join(parts)
+
+
+def _build_skill_segments(skill_text: str, skill_text_ja: str) -> SkillSegments:
+    """解析中日文技能文本，生成归一化后的分段（关键词只取中文）。"""
+    cn = parse_skill_segments(skill_text)
+    ja = parse_skill_segments(skill_text_ja)
+    return SkillSegments(
+        base=_join_segment(cn.base, ja.base),
+        evolve=_join_segment(cn.evolve, ja.evolve),
+        super_evolve=_join_segment(cn.super_evolve, ja.super_evolve),
+        choices=tuple(_search_field(c) for c in cn.choices + ja.choices),
+        keywords=tuple(dict.fromkeys(intern_str(_search_field(k)) for k in cn.keywords)),
+    )
+
+
+def _card_id_of(raw: dict) -> str:
+    """取原始卡牌的内部 ID（8 位字符串）。"""
     card_id_raw = raw.get("card_id", raw.get("id", ""))
     # 用户数据里 card_id 是数字，索引时统一转 str
     card_id_str = str(card_id_raw)
     # 补 0 到 8 位（与原格式一致）
     if len(card_id_str) < 8:
         card_id_str = card_id_str.zfill(8)
+    return card_id_str
+
+
+def _card_digest(raw: dict) -> bytes:
+    """原始卡牌内容摘要（增量刷新时判断单卡是否变化）。"""
+    payload = json.dumps(raw, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def _normalize_card(raw: dict) -> Card:
+    """把用户数据的原始卡牌转换为内部统一格式（紧凑 Card 记录，见 _card.py）。
+
+    内部字段约定：
+        id, name (简体), name_raw (原始繁简混用), name_ja,
+        class_code, class_name, type, type_name, rarity, rarity_name,
+        cost, atk, life,
+        skill_text, skill_text_ja, evo_skill_text,
+        cv, illustrator, tribes (tuple), card_set_id, base_card_image_id,
+        skill_has_kana (bool),  # 标记 skill_text 是否含假名
+        search_doc (SearchDoc), # 预计算搜索文档，供 _searcher 直接比较
+        name_pinyin (tuple),    # 中文名音节序列（拼音 / 首字母查询用，见 _pinyin.py）
+        skill_segments (SkillSegments),  # 技能文本分段（ev: 等限定字段搜索用，见 _segments.py）
+
+    注意：name 字段经逐字繁→简转换（_normalize.to_simplified），name_raw 保留原始数据供参考。
+    flavour_text / flavour_text_ja 不展示，加载时直接丢弃。
+    """
+    card_id_str = _card_id_of(raw)
 
     card_set_id = raw.get("card_set_id", 10000)
     class_code, class_name = _infer_class_info(card_id_str, card_set_id)
@@ -202,158 +313,313 @@ def _normalize_card(raw: dict) -> dict:
 
     # 卡名繁→简转换（数据源由翻译引擎产出，存在繁简混用如「天宮」→「天宫」）
     raw_name = raw.get("name", "") or ""
-    name_cn = zhconv.convert(raw_name, "zh-cn") if raw_name else ""
-
-    return {
-        "id": card_id_str,
-        "name": name_cn,
-        "name_raw": raw_name,
-        "name_ja": raw.get("name_ja", "") or "",
-        "class_code": class_code,
-        "class_name": class_name,
-        "type": type_int,
-        "type_name": type_name,
-        "rarity": rarity_int,
-        "rarity_name": rarity_name,
-        "cost": raw.get("cost", 0),
-        "atk": raw.get("atk", 0),
-        "life": raw.get("life", 0),
-        "skill_text": skill_text,
-        "skill_text_ja": skill_text_ja,
-        "evo_skill_text": raw.get("evo_skill_text", "") or "",
-        "flavour_text": raw.get("flavour_text", "") or "",
-        "flavour_text_ja": raw.get("flavour_text_ja", "") or "",
-        "cv": raw.get("cv", "") or "",
-        "illustrator": raw.get("illustrator", "") or "",
-        "tribes": raw.get("tribes", []) or [],
-        "card_set_id": card_set_id,
-        "base_card_image_id": raw.get("base_card_image_id", "") or "",
-        "skill_has_kana": skill_has_kana,
-    }
+    name_cn = to_simplified(raw_name)
+    if name_cn == raw_name:
+        name_cn = raw_name
+    name_ja = raw.get("name_ja", "") or ""
+
+    return Card(
+        id=card_id_str,
+        name=name_cn,
+        name_raw=raw_name,
+        name_ja=name_ja,
+        class_code=intern_str(class_code),
+        class_name=intern_str(class_name),
+        type=type_int,
+        type_name=intern_str(type_name),
+        rarity=rarity_int,
+        rarity_name=intern_str(rarity_name),
+        cost=raw.get("cost", 0),
+        atk=raw.get("atk", 0),
+        life=raw.get("life", 0),
+        skill_text=skill_text,
+        skill_text_ja=skill_text_ja,
+        evo_skill_text=raw.get("evo_skill_text", "") or "",
+        cv=intern_str(raw.get("cv", "") or ""),
+        illustrator=intern_str(raw.get("illustrator", "") or ""),
+        tribes=intern_tribes(raw.get("tribes")),
+        card_set_id=card_set_id,
+        base_card_image_id=raw.get("base_card_image_id", "") or "",
+        skill_has_kana=skill_has_kana,
+        search_doc=_build_search_doc(
+            name_cn, name_ja, skill_text, skill_text_ja, type_name
+        ),
+        name_pinyin=romanize(name_cn),
+        skill_segments=_build_skill_segments(skill_text, skill_text_ja),
+    )
 
 
 # ============== 数据缓存类 ==============
 
+class CardGeneration:
+    """一代完整的卡池数据。
+
+    在线程池中一次性构建完毕，之后只读；CardCache 通过替换一个引用切换代际，
+    查询方先取 generation 再从同一代里读卡牌和索引，永远看不到半成品。
+    """
+
+    __slots__ = (
+        "number",
+        "cards",
+        "cards_by_id",
+        "id_index",
+        "cards_by_name",
+        "ngram_index",
+        "name_index",
+        "fuzzy_index",
+        "pinyin_index",
+        "skill_bm25",
+        "facets",
+        "stats",
+        "similar",
+        "card_digests",
+        "fingerprint",
+        "loaded_at",
+        "source",
+    )
+
+    def __init__(
+        self,
+        number: int,
+        data: dict,
+        fingerprint: Optional[FileFingerprint],
+        loaded_at: Optional[datetime],
+        source: Optional[str],
+    ):
+        self.number = number
+        self.cards: list[Card] = data["cards"]
+        self.cards_by_id: dict[str, Card] = data["cards_by_id"]
+        self.id_index: CardIdIndex = data["id_index"]
+        self.cards_by_name: dict[str, list[Card]] = data["cards_by_name"]
+        self.ngram_index: NgramIndex = data["ngram_index"]
+        self.name_index: NgramIndex = data["name_index"]
+        self.fuzzy_index: FuzzyNameIndex = data["fuzzy_index"]
+        self.pinyin_index: PinyinIndex = data["pinyin_index"]
+        self.skill_bm25: SkillBM25 = data["skill_bm25"]
+        self.facets: FacetIndex = data["facets"]
+        self.stats: StatIndex = data["stats"]
+        self.similar: SimilarTable = data["similar"]
+        self.card_digests: dict[str, bytes] = data["card_digests"]
+        self.fingerprint = fingerprint
+        self.loaded_at = loaded_at
+        self.source = source
+
+    @property
+    def data(self) -> dict:
+        """本代卡池数据（与 _build_indexes 返回结构一致）。"""
+        return {
+            "cards": self.cards,
+            "cards_by_id": self.cards_by_id,
+            "id_index": self.id_index,
+            "cards_by_name": self.cards_by_name,
+            "ngram_index": self.ngram_index,
+            "name_index": self.name_index,
+            "fuzzy_index": self.fuzzy_index,
+            "pinyin_index": self.pinyin_index,
+            "skill_bm25": self.skill_bm25,
+            "facets": self.facets,
+            "stats": self.stats,
+            "similar": self.similar,
+            "card_digests": self.card_digests,
+        }
+
+    @classmethod
+    def empty(cls) -> "CardGeneration":
+        return cls(0, _build_indexes([], {}), None, None, None)
+
+
 class CardCache:
     """卡牌数据缓存管理器。"""
 
     def __init__(self):
-        self._cards: list[dict] = []
-        self._cards_by_id: dict[str, dict] = {}
-        self._cards_by_name: dict[str, list[dict]] = {}
-        self._last_update: Optional[datetime] = None
-        self._is_loaded = False
-        self._source_path: Optional[str] = None
+        self._generation = CardGeneration.empty()
+        # 正在进行的加载任务（single-flight：并发的加载请求共用这一个）
+        self._inflight: Optional[asyncio.Task] = None
 
     async def load_cards(self, force: bool = False) -> bool:
         """从本地 JSON 文件加载卡牌数据。
 
+        并发调用会合并为同一次加载，所有调用方拿到同一个结果。
+
         Args:
             force: 是否强制重新加载
 
         Returns:
             bool: 加载是否成功
         """
-        if self._is_loaded and not force:
-            if self._last_update:
+        generation = self._generation
+        if generation.number and not force:
+            if generation.loaded_at:
                 hours_since_update = (
-                    datetime.now() - self._last_update
+                    datetime.now() - generation.loaded_at
                 ).total_seconds() / 3600
                 if hours_since_update < CACHE_EXPIRE_HOURS:
                     _get_logger().info(
-                        f"卡牌缓存仍有效（已更新于 {self._last_update}），跳过加载。"
+                        f"卡牌缓存仍有效（已更新于 {generation.loaded_at}），跳过加载。"
                     )
                     return True
             else:
                 return True
 
-        _get_logger().info(f"正在从 {CHS_CARDS_FILE} 加载卡牌数据...")
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._load())
+        else:
+            _get_logger().info("卡牌数据正在加载中，合并到进行中的加载任务。")
+        # shield：某个调用方被取消时不影响其他等待同一任务的调用方
+        return await asyncio.shield(self._inflight)
 
-        # 在线程池中读取文件，避免阻塞事件循环
-        loop = asyncio.get_running_loop()
+    async def _load(self) -> bool:
+        """执行一次加载：线程池内构建新一代数据，完成后整体替换。"""
         try:
-            raw_data = await loop.run_in_executor(None, _read_chs_file, CHS_CARDS_FILE)
-        except FileNotFoundError:
-            _get_logger().error(f"❌ 卡牌数据文件不存在: {CHS_CARDS_FILE}")
-            return False
-        except json.JSONDecodeError as e:
-            _get_logger().error(f"❌ JSON 解析失败: {e}")
-            return False
-        except Exception as e:
-            _get_logger().error(f"❌ 加载卡牌数据失败: {e}")
-            return False
-
-        # 过滤 _meta，转换格式
-        self._cards = []
-        for k, v in raw_data.items():
-            if k == "_meta":
-                continue
-            if not isinstance(v, dict):
-                continue
-            self._cards.append(_normalize_card(v))
-
-        # 构建索引
-        self._build_indexes()
-
-        self._last_update = datetime.now()
-        self._is_loaded = True
-        self._source_path = str(CHS_CARDS_FILE)
-
-        _get_logger().info(
-            f"✅ 成功加载 {len(self._cards)} 张卡牌（来源：{self._source_path}）。"
+            _get_logger().info(f"正在从 {CHS_CARDS_FILE} 加载卡牌数据...")
+
+            # 在线程池中读取 / 解析 / 建索引，避免阻塞事件循环
+            loop = asyncio.get_running_loop()
+            try:
+                data, fingerprint, from_snapshot = await loop.run_in_executor(
+                    None, _load_card_data, CHS_CARDS_FILE, SNAPSHOT_FILE
+                )
+            except FileNotFoundError:
+                _get_logger().error(f"❌ 卡牌数据文件不存在: {CHS_CARDS_FILE}")
+                return False
+            except json.JSONDecodeError as e:
+                _get_logger().error(f"❌ JSON 解析失败: {e}")
+                return False
+            except Exception as e:
+                _get_logger().error(f"❌ 加载卡牌数据失败: {e}")
+                return False
+
+            self._publish(data, fingerprint)
+
+            source = "快照" if from_snapshot else CHS_CARDS_FILE
+            _get_logger().info(
+                f"✅ 成功加载 {len(data['cards'])} 张卡牌"
+                f"（来源：{source}，第 {self._generation.number} 代）。"
+            )
+            return True
+        finally:
+            self._inflight = None
+
+    async def refresh(self) -> bool:
+        """按源文件指纹增量刷新：未变化则跳过，变化则只重建变化的卡。
+
+        与 load_cards 共用 single-flight，尚未加载过时等价于 load_cards()。
+
+        Returns:
+            bool: 刷新是否成功（文件未变化也视为成功）
+        """
+        if not self.is_loaded:
+            return await self.load_cards()
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._inflight)
+
+    async def _refresh(self) -> bool:
+        """执行一次增量刷新。"""
+        try:
+            loop = asyncio.get_running_loop()
+            try:
+                result = await loop.run_in_executor(
+                    None,
+                    _refresh_card_data,
+                    CHS_CARDS_FILE,
+                    SNAPSHOT_FILE,
+                    self._generation,
+                )
+            except Exception as e:
+                _get_logger().error(f"❌ 增量刷新卡牌数据失败: {e}")
+                return False
+
+            if result is None:
+                _get_logger().debug("卡牌数据文件未变化，跳过刷新。")
+                return True
+
+            data, fingerprint, stats = result
+            self._publish(data, fingerprint)
+            _get_logger().info(
+                f"✅ 卡牌数据已增量刷新：修改 {stats['changed']} / 新增 {stats['added']} / "
+                f"删除 {stats['removed']}（第 {self._generation.number} 代）。"
+            )
+            return True
+        finally:
+            self._inflight = None
+
+    def _publish(self, data: dict, fingerprint: FileFingerprint):
+        """单次引用赋值切换到新一代数据。"""
+        self._generation = CardGeneration(
+            self._generation.number + 1,
+            data,
+            fingerprint,
+            datetime.now(),
+            str(CHS_CARDS_FILE),
         )
-        return True
-
-    def _build_indexes(self):
-        """构建搜索索引。"""
-        self._cards_by_id = {}
-        self._cards_by_name = {}
-
-        for card in self._cards:
-            # 按 ID 索引
-            cid = card.get("id", "")
-            if cid:
-                self._cards_by_id[cid] = card
-
-            # 按名称索引（中文优先，同时索引日文用于跨语种搜索）
-            name_cn = (card.get("name") or "").lower()
-            if name_cn:
-                self._cards_by_name.setdefault(name_cn, []).append(card)
-            name_ja = (card.get("name_ja") or "").lower()
-            if name_ja and name_ja != name_cn:
-                self._cards_by_name.setdefault(name_ja, []).append(card)
-
-    def get_all_cards(self) -> list[dict]:
+
+    @property
+    def generation(self) -> CardGeneration:
+        """当前这一代卡池数据（需要同时读多个索引时先取它，保证一致性）。"""
+        return self._generation
+
+    def get_all_cards(self) -> list[Card]:
         """获取所有卡牌。"""
-        return self._cards
+        return self._generation.cards
 
-    def get_card_by_id(self, card_id: str) -> Optional[dict]:
+    def get_card_by_id(self, card_id: str) -> Optional[Card]:
         """根据 ID 获取单张卡牌（支持不带前导 0 的查询）。"""
         cid = str(card_id).zfill(8) if str(card_id).isdigit() else str(card_id)
-        return self._cards_by_id.get(cid)
-
-    def get_cards_by_name(self, name: str) -> list[dict]:
+        return self._generation.cards_by_id.get(cid)
+
+    def get_cards_by_id_range(self, low: str, high: Optional[str] = None) -> list[Card]:
+        """ID 落在 [low, high) 的卡牌，按 ID 升序（high 为 None 表示不设上界）。"""
+        generation = self._generation
+        cards = generation.cards
+        return [cards[pos] for pos in generation.id_index.range(low, high)]
+
+    def get_cards_by_id_prefix(self, prefix: str) -> list[Card]:
+        """ID 以 prefix 开头的卡牌，按 ID 升序（如 "1001" = 卡包 0 的精灵卡）。"""
+        generation = self._generation
+        cards = generation.cards
+        return [cards[pos] for pos in generation.id_index.prefix(prefix)]
+
+    def get_cards_in_set(self, set_no: int, class_code: Optional[str] = None) -> list[Card]:
+        """卡包系列号 set_no（card_id[2]，0-8）的卡牌，可再限定职业代码（card_id[3]）。"""
+        return self.get_cards_by_id_prefix(f"10{set_no}{class_code or ''}")
+
+    def get_similar_cards(self, card_id: str, limit: Optional[int] = None) -> list[Card]:
+        """与 card_id 最相似的卡牌（预计算的近邻表，按相似度降序）。"""
+        generation = self._generation
+        pos = generation.id_index.position(card_id)
+        if pos is None:
+            return []
+        cards = generation.cards
+        return [cards[p] for p in generation.similar.neighbours(pos, limit)]
+
+    def get_cards_by_name(self, name: str) -> list[Card]:
         """根据名称获取卡牌（精确匹配）。"""
-        return self._cards_by_name.get(name.lower(), [])
+        return self._generation.cards_by_name.get(name.lower(), [])
+
+    @property
+    def ngram_index(self) -> NgramIndex:
+        """n-gram 倒排索引（posting 为 get_all_cards() 列表下标）。"""
+        return self._generation.ngram_index
 
     @property
     def is_loaded(self) -> bool:
-        return self._is_loaded
+        return self._generation.number > 0
 
     @property
     def last_update(self) -> Optional[datetime]:
-        return self._last_update
+        return self._generation.loaded_at
 
     @property
     def card_count(self) -> int:
-        return len(self._cards)
+        return len(self._generation.cards)
 
     @property
     def source_path(self) -> Optional[str]:
-        return self._source_path
+        return self._generation.source
 
 
-# ============== 文件读取 ==============
+# ============== 文件读取 / 索引构建 ==============
 
 def _read_chs_file(path: Path) -> dict:
     """同步读取 JSON 文件。"""
@@ -361,6 +627,274 @@ def _read_chs_file(path: Path) -> dict:
         return json.load(f)
 
 
+def _iter_raw_cards(raw_data: dict) -> Iterator[dict]:
+    """过滤 _meta 和非 dict 条目。"""
+    for k, v in raw_data.items():
+        if k == "_meta":
+            continue
+        if not isinstance(v, dict):
+            continue
+        yield v
+
+
+def _parse_cards(raw_data: dict) -> tuple[list[Card], dict[str, bytes]]:
+    """把原始数据转换为 Card 列表，同时记录每张卡的内容摘要。"""
+    cards = []
+    card_digests = {}
+    for raw in _iter_raw_cards(raw_data):
+        card = _normalize_card(raw)
+        cards.append(card)
+        card_digests[card.id] = _card_digest(raw)
+    return cards, card_digests
+
+
+def _name_keys(card: Card) -> list[str]:
+    """卡牌在名称索引中的键（中文名，以及与之不同的日文名）。"""
+    keys = []
+    name_cn = card.name.lower()
+    if name_cn:
+        keys.append(name_cn)
+    name_ja = card.name_ja.lower()
+    if name_ja and name_ja != name_cn:
+        keys.append(name_ja)
+    return keys
+
+
+def _name_texts(card: Card) -> tuple[str, str]:
+    """卡名索引登记的文本（归一化后的中文名、日文名）。"""
+    doc = card.search_doc
+    return (doc.name, doc.name_ja)
+
+
+def _build_indexes(cards: list[Card], card_digests: dict[str, bytes]) -> dict:
+    """构建搜索索引，返回卡池数据（也是快照的数据本体）。"""
+    cards_by_id: dict[str, Card] = {}
+    id_index = CardIdIndex()
+    cards_by_name: dict[str, list[Card]] = {}
+    ngram_index = NgramIndex()
+    name_index = NgramIndex()
+    fuzzy_index = FuzzyNameIndex()
+    pinyin_index = PinyinIndex()
+    skill_bm25 = SkillBM25()
+    facets = FacetIndex()
+    stats = StatIndex()
+
+    for pos, card in enumerate(cards):
+        # 按 ID 索引
+        cid = card.id
+        if cid:
+            cards_by_id[cid] = card
+        # 有序 ID 数组（按卡包 / 职业区间浏览）
+        id_index.add(pos, cid)
+
+        # 按名称索引（中文优先，同时索引日文用于跨语种搜索）
+        for key in _name_keys(card):
+            cards_by_name.setdefault(key, []).append(card)
+
+        # n-gram 倒排索引（覆盖 _searcher 打分用到的全部搜索文档字段）
+        ngram_index.add(pos, card.search_doc)
+        # 只含卡名的 n-gram 索引（Top-K 排序估算分数上界用）
+        name_index.add(pos, _name_texts(card))
+        # 卡名容错索引（搜索无结果时给出"你是不是要找"）
+        fuzzy_index.add(pos, _name_texts(card))
+        # 卡名拼音 / 首字母有序键数组（纯字母查询用）
+        pinyin_index.add(pos, card.name_pinyin)
+        # 技能文本 BM25 词项统计（技能层同分时按相关度排序）
+        skill_bm25.add(pos, card.skill_segments)
+
+        # 分面位图（职业/类型/稀有度/卡包/种族/费用段）
+        facets.add(pos, card)
+
+        # 数值列（费用/攻击/生命/稀有度区间谓词）
+        stats.add(pos, card)
+
+    id_index.finish()
+    ngram_index.finish()
+    name_index.finish()
+    pinyin_index.finish()
+    stats.finish()
+    skill_bm25.finish()
+    # 相似卡牌近邻表（候选取自 n-gram 索引与分面位图，NumPy 分块打分）
+    similar = build_similar_table(cards, ngram_index, facets)
+
+    return {
+        "cards": cards,
+        "cards_by_id": cards_by_id,
+        "id_index": id_index,
+        "cards_by_name": cards_by_name,
+        "ngram_index": ngram_index,
+        "name_index": name_index,
+        "fuzzy_index": fuzzy_index,
+        "pinyin_index": pinyin_index,
+        "skill_bm25": skill_bm25,
+        "facets": facets,
+        "stats": stats,
+        "similar": similar,
+        "card_digests": card_digests,
+    }
+
+
+def _patch_card_data(
+    generation: CardGeneration,
+    entries: list[tuple[str, dict, bytes]],
+) -> tuple[dict, dict]:
+    """按 card_id 对比新旧数据，生成新一代卡池数据（不修改旧一代）。
+
+    - 旧卡顺序不变、只有修改或末尾追加：在索引副本上逐卡打补丁
+    - 有删除或重排：复用未变化的 Card 对象，只重新归一化变化的卡，索引整体重建
+
+    Args:
+        generation: 当前这一代数据
+        entries: 新数据的 (card_id, 原始卡牌, 摘要) 列表，按文件顺序
+
+    Returns:
+        (新一代卡池数据, 变化统计)
+    """
+    old_cards = generation.cards
+    old_digests = generation.card_digests
+    old_ids = [card.id for card in old_cards]
+    new_ids = {cid for cid, _, _ in entries}
+    change_stats = {
+        "changed": sum(
+            1 for cid, _, digest in entries
+            if cid in old_digests and old_digests[cid] != digest
+        ),
+        "added": len(new_ids - old_digests.keys()),
+        "removed": len(old_digests.keys() - new_ids),
+    }
+    card_digests = {cid: digest for cid, _, digest in entries}
+
+    if [cid for cid, _, _ in entries[:len(old_ids)]] != old_ids:
+        cards = []
+        for cid, raw, digest in entries:
+            old_card = generation.cards_by_id.get(cid)
+            if old_card is not None and old_digests.get(cid) == digest:
+                cards.append(old_card)
+            else:
+                cards.append(_normalize_card(raw))
+        return _build_indexes(cards, card_digests), change_stats
+
+    cards = list(old_cards)
+    cards_by_id = dict(generation.cards_by_id)
+    id_index = generation.id_index.copy()
+    cards_by_name = dict(generation.cards_by_name)
+    ngram_index = generation.ngram_index.copy()
+    name_index = generation.name_index.copy()
+    fuzzy_index = generation.fuzzy_index.copy()
+    pinyin_index = generation.pinyin_index.copy()
+    skill_bm25 = generation.skill_bm25.copy()
+    facets = generation.facets.copy()
+    stats = generation.stats.copy()
+    similar = generation.similar.copy()
+    changed_positions: list[int] = []
+
+    for pos, (cid, raw, digest) in enumerate(entries):
+        old_card = cards[pos] if pos < len(old_cards) else None
+        if old_card is not None and old_digests.get(cid) == digest:
+            continue
+
+        card = _normalize_card(raw)
+        changed_positions.append(pos)
+        if old_card is None:
+            cards.append(card)
+            ngram_index.patch(pos, (), card.search_doc)
+            name_index.patch(pos, (), _name_texts(card))
+            fuzzy_index.patch(pos, (), _name_texts(card))
+            pinyin_index.patch(pos, (), card.name_pinyin)
+        else:
+            cards[pos] = card
+            ngram_index.patch(pos, old_card.search_doc, card.search_doc)
+            name_index.patch(pos, _name_texts(old_card), _name_texts(card))
+            fuzzy_index.patch(pos, _name_texts(old_card), _name_texts(card))
+            pinyin_index.patch(pos, old_card.name_pinyin, card.name_pinyin)
+        old_segments = old_card.skill_segments if old_card is not None else None
+        skill_bm25.patch(pos, old_segments, card.skill_segments)
+        facets.patch(pos, old_card, card)
+        stats.patch(pos, old_card, card)
+        if old_card is not None:
+            for key in _name_keys(old_card):
+                remaining = [c for c in cards_by_name[key] if c is not old_card]
+                if remaining:
+                    cards_by_name[key] = remaining
+                else:
+                    del cards_by_name[key]
+
+        cards_by_id[cid] = card
+        id_index.patch(pos, old_card.id if old_card is not None else None, card.id)
+        for key in _name_keys(card):
+            cards_by_name[key] = cards_by_name.get(key, []) + [card]
+
+    # 近邻表只重算变化卡所在的行和近邻里含有变化卡的行（见 _similar.py）
+    similar.patch(cards, changed_positions, ngram_index, facets)
+
+    return {
+        "cards": cards,
+        "cards_by_id": cards_by_id,
+        "id_index": id_index,
+        "cards_by_name": cards_by_name,
+        "ngram_index": ngram_index,
+        "name_index": name_index,
+        "fuzzy_index": fuzzy_index,
+        "pinyin_index": pinyin_index,
+        "skill_bm25": skill_bm25,
+        "facets": facets,
+        "stats": stats,
+        "similar": similar,
+        "card_digests": card_digests,
+    }, change_stats
+
+
+def _load_card_data(
+    source: Path,
+    snapshot: Path,
+) -> tuple[dict, FileFingerprint, bool]:
+    """同步加载卡池：快照有效则直接用快照，否则完整解析并重写快照。
+
+    Returns:
+        (卡池数据, 源文件指纹, 是否来自快照)
+    """
+    fingerprint = file_fingerprint(source)
+    data = load_snapshot(snapshot, fingerprint)
+    if data is not None:
+        return data, fingerprint, True
+
+    data = _build_indexes(*_parse_cards(_read_chs_file(source)))
+    _try_save_snapshot(snapshot, fingerprint, data)
+    return data, fingerprint, False
+
+
+def _refresh_card_data(
+    source: Path,
+    snapshot: Path,
+    generation: CardGeneration,
+) -> Optional[tuple[dict, FileFingerprint, dict]]:
+    """同步增量刷新：源文件内容未变返回 None，否则返回打过补丁的新一代数据。
+
+    Returns:
+        None 或 (卡池数据, 源文件指纹, 变化统计)
+    """
+    fingerprint = file_fingerprint(source)
+    old = generation.fingerprint
+    if old is not None and (old.size, old.sha256) == (fingerprint.size, fingerprint.sha256):
+        return None
+
+    entries = [
+        (_card_id_of(raw), raw, _card_digest(raw))
+        for raw in _iter_raw_cards(_read_chs_file(source))
+    ]
+    data, stats = _patch_card_data(generation, entries)
+    _try_save_snapshot(snapshot, fingerprint, data)
+    return data, fingerprint, stats
+
+
+def _try_save_snapshot(snapshot: Path, fingerprint: FileFingerprint, data: dict):
+    """写快照；快照只是加速手段，写失败不影响本次加载。"""
+    try:
+        save_snapshot(snapshot, fingerprint, data)
+    except Exception as e:
+        _get_logger().warning(f"卡池快照写入失败: {e}")
+
+
 # ============== 全局缓存实例 ==============
 
 card_cache = CardCache()
@@ -397,9 +931,56 @@ def _try_register_scheduler():
 
         @scheduler.scheduled_job("interval", hours=CACHE_EXPIRE_HOURS)
         async def _refresh_cache():
-            _get_logger().info("定时刷新影之诗卡牌数据...")
-            await card_cache.load_cards(force=True)
+            _get_logger().info("定时检查影之诗卡牌数据...")
+            await card_cache.refresh()
 
         _get_logger().info("定时任务注册成功（每24小时刷新一次）")
     except Exception as e:
         _get_logger().debug(f"定时任务注册失败（不影响核心功能）: {e}")
+
+
+# ============== 数据文件监视（可选） ==============
+
+_watch_task: Optional[asyncio.Task] = None
+
+
+def _stat_key(path: Path) -> Optional[tuple[int, int]]:
+    """文件 (大小, mtime_ns)，文件不存在时返回 None。"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+async def _watch_source(interval: float):
+    """轮询数据文件，stat 变化时触发增量刷新（内容是否真变由 refresh 判断）。"""
+    last_key = _stat_key(CHS_CARDS_FILE)
+    while True:
+        await asyncio.sleep(interval)
+        key = _stat_key(CHS_CARDS_FILE)
+        if key == last_key or key is None:
+            continue
+        last_key = key
+        _get_logger().info("检测到卡牌数据文件变化，开始增量刷新...")
+        try:
+            await card_cache.refresh()
+        except Exception as e:
+            _get_logger().error(f"卡牌数据自动刷新失败: {e}")
+
+
+def start_file_watcher(interval: float = WATCH_INTERVAL_SECONDS):
+    """启动数据文件轮询监视（重复调用无副作用，interval <= 0 时不启动）。"""
+    global _watch_task
+    if interval <= 0 or (_watch_task is not None and not _watch_task.done()):
+        return
+    _watch_task = asyncio.ensure_future(_watch_source(interval))
+    _get_logger().info(f"卡牌数据文件监视已启动（每 {interval} 秒检查一次）")
+
+
+def stop_file_watcher():
+    """停止数据文件轮询监视。"""
+    global _watch_task
+    if _watch_task is not None:
+        _watch_task.cancel()
+        _watch_task = None
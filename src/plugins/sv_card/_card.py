@@ -0,0 +1,111 @@
+# plugins/sv_card/_card.py
+"""影之诗超凡世界 紧凑卡牌记录。
+
+设计说明：
+    - Card 使用 __slots__ 存储字段，不再为每张卡分配一个 25 键的 dict
+    - 职业/类型/稀有度/CV/画师等高重复字段经 sys.intern 驻留，全卡池共享同一个字符串对象
+    - tribes 转为 tuple 并在卡池内共享（绝大多数卡是 (0,)）
+    - 技能文本的展示渲染（去标签、列表预览行）不随卡牌常驻，展示时由 _formatter 现场渲染
+      （单次扫描，见 _markup.py）；常驻的预计算字段只有查询要用的 search_doc / name_pinyin /
+      skill_segments
+    - flavour_text / flavour_text_ja 不展示（见 _formatter.py），不再常驻内存
+    - 提供 get() / [] / in / keys() 等 dict 兼容接口，_formatter 等旧代码无需改动
+"""
+
+import sys
+from typing import Any, Iterator
+
+# 字段顺序即 __slots__ 顺序
+CARD_FIELDS = (
+    "id",
+    "name",
+    "name_raw",
+    "name_ja",
+    "class_code",
+    "class_name",
+    "type",
+    "type_name",
+    "rarity",
+    "rarity_name",
+    "cost",
+    "atk",
+    "life",
+    "skill_text",
+    "skill_text_ja",
+    "evo_skill_text",
+    "cv",
+    "illustrator",
+    "tribes",
+    "card_set_id",
+    "base_card_image_id",
+    "skill_has_kana",
+    "search_doc",
+    "name_pinyin",
+    "skill_segments",
+)
+
+_FIELD_SET = frozenset(CARD_FIELDS)
+
+# tribes 元组池（同值共享同一对象）
+_TRIBES_POOL: dict[tuple, tuple] = {}
+
+
+def intern_str(value: str) -> str:
+    """驻留高重复的枚举型字符串（空串原样返回）。"""
+    return sys.intern(value) if value else ""
+
+
+def intern_tribes(tribes) -> tuple:
+    """把 tribes 列表转为卡池内共享的 tuple。"""
+    key = tuple(tribes or ())
+    return _TRIBES_POOL.setdefault(key, key)
+
+
+class Card:
+    """单张卡牌（只读语义，字段见 CARD_FIELDS）。"""
+
+    __slots__ = CARD_FIELDS
+
+    def __init__(self, **fields: Any):
+        for field in CARD_FIELDS:
+            setattr(self, field, fields[field])
+
+    # ---------- dict 兼容接口 ----------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _FIELD_SET
+
+    def keys(self) -> tuple[str, ...]:
+        return CARD_FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(CARD_FIELDS)
+
+    def to_dict(self) -> dict:
+        """导出为普通 dict（调试 / 序列化用）。"""
+        return {field: getattr(self, field) for field in CARD_FIELDS}
+
+    def __reduce__(self):
+        # 快照序列化：只存字段值元组，比默认的 slots 状态字典更紧凑
+        return (_card_from_values, tuple(getattr(self, field) for field in CARD_FIELDS))
+
+    def __repr__(self) -> str:
+        return f"Card(id={self.id!r}, name={self.name!r})"
+
+
+def _card_from_values(*values: Any) -> Card:
+    """按 CARD_FIELDS 顺序的字段值还原 Card（pickle 用）。"""
+    card = Card.__new__(Card)
+    for field, value in zip(CARD_FIELDS, values):
+        setattr(card, field, value)
+    return card
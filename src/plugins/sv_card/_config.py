@@ -17,12 +17,27 @@ class SVCardConfig(BaseModel):
     # 英文数据源URL
     en_cards_url: str = "https://raw.githubusercontent.com/ParticleG/shadowverse-wb-db/main/cards.json"
 
+    # 其他语言数据源（语言 → 本地路径或 URL，首次查询该语言时才加载；en 缺省用 en_cards_url）
+    # chs / cht / ja 由中文数据文件覆盖，无需配置
+    lang_sources: dict[str, str] = {}
+
+    # 语言数据下载缓存目录
+    lang_cache_dir: str = "data/sv_card/langs"
+
     # 中文数据源路径（本地 JSON）
     chs_cards_path: str = "src/plugins/sv_card/data/cards_cn_translated.json"
 
+    # 卡池二进制快照路径（按源文件 大小+mtime+sha256 失效）
+    snapshot_path: str = "data/sv_card/cards_cn_snapshot.pkl"
+
     # 缓存过期时间（小时）
     cache_expire_hours: int = 24
 
+    # 数据文件轮询间隔（秒），文件变化后自动增量刷新；默认 0 不监视（按 cache_expire_hours
+    # 定时检查或 /sv_reload 即可）。开启后每次轮询都会 stat 一次数据文件，需要手动替换数据
+    # 文件后几秒内生效的部署再设为 5 之类的值
+    watch_interval_seconds: int = 0
+
     # 搜索结果最大数量
     search_result_limit: int = 10
 
@@ -35,8 +50,40 @@ class SVCardConfig(BaseModel):
     # 图片缓存目录
     image_cache_dir: str = "data/sv_card/images"
 
-    # 默认语言（en/chs/cht/ja/ko）
-    default_lang: str = "en"
+    # 图片缓存容量上限（MB，超出后按最近最少使用淘汰）
+    image_cache_max_mb: int = 256
+
+    # 卡图语言（en/chs/cht/ja/ko），cht 为繁体，bot 图片可显示
+    image_lang: str = "cht"
+
+    # 卡图同时下载数
+    image_download_concurrency: int = 4
+
+    # 卡图转码 / 写盘工作线程数
+    image_transcode_workers: int = 2
+
+    # 单张卡图下载超时（秒）
+    image_download_timeout: float = 15.0
+
+    # 多卡结果拼图目录（每次启动清空）
+    grid_cache_dir: str = "data/sv_card/grids"
+
+    # 拼图每行卡数
+    grid_columns: int = 5
+
+    # 拼图中每张卡的缩略图宽度（像素，高度按卡图比例 1.3 倍）
+    grid_thumb_width: int = 160
+
+    # 最多记忆的拼图数量
+    grid_cache_size: int = 64
+
+    # 拼图合成进程数
+    grid_workers: int = 1
+
+    # 默认语言（en/chs/cht/ja/ko）：chs / cht / ja 由主卡池覆盖，不额外加载；
+    # 设为 en / ko 时启动后在后台预加载该语言列（需下载并建索引，按需开启），
+    # 否则其他语言在首次查询时才加载
+    default_lang: str = "chs"
 
     # 是否自动加载数据（启动时）
     auto_load_on_startup: bool = True
@@ -0,0 +1,87 @@
+# plugins/sv_card/_cursor.py
+"""影之诗超凡世界 /sv 分页游标。
+
+设计说明：
+    - 每个会话（群号, QQ 号）保存最近一次列表查询的完整排序结果（卡牌 ID 元组）和当前页
+    - /sv next、/sv prev、/sv p3 直接从游标切片，不重新搜索、不重新排序
+    - 游标带 TTL（按最后一次访问计），过期即失效；会话数超过上限时淘汰最久未用的
+    - 游标只存 ID：翻页时按 ID 从当前一代卡池取卡，数据刷新后删掉的卡自动跳过
+"""
+
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional
+
+# 每页条数
+PAGE_SIZE = 10
+
+# 游标有效期（秒）
+CURSOR_TTL_SECONDS = 600
+
+# 最多保留的会话数
+CURSOR_CACHE_SIZE = 512
+
+
+class SearchCursor(NamedTuple):
+    """一次列表查询的翻页状态。"""
+
+    query: str
+    card_ids: tuple[str, ...]
+    page: int
+    page_size: int = PAGE_SIZE
+    # 结果是否在保留上限处被截断
+    capped: bool = False
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.card_ids) // self.page_size))
+
+    def page_ids(self, page: int) -> tuple[str, ...]:
+        """第 page 页（从 1 开始）的卡牌 ID。"""
+        start = (page - 1) * self.page_size
+        return self.card_ids[start:start + self.page_size]
+
+
+class CursorCache:
+    """按会话保存翻页游标（TTL + LRU）。"""
+
+    def __init__(
+        self,
+        ttl: float = CURSOR_TTL_SECONDS,
+        maxsize: int = CURSOR_CACHE_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._clock = clock
+        # 会话 → (游标, 最后访问时间)
+        self._entries: "OrderedDict[tuple, tuple[SearchCursor, float]]" = OrderedDict()
+
+    def get(self, session: tuple) -> Optional[SearchCursor]:
+        entry = self._entries.get(session)
+        if entry is None:
+            return None
+        cursor, touched = entry
+        now = self._clock()
+        if now - touched > self._ttl:
+            del self._entries[session]
+            return None
+        self._entries[session] = (cursor, now)
+        self._entries.move_to_end(session)
+        return cursor
+
+    def put(self, session: tuple, cursor: SearchCursor):
+        self._entries[session] = (cursor, self._clock())
+        self._entries.move_to_end(session)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, session: tuple):
+        self._entries.pop(session, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# 全局实例
+cursor_cache = CursorCache()
@@ -0,0 +1,222 @@
+# plugins/sv_card/_facets.py
+"""影之诗超凡世界 位图分面索引。
+
+设计说明：
+    - 每个 (分面, 取值) 对应一个 Python int 位图，第 i 位 = 卡池第 i 张卡
+    - 分面：职业 class_code / 类型 type / 稀有度 rarity / 卡包 card_set_id /
+      种族 tribes（一卡多值）/ 费用段 cost（0-9 各一段，10 及以上合为一段）/
+      关键词 keyword（技能文本里 <color=Keyword> 标出的词，一卡多值，见 _markup.py）
+    - 关键词分面的 values() 即关键词词频表（每个词出现在多少张卡上）
+    - 组合过滤 = 位图按位与 / 或，不逐卡判断
+    - 增量刷新：copy() 复制两层 dict（int 不可变，无需深拷贝），patch() 改单卡位
+
+数值列（StatIndex）：
+    - cost / atk / life / rarity 按列存"取值 → 位图"，并预先累积出"<= 取值"的前缀位图
+    - 区间谓词（cost<=2、atk>=3、life=5 …）= 二分定位取值 + 一次位运算，
+      对整个卡池一次性求出结果位图，不逐卡比较
+    - 刻意不用 NumPy 数值列（NumPy 只在 _similar.py 构建近邻表时使用）：谓词结果要与分面位图、
+      n-gram 候选及查询语言的执行计划（_query.py）按位组合，列式比较得到的布尔数组每次都要
+      packbits 再转回 int。10 万张卡时 cost<=2 用前缀位图约 0.2 微秒，NumPy 比较加转换约 40 微秒；
+      增量刷新也只需改单卡位并重算受影响列的前缀
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Hashable, Iterator
+
+# 费用段上限：>= COST_BUCKET_MAX 的卡归入同一段
+COST_BUCKET_MAX = 10
+
+FACETS = ("class", "type", "rarity", "set", "tribe", "cost", "keyword")
+
+
+def cost_bucket(cost: int) -> int:
+    """费用 → 费用段。"""
+    return min(max(cost, 0), COST_BUCKET_MAX)
+
+
+def _card_facet_values(card) -> Iterator[tuple[str, Hashable]]:
+    """一张卡在各分面上的取值。"""
+    yield "class", card.class_code
+    yield "type", card.type
+    yield "rarity", card.rarity
+    yield "set", card.card_set_id
+    for tribe in card.tribes:
+        if tribe:
+            yield "tribe", tribe
+    yield "cost", cost_bucket(card.cost or 0)
+    for keyword in card.skill_segments.keywords:
+        yield "keyword", keyword
+
+
+def popcount(mask: int) -> int:
+    """位图中 1 的个数（int.bit_count 需要 3.10+）。"""
+    return bin(mask).count("1")
+
+
+def iter_positions(mask: int) -> Iterator[int]:
+    """按升序列出位图中为 1 的下标（惰性，可提前停止）。"""
+    bits = bin(mask)[:1:-1]
+    pos = bits.find("1")
+    while pos != -1:
+        yield pos
+        pos = bits.find("1", pos + 1)
+
+
+class FacetIndex:
+    """分面位图索引。"""
+
+    def __init__(self):
+        self._bitmaps: dict[str, dict[Hashable, int]] = {facet: {} for facet in FACETS}
+        self._all_mask = 0
+
+    def add(self, pos: int, card):
+        """登记一张卡（pos 为卡池下标）。"""
+        bit = 1 << pos
+        for facet, value in _card_facet_values(card):
+            bitmaps = self._bitmaps[facet]
+            bitmaps[value] = bitmaps.get(value, 0) | bit
+        self._all_mask |= bit
+
+    def copy(self) -> "FacetIndex":
+        """复制（位图是不可变 int，只需复制两层 dict）。"""
+        clone = FacetIndex()
+        clone._bitmaps = {facet: dict(values) for facet, values in self._bitmaps.items()}
+        clone._all_mask = self._all_mask
+        return clone
+
+    def patch(self, pos: int, old_card, new_card):
+        """把下标 pos 的登记内容从 old_card 换成 new_card（old_card 为 None 表示新增）。"""
+        bit = 1 << pos
+        if old_card is not None:
+            for facet, value in _card_facet_values(old_card):
+                bitmaps = self._bitmaps[facet]
+                remaining = bitmaps.get(value, 0) & ~bit
+                if remaining:
+                    bitmaps[value] = remaining
+                else:
+                    bitmaps.pop(value, None)
+        self.add(pos, new_card)
+
+    def mask(self, facet: str, value: Hashable) -> int:
+        """取单个 (分面, 取值) 的位图，无此取值时为 0。"""
+        return self._bitmaps[facet].get(value, 0)
+
+    def values(self, facet: str) -> dict[Hashable, int]:
+        """某分面下全部取值 → 命中卡牌数。"""
+        return {value: popcount(bitmap) for value, bitmap in self._bitmaps[facet].items()}
+
+    @property
+    def all_mask(self) -> int:
+        """全部卡牌的位图。"""
+        return self._all_mask
+
+
+# ============== 数值列 ==============
+
+STAT_COLUMNS = ("cost", "atk", "life", "rarity")
+
+STAT_OPS = ("<=", ">=", "==", "!=", "<", ">", "=")
+
+
+class _StatColumn:
+    """单个数值列：取值 → 位图，以及按取值升序累积的 "<=" 前缀位图。"""
+
+    __slots__ = ("eq", "values", "le")
+
+    def __init__(self):
+        self.eq: dict[int, int] = {}
+        self.values: list[int] = []
+        self.le: list[int] = []
+
+    def rebuild_prefix(self):
+        self.values = sorted(self.eq)
+        self.le = []
+        acc = 0
+        for value in self.values:
+            acc |= self.eq[value]
+            self.le.append(acc)
+
+    def mask_le(self, value: int) -> int:
+        i = bisect_right(self.values, value)
+        return self.le[i - 1] if i else 0
+
+    def mask_lt(self, value: int) -> int:
+        i = bisect_left(self.values, value)
+        return self.le[i - 1] if i else 0
+
+    def copy(self) -> "_StatColumn":
+        clone = _StatColumn()
+        clone.eq = dict(self.eq)
+        clone.values = list(self.values)
+        clone.le = list(self.le)
+        return clone
+
+
+class StatIndex:
+    """数值列位图索引（cost / atk / life / rarity 的区间谓词）。"""
+
+    def __init__(self):
+        self._columns = {name: _StatColumn() for name in STAT_COLUMNS}
+        self._all_mask = 0
+
+    @staticmethod
+    def _card_values(card) -> Iterator[tuple[str, int]]:
+        for name in STAT_COLUMNS:
+            yield name, getattr(card, name) or 0
+
+    def add(self, pos: int, card):
+        """登记一张卡（全量构建时调用，结束后需 finish()）。"""
+        bit = 1 << pos
+        for name, value in self._card_values(card):
+            eq = self._columns[name].eq
+            eq[value] = eq.get(value, 0) | bit
+        self._all_mask |= bit
+
+    def finish(self):
+        """全量构建结束：生成各列前缀位图。"""
+        for column in self._columns.values():
+            column.rebuild_prefix()
+
+    def copy(self) -> "StatIndex":
+        clone = StatIndex()
+        clone._columns = {name: column.copy() for name, column in self._columns.items()}
+        clone._all_mask = self._all_mask
+        return clone
+
+    def patch(self, pos: int, old_card, new_card):
+        """把下标 pos 的登记内容从 old_card 换成 new_card（old_card 为 None 表示新增）。"""
+        bit = 1 << pos
+        touched = set()
+        if old_card is not None:
+            for name, value in self._card_values(old_card):
+                eq = self._columns[name].eq
+                remaining = eq.get(value, 0) & ~bit
+                if remaining:
+                    eq[value] = remaining
+                else:
+                    eq.pop(value, None)
+                touched.add(name)
+        for name, value in self._card_values(new_card):
+            eq = self._columns[name].eq
+            eq[value] = eq.get(value, 0) | bit
+            touched.add(name)
+        self._all_mask |= bit
+        for name in touched:
+            self._columns[name].rebuild_prefix()
+
+    def mask(self, column: str, op: str, value: int) -> int:
+        """求谓词 `column op value` 的结果位图。"""
+        col = self._columns[column]
+        if op == "<=":
+            return col.mask_le(value)
+        if op == "<":
+            return col.mask_lt(value)
+        if op == ">=":
+            return self._all_mask & ~col.mask_lt(value)
+        if op == ">":
+            return self._all_mask & ~col.mask_le(value)
+        if op in ("=", "=="):
+            return col.eq.get(value, 0)
+        if op == "!=":
+            return self._all_mask & ~col.eq.get(value, 0)
+        raise ValueError(f"unsupported operator: {op}")
@@ -2,9 +2,9 @@
 """影之诗超凡世界 卡牌信息格式化。
 
 功能：
-    - 格式化单卡详情为文本消息
+    - 格式化单卡详情为文本消息（附相似卡牌推荐）
     - 格式化搜索结果列表
-    - 处理 skill_text 中的格式标签（<color> <ev> <sev> <hr> <ridx>）
+    - 处理 skill_text 中的格式标签（<color> <ev> <sev> <hr> <ridx>，见 _markup.py）
     - 翻译质量提示：skill_text 残留假名时附日文原文对照
 
 注意：
@@ -13,18 +13,13 @@
     - class 从 card_id[3] 推断，已转 class_code + class_name
 """
 
-import re
 from typing import Optional
 
+from ._cache import TRIBE_CODE_TO_NAME
+from ._markup import preview_line, render_skill_text
 
-# ============== 格式标签处理 ==============
-
-# skill_text 中的标签语义对照（用于简化显示）
-# 注意：原始数据里 <color=Keyword> 是大写 K，但部分可能是 <color=keyword>
-# 为安全起见使用正则处理
-_IMPORT_RE = re.compile(r'<color=([^>]+)>', re.IGNORECASE)
-_CLOSE_RE = re.compile(r'</color>', re.IGNORECASE)
 
+# ============== 格式标签处理 ==============
 
 def _render_skill_text(text: str) -> str:
     """把 skill_text 中的格式标签转换为更适合纯文本显示的形式。
@@ -37,48 +32,25 @@ def _render_skill_text(text: str) -> str:
         - 用 <hr> 标记基础/进化分隔
         - 用 <ridx=N>...</ridx> 标记选项块
 
-    渲染策略：去掉 HTML 风格的 <...> 标签，保留中文方括号，仅对特殊标签加修饰：
-        <color=...>...</color>  → 直接去掉（保留内部文字，外层【】已存在）
-        <ev>...</ev>           → 前面加 ↳ 进化时：
-        <sev>...</sev>         → 前面加 ↳ 超进化时：
-        <hr>                   → 单独一行 ────
-        <ridx=N>...</ridx>     → （N+1）...
+    渲染规则见 _markup.py（单次扫描）。渲染结果不随 Card 常驻，展示时现场渲染。
     """
-    if not text:
-        return ""
-
-    out = text
-
-    # 1) 超进化 / 进化（不区分大小写）
-    out = re.sub(r'<sev>', '\n↳ 超进化时：', out, flags=re.IGNORECASE)
-    out = re.sub(r'</sev>', '', out, flags=re.IGNORECASE)
-    out = re.sub(r'<ev>', '\n↳ 进化时：', out, flags=re.IGNORECASE)
-    out = re.sub(r'</ev>', '', out, flags=re.IGNORECASE)
-
-    # 2) 分隔线
-    out = re.sub(r'<hr>', '\n────────\n', out, flags=re.IGNORECASE)
-
-    # 3) 选项块：保留标签内的（1）（2）原文，只去掉 <ridx=N> </ridx> 标签
-    out = re.sub(r'<ridx=\d+>', '', out, flags=re.IGNORECASE)
-    out = re.sub(r'</ridx>', '', out, flags=re.IGNORECASE)
+    return render_skill_text(text)
 
-    # 4) 颜色标签：去掉 <color=...> 和 </color>，只留下内部文字
-    out = re.sub(r'<color=[^>]+>', '', out, flags=re.IGNORECASE)
-    out = re.sub(r'</color>', '', out, flags=re.IGNORECASE)
 
-    # 5) 任何残留的 <...> 标签全部移除
-    out = re.sub(r'<[^>]+>', '', out)
-
-    # 6) 多余空白清理
-    out = re.sub(r'\n{3,}', '\n\n', out)
-    out = re.sub(r' {2,}', ' ', out)
-    return out.strip()
+def _rendered(card: dict, field: str) -> str:
+    """渲染卡牌的技能文本字段（skill_text / skill_text_ja）。"""
+    return _render_skill_text(card.get(field, ""))
 
 
 # ============== 单卡详情 ==============
 
-def format_single_card(card: dict) -> str:
-    """格式化单张卡牌为文本消息。"""
+def format_single_card(card: dict, similar: Optional[list[dict]] = None) -> str:
+    """格式化单张卡牌为文本消息。
+
+    Args:
+        card: 卡牌
+        similar: 相似卡牌（预计算的近邻表，见 _similar.py），附在末尾
+    """
     # 基础信息
     card_id = card.get("id", "")
     name = card.get("name") or "未知"
@@ -92,8 +64,8 @@ def format_single_card(card: dict) -> str:
     life = card.get("life", 0)
 
     # 技能描述（含翻译质量提示）
-    skill_text = _render_skill_text(card.get("skill_text", ""))
-    skill_text_ja = _render_skill_text(card.get("skill_text_ja", ""))
+    skill_text = _rendered(card, "skill_text")
+    skill_text_ja = _rendered(card, "skill_text_ja")
     skill_has_kana = card.get("skill_has_kana", False)
 
     # 进化技能（API 恒空，进化效果已在 skill_text 的 <ev> 中处理）
@@ -155,21 +127,52 @@ def format_single_card(card: dict) -> str:
     # 卡片 ID
     lines.append(f"[ID: {card_id}]")
 
+    # 相似卡牌
+    if similar:
+        lines.append("")
+        lines.append("🔗 相似卡牌：" + "、".join(c.get("name") or "未知" for c in similar))
+        lines.append(f"（/sv like {card_id} 查看更多）")
+
     return "\n".join(lines)
 
 
 # ============== 搜索结果列表 ==============
 
-def format_search_results(cards: list[dict], keyword: str) -> str:
-    """格式化搜索结果列表。"""
+def format_search_results(
+    cards: list[dict],
+    keyword: str,
+    total: Optional[int] = None,
+    page: int = 1,
+    page_count: int = 1,
+    start: int = 1,
+    capped: bool = False,
+) -> str:
+    """格式化搜索结果列表。
+
+    Args:
+        cards: 本页的卡牌
+        keyword: 查询串
+        total: 结果总数；为 None 时只展示 cards（不分页）
+        page / page_count: 当前页 / 总页数（从 1 开始）
+        start: 本页第一条的序号（跨页连续编号）
+        capped: 结果是否被截断在保留上限
+    """
     if not cards:
         return f"未找到包含「{keyword}」的卡牌。"
 
     lines = []
-    lines.append(f"🔍 搜索「{keyword}」找到 {len(cards)} 张卡牌：")
+    if total is None:
+        lines.append(f"🔍 搜索「{keyword}」找到 {len(cards)} 张卡牌：")
+    elif page_count > 1:
+        lines.append(
+            f"🔍 搜索「{keyword}」找到 {total}{'+' if capped else ''} 张卡牌"
+            f"（第 {page}/{page_count} 页）："
+        )
+    else:
+        lines.append(f"🔍 搜索「{keyword}」找到 {total} 张卡牌：")
     lines.append("")
 
-    for i, card in enumerate(cards, 1):
+    for i, card in enumerate(cards, start):
         name = card.get("name") or "未知"
         class_name = card.get("class_name", "中立")
         type_name = card.get("type_name", "未知")
@@ -179,10 +182,7 @@ def format_search_results(cards: list[dict], keyword: str) -> str:
         life = card.get("life", 0)
 
         # 简化的技能描述（只取第一行）
-        skill_text = _render_skill_text(card.get("skill_text", ""))
-        first_line = skill_text.split("\n", 1)[0] if skill_text else ""
-        if len(first_line) > 30:
-            first_line = first_line[:27] + "..."
+        first_line = preview_line(_rendered(card, "skill_text"))
 
         # 状态行
         status_parts = []
@@ -208,13 +208,36 @@ def format_search_results(cards: list[dict], keyword: str) -> str:
 
         lines.append(line)
 
-    if len(cards) >= 10:
+    if total is None:
+        if len(cards) >= 10:
+            lines.append("")
+            lines.append("（仅显示前10条结果，请使用更精确的关键词）")
+    elif page < page_count:
         lines.append("")
-        lines.append("（仅显示前10条结果，请使用更精确的关键词）")
+        lines.append(f"（发送 /sv next 或 /sv p{page + 1} 查看下一页）")
+    elif capped:
+        lines.append("")
+        lines.append(f"（最多保留前 {total} 条结果，请使用更精确的关键词）")
 
     return "\n".join(lines)
 
 
+def format_keyword_glossary(entries: list[tuple[str, int]], total: int) -> str:
+    """格式化关键词表（关键词 + 出现在多少张卡上）。"""
+    if not entries:
+        return "关键词表为空。"
+
+    lines = [f"📖 关键词表（共 {total} 个，按出现卡牌数排序）：", ""]
+    for i in range(0, len(entries), 4):
+        lines.append("  ".join(f"{kw}×{count}" for kw, count in entries[i:i + 4]))
+    if len(entries) < total:
+        lines.append("")
+        lines.append(f"（仅显示前{len(entries)}个）")
+    lines.append("")
+    lines.append("用 /sv kw:<关键词> 查看带该关键词的卡牌")
+    return "\n".join(lines)
+
+
 def format_card_list(cards: list[dict], title: str = "") -> str:
     """格式化卡牌列表（简洁模式）。"""
     if not cards:
@@ -236,26 +259,9 @@ def format_card_list(cards: list[dict], title: str = "") -> str:
 
 # ============== 辅助函数 ==============
 
-# 种族代码 → 中文名（与 tribes 字段对应）
-_TRIBE_CODE_TO_NAME = {
-    0: "",
-    1: "人类",
-    2: "精灵",
-    3: "野兽",
-    4: "魔法师",
-    5: "龙",
-    6: "恶魔",
-    7: "不死",
-    8: "神",
-    9: "武人",
-    10: "机械",
-    11: "造物",
-}
-
-
 def _tribe_to_name(tribe_code: int) -> str:
     """种族代码 → 中文名。"""
-    return _TRIBE_CODE_TO_NAME.get(tribe_code, "")
+    return TRIBE_CODE_TO_NAME.get(tribe_code, "")
 
 
 # ============== 图片 URL ==============
@@ -0,0 +1,187 @@
+# plugins/sv_card/_fuzzy.py
+"""影之诗超凡世界 卡名容错索引（SymSpell 删除字典）。
+
+设计说明：
+    - 只收录归一化后的卡名（中文名、日文名），用于搜索无结果时的"你是不是要找"
+    - 加载时为每个卡名生成"删去至多 MAX_EDIT_DISTANCE 个字符"的全部变体，
+      变体 → 卡名 建成字典；查询时对查询串做同样的删除，按变体查字典得到候选
+    - 只对前 PREFIX_LENGTH 个字符生成变体，单个卡名的变体数有上界（<= 29 个），
+      一次查询也只查至多 29 个变体；候选再用带上界的编辑距离逐个确认，
+      不对全卡池逐个算编辑距离
+    - 编辑距离为 OSA（插入 / 删除 / 替换 / 相邻交换各计 1）
+    - 大多数删除变体只对应一个卡名：同一卡名的这些变体共用一个 frozenset，
+      第二个卡名加入时才换成 set（1 万张卡时约 30 万个变体里九成是这种情况）
+    - 增量刷新：copy() 共享两张表，patch() 只在副本上写时复制被改动的条目（frozenset 一律先复制）
+"""
+
+from typing import AbstractSet, Iterable, Optional
+
+# 最大编辑距离
+MAX_EDIT_DISTANCE = 2
+
+# 只对卡名前若干字符生成删除变体
+PREFIX_LENGTH = 7
+
+
+def max_distance_for(word: str) -> int:
+    """按查询串长度决定容错距离（单字不容错，短词容 1 处，长词容 2 处）。"""
+    length = len(word)
+    if length <= 1:
+        return 0
+    if length <= 4:
+        return 1
+    return MAX_EDIT_DISTANCE
+
+
+def _deletes(word: str, max_distance: int) -> set[str]:
+    """word 删去 0~max_distance 个字符得到的全部变体。"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """a 与 b 的 OSA 编辑距离；超过 max_distance 时提前返回 max_distance + 1。"""
+    if a == b:
+        return 0
+    over = max_distance + 1
+    la, lb = len(a), len(b)
+    if abs(la - lb) > max_distance:
+        return over
+    if not la or not lb:
+        return max(la, lb)
+
+    prev2: list[int] = []
+    prev = list(range(lb + 1))
+    for i in range(1, la + 1):
+        ca = a[i - 1]
+        cur = [i] + [0] * lb
+        row_min = i
+        for j in range(1, lb + 1):
+            cb = b[j - 1]
+            value = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                value = min(value, prev2[j - 2] + 1)
+            cur[j] = value
+            if value < row_min:
+                row_min = value
+        # 整行都已超过上界，之后只会更大
+        if row_min > max_distance:
+            return over
+        prev2, prev = prev, cur
+    return prev[lb] if prev[lb] <= max_distance else over
+
+
+class FuzzyNameIndex:
+    """卡名容错索引（删除变体 → 卡名，卡名 → 卡牌下标）。"""
+
+    def __init__(self):
+        self._deletes: dict[str, AbstractSet[str]] = {}
+        self._terms: dict[str, set[int]] = {}
+        # 副本中已私有化（可写）的条目；None 表示全部条目归本索引所有
+        self._owned: Optional[set[tuple[int, str]]] = None
+
+    @staticmethod
+    def _variants(term: str) -> set[str]:
+        return _deletes(term[:PREFIX_LENGTH], MAX_EDIT_DISTANCE)
+
+    def add(self, pos: int, terms: Iterable[str]):
+        """登记一张卡牌的卡名（仅用于全量构建）。"""
+        for term in set(terms):
+            if not term:
+                continue
+            positions = self._terms.get(term)
+            if positions is None:
+                self._terms[term] = {pos}
+                only = frozenset((term,))
+                for variant in self._variants(term):
+                    bucket = self._deletes.get(variant)
+                    if bucket is None:
+                        self._deletes[variant] = only
+                    elif isinstance(bucket, frozenset):
+                        self._deletes[variant] = {*bucket, term}
+                    else:
+                        bucket.add(term)
+            else:
+                positions.add(pos)
+
+    def lookup(
+        self,
+        word: str,
+        max_distance: Optional[int] = None,
+    ) -> list[tuple[str, int, AbstractSet[int]]]:
+        """查找与 word 编辑距离不超过 max_distance 的卡名。
+
+        Returns:
+            [(卡名, 距离, 卡牌下标集合), ...]，按距离升序、卡名长度升序（只读）
+        """
+        if not word:
+            return []
+        if max_distance is None:
+            max_distance = max_distance_for(word)
+        max_distance = min(max_distance, MAX_EDIT_DISTANCE)
+
+        candidates: set[str] = set()
+        for variant in _deletes(word[:PREFIX_LENGTH], max_distance):
+            bucket = self._deletes.get(variant)
+            if bucket:
+                candidates |= bucket
+
+        matches = []
+        for term in candidates:
+            distance = edit_distance(word, term, max_distance)
+            if distance <= max_distance:
+                matches.append((term, distance, self._terms[term]))
+        matches.sort(key=lambda m: (m[1], len(m[0]), m[0]))
+        return matches
+
+    def copy(self) -> "FuzzyNameIndex":
+        """浅拷贝：与原索引共享全部条目，之后 patch() 按需写时复制。"""
+        clone = FuzzyNameIndex()
+        clone._deletes = dict(self._deletes)
+        clone._terms = dict(self._terms)
+        clone._owned = set()
+        return clone
+
+    def patch(self, pos: int, old_terms: Iterable[str], new_terms: Iterable[str]):
+        """把下标 pos 的登记卡名从 old_terms 换成 new_terms。"""
+        old_set = {t for t in old_terms if t}
+        new_set = {t for t in new_terms if t}
+        for term in old_set - new_set:
+            positions = self._writable(1, self._terms, term)
+            positions.discard(pos)
+            if positions:
+                continue
+            del self._terms[term]
+            for variant in self._variants(term):
+                bucket = self._writable(0, self._deletes, variant)
+                bucket.discard(term)
+                if not bucket:
+                    del self._deletes[variant]
+        for term in new_set - old_set:
+            is_new = term not in self._terms
+            self._writable(1, self._terms, term).add(pos)
+            if is_new:
+                for variant in self._variants(term):
+                    self._writable(0, self._deletes, variant).add(term)
+
+    def _writable(self, table_id: int, table: dict, key: str) -> set:
+        """取可写条目（副本中首次写入时复制共享的集合）。"""
+        owned = self._owned
+        bucket = table.get(key)
+        if bucket is None:
+            bucket = table[key] = set()
+            if owned is not None:
+                owned.add((table_id, key))
+        elif isinstance(bucket, frozenset) or (owned is not None and (table_id, key) not in owned):
+            bucket = table[key] = set(bucket)
+            if owned is not None:
+                owned.add((table_id, key))
+        return bucket
+
+    @property
+    def term_count(self) -> int:
+        return len(self._terms)
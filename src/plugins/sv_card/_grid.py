@@ -0,0 +1,247 @@
+# plugins/sv_card/_grid.py
+"""影之诗超凡世界 多卡结果拼图（一组搜索结果合成一张图）。
+
+设计说明：
+    - /sv 返回多张卡时不逐张发图（会触发发送频率限制），而是把缓存里的卡图
+      缩成缩略图，按结果顺序排成网格、左上角标上与文字列表一致的序号，合成一张图发送
+    - 卡图来自 _images.image_service（本地磁盘缓存），缺图的位置留空白
+    - 合成（解码 + 缩放 + 编码）是纯 CPU 活，放进进程池执行，不占事件循环和 GIL
+    - 结果按 (卡牌 ID 序列, 起始序号, 布局, 数据代号) 记忆：同一查询再次出现时直接返回已生成的文件；
+      数据代号变化后旧拼图全部作废，超出数量上限时按最近最少使用删除
+    - 同一组卡的并发请求合并为一次合成（single-flight）
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Optional, Sequence
+
+from ._config import sv_card_config
+from ._images import _PIL_FORMATS, CardImageService, _remove_files, image_service
+
+# 本服务生成的文件名：拼图 <sha1>.<格式>，以及合成中断留下的 <sha1>.<格式>.<pid>.tmp
+_GRID_FILE_RE = re.compile(
+    r"[0-9a-f]{40}\.(?:%s)(?:\.\d+\.tmp)?" % "|".join(map(re.escape, _PIL_FORMATS))
+)
+
+# 注意：logger 在首次使用时才导入，避免在 NoneBot 初始化前导入
+
+
+def _get_logger():
+    from nonebot.log import logger
+    return logger
+
+
+class GridLayout(NamedTuple):
+    """拼图布局（参与记忆键）。"""
+
+    columns: int = 5
+    thumb_width: int = 160
+    thumb_height: int = 208
+    gap: int = 6
+    image_format: str = "png"
+
+
+# ============== 合成（进程池中执行） ==============
+
+def _compose_grid(
+    paths: Sequence[Optional[str]],
+    layout: GridLayout,
+    out_path: str,
+    first_number: int = 1,
+):
+    """把若干卡图按顺序拼成网格写入 out_path；paths 中的 None 留空白格。
+
+    格子左上角标序号，从 first_number 开始（翻页时与文字列表的序号一致）。
+    """
+    from PIL import Image, ImageDraw, ImageOps
+
+    columns = max(1, min(layout.columns, len(paths)))
+    rows = (len(paths) + columns - 1) // columns
+    width = columns * layout.thumb_width + (columns + 1) * layout.gap
+    height = rows * layout.thumb_height + (rows + 1) * layout.gap
+    canvas = Image.new("RGB", (width, height), (32, 32, 32))
+    draw = ImageDraw.Draw(canvas)
+    box = (layout.thumb_width, layout.thumb_height)
+
+    for i, path in enumerate(paths):
+        row, col = divmod(i, columns)
+        x = layout.gap + col * (layout.thumb_width + layout.gap)
+        y = layout.gap + row * (layout.thumb_height + layout.gap)
+        if path:
+            try:
+                with Image.open(path) as img:
+                    thumb = ImageOps.contain(img.convert("RGBA"), box)
+                offset = (
+                    x + (layout.thumb_width - thumb.width) // 2,
+                    y + (layout.thumb_height - thumb.height) // 2,
+                )
+                canvas.paste(thumb, offset, thumb)
+            except OSError:
+                pass
+        # 序号与文字列表一致
+        label = str(first_number + i)
+        draw.rectangle((x, y, x + 8 + 8 * len(label), y + 16), fill=(0, 0, 0))
+        draw.text((x + 4, y + 2), label, fill=(255, 255, 255))
+
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    canvas.save(tmp_path, format=_PIL_FORMATS.get(layout.image_format.lower(), "PNG"))
+    os.replace(tmp_path, out_path)
+
+
+# ============== 拼图服务 ==============
+
+class CardGridComposer:
+    """多卡拼图：按 (卡牌 ID 序列, 起始序号, 布局, 数据代号) 记忆已生成的图片文件。"""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        images: CardImageService,
+        layout: GridLayout = GridLayout(),
+        maxsize: int = 64,
+        workers: int = 1,
+    ):
+        self.root = cache_dir
+        self.images = images
+        self.layout = layout
+        self.maxsize = maxsize
+        self._workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # 记忆键 → 文件路径（最近使用的在末尾）
+        self._entries: "OrderedDict[tuple, Path]" = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._generation = 0
+        self._prepared = False
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls) -> "CardGridComposer":
+        config = sv_card_config
+        return cls(
+            cache_dir=Path(config.grid_cache_dir),
+            images=image_service,
+            layout=GridLayout(
+                columns=config.grid_columns,
+                thumb_width=config.grid_thumb_width,
+                thumb_height=config.grid_thumb_width * 13 // 10,
+                image_format=config.image_format,
+            ),
+            maxsize=config.grid_cache_size,
+            workers=config.grid_workers,
+        )
+
+    def make_key(self, card_ids: Sequence[str], generation: int, first_number: int = 1) -> tuple:
+        # 序号与文字列表对应，ID 按展示顺序（而非排序后）参与记忆键；数据代号固定放在最后
+        return (tuple(card_ids), first_number, self.layout, generation)
+
+    def _file_name(self, key: tuple) -> str:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return f"{digest}.{self.layout.image_format}"
+
+    async def compose(
+        self, card_ids: Sequence[str], generation: int, first_number: int = 1
+    ) -> Optional[Path]:
+        """取一组卡牌的拼图文件路径；没有任何卡图可用或合成失败时返回 None。"""
+        if not card_ids:
+            return None
+        loop = asyncio.get_running_loop()
+        if not self._prepared:
+            # 拼图只在本进程内有效（数据代号每次启动从头计），启动后清掉上次留下的拼图文件
+            self._prepared = True
+            await loop.run_in_executor(None, self._reset_dir)
+
+        removed = self._sync_generation(generation)
+        if removed:
+            await loop.run_in_executor(None, _remove_files, removed)
+
+        key = self.make_key(card_ids, generation, first_number)
+        path = self._entries.get(key)
+        if path is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return path
+        self.misses += 1
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._render(key, card_ids, first_number))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _render(
+        self, key: tuple, card_ids: Sequence[str], first_number: int
+    ) -> Optional[Path]:
+        paths = await asyncio.gather(*(self.images.get_image(card_id) for card_id in card_ids))
+        if not any(paths):
+            return None
+
+        loop = asyncio.get_running_loop()
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self._workers)
+        out_path = self.root / self._file_name(key)
+        try:
+            await loop.run_in_executor(
+                self._pool, _compose_grid,
+                [str(p) if p else None for p in paths], self.layout, str(out_path),
+                first_number,
+            )
+        except Exception as e:
+            _get_logger().warning(f"卡图拼图失败: {e}")
+            return None
+
+        if key[-1] != self._generation:
+            # 合成期间数据已刷新：结果照常返回给本次请求，但不再记忆
+            return out_path
+        self._entries[key] = out_path
+        removed = []
+        while len(self._entries) > self.maxsize:
+            _, old_path = self._entries.popitem(last=False)
+            removed.append(old_path)
+        if removed:
+            await loop.run_in_executor(None, _remove_files, removed)
+        return out_path
+
+    def _sync_generation(self, generation: int) -> list[Path]:
+        """数据代号变化时作废全部旧拼图，返回要删除的文件。"""
+        if generation == self._generation:
+            return []
+        self._generation = generation
+        removed = list(self._entries.values())
+        self._entries.clear()
+        return removed
+
+    def _reset_dir(self):
+        """清掉上次运行留下的拼图文件。
+
+        grid_cache_dir 可配置，可能与别的数据共用目录，只删除文件名符合本服务命名规则的文件。
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        _remove_files([
+            path for path in self.root.iterdir()
+            if _GRID_FILE_RE.fullmatch(path.name) and path.is_file()
+        ])
+
+    def close(self):
+        """关闭进程池（插件卸载 / 进程退出时调用）。"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 全局实例
+grid_composer = CardGridComposer.from_config()
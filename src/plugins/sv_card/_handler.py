@@ -2,22 +2,63 @@
 """影之诗超凡世界 查卡器命令处理。
 
 支持命令：
-    /sv <关键词>       模糊搜索卡片
-    /sv #<职业>        按职业过滤
+    /sv <关键词>       模糊搜索卡片（英文 / 韩文关键词在主卡池无结果时查对应语言的卡名和技能）
+    /sv #<职业> [类型] [稀有度] [N费]   按职业等分面过滤
+    /sv cost<=2 atk>=3 [#职业]          按数值条件过滤
+    /sv kw:<关键词>    按游戏关键词精确查找
+    /sv (A OR B) NOT C 布尔查询（AND/OR/NOT、"短语"、括号、name:/skill:/class: 等字段）
     /sv !<ID>          按卡牌ID精确查询
+    /sv 1001* / set:3  按 ID 前缀 / 卡包浏览（有序 ID 数组区间查询）
+    /sv next / p<N>    翻看上一次列表结果的下一页 / 第 N 页
+    /sv like <卡牌>    相似卡牌推荐（预计算近邻表）
+    /sv_kw             关键词表
     /sv_reload         重新加载卡牌数据
+    /sv_stats          查看卡库与查询缓存状态
 """
 
 import re
 from typing import Optional
 
 from nonebot import on_command
-from nonebot.adapters.onebot.v11 import Bot, MessageEvent
+from nonebot.adapters.onebot.v11 import Bot, MessageEvent, MessageSegment
 from nonebot.log import logger
 
-from ._cache import card_cache, reload_cards
-from ._formatter import format_card_list, format_single_card, format_search_results
-from ._searcher import search_cards
+from ._cache import (
+    CLASS_NAME_TO_CODE,
+    SET_ID_TO_PACK_NAME,
+    CardGeneration,
+    card_cache,
+    reload_cards,
+)
+from ._card import Card
+from ._config import sv_card_config
+from ._cursor import PAGE_SIZE, SearchCursor, cursor_cache
+from ._formatter import (
+    format_card_list,
+    format_keyword_glossary,
+    format_search_results,
+    format_single_card,
+    get_card_image_url,
+)
+from ._grid import grid_composer
+from ._images import image_service
+from ._langs import language_store, route_language
+from ._normalize import normalize_text
+from ._query import QuerySyntaxError, boolean_search, is_boolean_query
+from ._result_cache import CachedResult, result_cache
+from ._searcher import keyword_glossary, search_cards, suggest_cards
+
+# 列表每页展示条数
+SEARCH_LIMIT = PAGE_SIZE
+
+# 每次查询最多保留的排序结果（翻页上限）
+RESULT_MAX = 100
+
+# 关键词表展示条数
+GLOSSARY_LIMIT = 60
+
+# 单卡详情末尾附带的相似卡牌数
+SIMILAR_PREVIEW = 3
 
 
 # ============== 命令定义 ==============
@@ -36,6 +77,20 @@ sv_reload = on_command(
     block=True,
 )
 
+sv_stats = on_command(
+    "sv_stats",
+    aliases={"卡库状态"},
+    priority=10,
+    block=True,
+)
+
+sv_kw = on_command(
+    "sv_kw",
+    aliases={"关键词表"},
+    priority=10,
+    block=True,
+)
+
 
 # ============== 参数提取 ==============
 
@@ -62,6 +117,29 @@ def _extract_keyword(event: MessageEvent) -> str:
     return raw
 
 
+# 翻页：next / 下一页 / prev / 上一页 / p3 / 第3页
+_PAGE_RE = re.compile(
+    r"^(?:(next|下一页|下页)|(prev|上一页|上页)|(?:p|第)(\d+)页?)$",
+    flags=re.IGNORECASE,
+)
+
+
+# 按 ID 前缀浏览：1001* = 卡包 0 的精灵卡
+_ID_PREFIX_RE = re.compile(r"^!?(1\d{0,6})\*$")
+
+# 按卡包浏览：set:3 / set:10003 / set:3 精灵
+_SET_RE = re.compile(r"^set[:：]\s*(\d+)(?:\s+[#＃]?(\S+))?$", flags=re.IGNORECASE)
+
+
+# 相似卡牌：like 不屈的战士 / like:10001110 / 相似 不屈的战士
+_LIKE_RE = re.compile(r"^(?:like|相似)(?:[:：\s]\s*(.*))?$", flags=re.IGNORECASE)
+
+
+def _session_of(event: MessageEvent) -> tuple:
+    """翻页游标的会话键：(群号, QQ 号)，私聊群号记 0。"""
+    return (getattr(event, "group_id", None) or 0, event.get_user_id())
+
+
 # ============== 命令处理 ==============
 
 @sv_cmd.handle()
@@ -74,6 +152,18 @@ async def handle_sv_command(bot: Bot, event: MessageEvent):
         await _send_help(bot, event)
         return
 
+    # 翻页（从上一次列表结果的游标里取，不重新搜索）
+    page_match = _PAGE_RE.match(arg_text)
+    if page_match:
+        await _handle_page(bot, event, page_match)
+        return
+
+    # 相似卡牌推荐
+    like_match = _LIKE_RE.match(arg_text)
+    if like_match:
+        await _handle_like(bot, event, (like_match.group(1) or "").strip())
+        return
+
     # 检查是否为ID精确查询 (!ID 或纯7-8位数字)
     id_match = re.match(r'^!(\d+)$', arg_text)
     if id_match:
@@ -86,11 +176,24 @@ async def handle_sv_command(bot: Bot, event: MessageEvent):
         await _handle_id_query(bot, event, arg_text)
         return
 
-    # 检查是否为职业过滤 (#职业)
-    class_match = re.match(r'^#(\S+)$', arg_text)
-    if class_match:
-        class_filter = class_match.group(1)
-        await _handle_class_filter(bot, event, class_filter)
+    # 按 ID 前缀 / 卡包浏览（有序 ID 数组区间查询）
+    prefix_match = _ID_PREFIX_RE.match(arg_text)
+    if prefix_match:
+        prefix = prefix_match.group(1)
+        await _handle_id_range(bot, event, f"{prefix}*", card_cache.get_cards_by_id_prefix(prefix))
+        return
+    # set:3 后面只有职业名（或什么都没有）时才按卡包浏览；
+    # set:3 随从 / set:3 守护 等其余写法是布尔查询里的 set: 字段，交给搜索
+    set_match = _SET_RE.match(arg_text)
+    if set_match and (
+        set_match.group(2) is None or set_match.group(2).lower() in CLASS_NAME_TO_CODE
+    ):
+        await _handle_set_browse(bot, event, set_match)
+        return
+
+    # 检查是否为分面过滤 (#职业 [类型] [稀有度] [N费] ...)
+    if arg_text.startswith(("#", "＃")):
+        await _handle_class_filter(bot, event, arg_text)
         return
 
     # 模糊搜索
@@ -114,18 +217,107 @@ async def handle_reload_command(bot: Bot, event: MessageEvent):
         )
 
 
+@sv_stats.handle()
+async def handle_stats_command(bot: Bot, event: MessageEvent):
+    """查看卡库与查询缓存状态。"""
+    generation = card_cache.generation
+    stats = result_cache.stats()
+    sessions = len(cursor_cache)
+    lang_stats = language_store.stats()
+    image_stats = image_service.stats()
+    grid_stats = grid_composer.stats()
+    loaded_at = (
+        f"{generation.loaded_at:%Y-%m-%d %H:%M:%S}" if generation.loaded_at else "未加载"
+    )
+    await bot.send(
+        event=event,
+        message=(
+            f"📊 卡库：{len(generation.cards)} 张（第 {generation.number} 代，"
+            f"更新于 {loaded_at}）\n"
+            f"查询缓存：{stats['size']}/{stats['maxsize']} 条，"
+            f"命中 {stats['hits']} / 未命中 {stats['misses']}"
+            f"（命中率 {stats['hit_rate']:.1%}），淘汰 {stats['evictions']}，"
+            f"翻页会话 {sessions} 个\n"
+            f"卡图缓存：{image_stats['entries']} 张，"
+            f"{image_stats['bytes'] / 1024 / 1024:.1f}/"
+            f"{image_stats['max_bytes'] / 1024 / 1024:.0f} MB，"
+            f"命中 {image_stats['hits']} / 未命中 {image_stats['misses']}，"
+            f"淘汰 {image_stats['evictions']}\n"
+            f"结果拼图：{grid_stats['size']}/{grid_stats['maxsize']} 张，"
+            f"命中 {grid_stats['hits']} / 未命中 {grid_stats['misses']}\n"
+            f"已加载语言列："
+            + ("、".join(f"{lang} {count} 张" for lang, count in lang_stats.items()) or "无")
+        ),
+    )
+
+
+@sv_kw.handle()
+async def handle_keyword_command(bot: Bot, event: MessageEvent):
+    """列出技能文本中出现的游戏关键词及其卡牌数。"""
+    facets = card_cache.generation.facets
+    entries = keyword_glossary(facets)
+    await bot.send(
+        event=event,
+        message=format_keyword_glossary(entries[:GLOSSARY_LIMIT], len(entries)),
+    )
+
+
 # ============== 内部处理方法 ==============
 
+def _search(query: str, generation: CardGeneration, limit: int = RESULT_MAX) -> list[Card]:
+    """在指定这一代卡池上搜索（卡牌列表和各索引必须来自同一代）。
+
+    用到 AND / OR / NOT、引号、括号或字段限定时走布尔查询（语法错误抛 QuerySyntaxError）。
+    """
+    if is_boolean_query(query):
+        return boolean_search(
+            query,
+            generation.cards,
+            generation.ngram_index,
+            generation.facets,
+            stats=generation.stats,
+            name_index=generation.name_index,
+            pinyin_index=generation.pinyin_index,
+            skill_bm25=generation.skill_bm25,
+            limit=limit,
+        )
+    return search_cards(
+        query,
+        generation.cards,
+        limit=limit,
+        index=generation.ngram_index,
+        facets=generation.facets,
+        stats=generation.stats,
+        name_index=generation.name_index,
+        pinyin_index=generation.pinyin_index,
+        skill_bm25=generation.skill_bm25,
+    )
+
+
 async def _send_help(bot: Bot, event: MessageEvent):
     """发送帮助信息。"""
     help_text = """📖 影之诗：超凡世界 查卡器
 
 【命令格式】
     /sv <关键词>       模糊搜索卡片
+    /sv <拼音/首字母>  如 bqdzs / buqu，按卡名拼音搜索
+    /sv <英文/韩文>    如 Albert，按该语言的卡名和技能搜索
     /sv #<职业>        按职业过滤
+    /sv #<职业> 随从 金 3费   组合过滤（类型/稀有度/费用/种族/卡包）
+    /sv cost<=2 atk>=3 #龙族  数值条件（cost/atk/life/rarity，支持 < <= > >= = !=）
+    /sv ev:守护        只在进化时效果里找（base/ev/sev/choice）
+    /sv kw:谢幕曲      按游戏关键词精确查找（/sv_kw 查看关键词表）
+    /sv (#精灵 OR #皇家) 守护 -中立    布尔查询：AND/OR/NOT（或 - 取反）、"短语"、括号、
+                       name:/skill:/class:/type:/cost: 等字段限定
     /sv !<ID>          按卡牌ID精确查询
     /sv <ID>           直接输入7-8位ID也可查询（不加!也行）
+    /sv 1001*          按 ID 前缀浏览（卡包 0 的精灵卡）
+    /sv set:3 [职业]   按卡包浏览（可再限定职业）
+    /sv next           列表结果翻到下一页（/sv prev 上一页，/sv p3 第3页）
+    /sv like <卡名/ID> 相似卡牌推荐（技能词项 + 关键词 + 职业/类型/数值）
     /sv_reload         重新加载数据
+    /sv_stats          查看卡库与查询缓存状态
+    /sv_kw             关键词表
 
 【职业代码】
 #精灵  #皇家  #法师  #龙族  #梦魇  #主教  #超越者
@@ -134,6 +326,9 @@ async def _send_help(bot: Bot, event: MessageEvent):
 【示例】
 /sv 不屈的战士
 /sv #精灵
+/sv #龙族 随从 金 3费
+/sv 费=2 攻>=3 随从
+/sv ev:守护 #精灵
 /sv !10001110
 
 【说明】
@@ -144,6 +339,79 @@ async def _send_help(bot: Bot, event: MessageEvent):
     await bot.send(event=event, message=help_text)
 
 
+async def _send_card_image(bot: Bot, event: MessageEvent, card_id: str):
+    """发送单张卡图：启用缓存时发本地文件，否则直接发图片 URL；失败只记日志。"""
+    try:
+        if sv_card_config.enable_image_cache:
+            path = await image_service.get_image(card_id)
+            if path is None:
+                return
+            image = MessageSegment.image(path)
+        else:
+            url = get_card_image_url({"id": card_id}, sv_card_config.image_lang)
+            if not url:
+                return
+            image = MessageSegment.image(url)
+        await bot.send(event=event, message=image)
+    except Exception as e:
+        logger.warning(f"发送卡图失败 {card_id}: {e}")
+
+
+async def _send_card_grid(
+    bot: Bot,
+    event: MessageEvent,
+    card_ids: tuple[str, ...],
+    generation: int,
+    first_number: int = 1,
+):
+    """多卡结果合成一张拼图发送（依赖本地卡图缓存）；失败只记日志。"""
+    if not sv_card_config.enable_image_cache:
+        return
+    try:
+        path = await grid_composer.compose(card_ids, generation, first_number)
+        if path is not None:
+            await bot.send(event=event, message=MessageSegment.image(path))
+    except Exception as e:
+        logger.warning(f"发送结果拼图失败: {e}")
+
+
+def _format_card(card: Card) -> str:
+    """单卡详情，末尾附上近邻表里最相似的几张卡。"""
+    return format_single_card(card, card_cache.get_similar_cards(card.id, SIMILAR_PREVIEW))
+
+
+async def _handle_like(bot: Bot, event: MessageEvent, target: str):
+    """相似卡牌推荐：目标卡按 ID 或搜索第一名确定，近邻直接查预计算的近邻表。"""
+    if not target:
+        await bot.send(event=event, message="❌ 用法：/sv like <卡名或ID>，例如 /sv like 不屈的战士")
+        return
+
+    generation = card_cache.generation
+    card_id = target.lstrip("!！")
+    if re.match(r"^\d{7,8}$", card_id):
+        card = card_cache.get_card_by_id(card_id)
+    else:
+        try:
+            results = _search(target, generation, limit=1)
+        except QuerySyntaxError as e:
+            await bot.send(event=event, message=f"❌ 查询语法错误：{e}")
+            return
+        card = results[0] if results else None
+    if card is None:
+        await bot.send(event=event, message=f"❌ 未找到卡牌「{target}」。")
+        return
+
+    similar = card_cache.get_similar_cards(card.id)
+    if not similar:
+        await bot.send(event=event, message=f"❌ 「{card.name}」暂无相似卡牌。")
+        return
+    await bot.send(
+        event=event,
+        message=format_card_list(similar, title=f"与「{card.name}」相似的卡牌"),
+    )
+    await _send_card_grid(bot, event, tuple(c.id for c in similar[:SEARCH_LIMIT]), generation.number)
+
+
 async def _handle_id_query(bot: Bot, event: MessageEvent, card_id: str):
     """处理ID精确查询。"""
     card = card_cache.get_card_by_id(card_id)
@@ -155,50 +423,192 @@ async def _handle_id_query(bot: Bot, event: MessageEvent, card_id: str):
         )
         return
 
-    msg = format_single_card(card)
+    msg = _format_card(card)
     await bot.send(event=event, message=msg)
-    # TODO: 发送卡片图片
-
+    await _send_card_image(bot, event, card.id)
 
-async def _handle_class_filter(bot: Bot, event: MessageEvent, class_filter: str):
-    """处理职业过滤查询。"""
-    cards = card_cache.get_all_cards()
-    filtered = search_cards(class_filter, cards, class_filter_only=True)
 
-    if not filtered:
+async def _handle_set_browse(bot: Bot, event: MessageEvent, match: "re.Match[str]"):
+    """按卡包（可再限定职业）浏览：换算成 card_id 前缀后做区间查询。"""
+    set_no = int(match.group(1))
+    if set_no in SET_ID_TO_PACK_NAME:
+        set_no -= 10000
+    class_name = match.group(2)
+    class_code = CLASS_NAME_TO_CODE[class_name.lower()] if class_name else None
+    if set_no + 10000 not in SET_ID_TO_PACK_NAME:
         await bot.send(
             event=event,
-            message=f"❌ 未找到职业「{class_filter}」的卡牌。",
+            message="❌ 用法：/sv set:<卡包号 0-8> [职业]，例如 /sv set:3 精灵",
         )
         return
+    label = f"set:{set_no}" + (f" {class_name}" if class_name else "")
+    await _handle_id_range(bot, event, label, card_cache.get_cards_in_set(set_no, class_code))
 
-    # 限制返回数量
-    results = filtered[:10]
-    msg = format_search_results(results, class_filter)
 
-    await bot.send(event=event, message=msg)
-    # TODO: 发送卡片图片列表
+async def _handle_id_range(bot: Bot, event: MessageEvent, label: str, cards: list[Card]):
+    """ID 区间浏览结果：按 ID 升序列出，完整结果交给翻页游标（不设保留上限）。"""
+    if not cards:
+        await bot.send(event=event, message=f"❌ 没有卡牌落在「{label}」范围内。")
+        return
+    if len(cards) == 1:
+        await bot.send(event=event, message=_format_card(cards[0]))
+        await _send_card_image(bot, event, cards[0].id)
+        return
+
+    card_ids = tuple(card.id for card in cards)
+    await bot.send(event=event, message=_format_first_page(cards, label, capped=False))
+    _save_cursor(event, label, card_ids, capped=False)
+    await _send_card_grid(bot, event, card_ids[:SEARCH_LIMIT], card_cache.generation.number)
+
+
+async def _handle_class_filter(bot: Bot, event: MessageEvent, query: str):
+    """处理职业 / 分面过滤查询（如 #精灵 随从 金 3费）。"""
+    generation = card_cache.generation
+    key = result_cache.make_key(query, "filter", RESULT_MAX, generation.number)
+    cached = result_cache.get(key)
+    if cached is None:
+        try:
+            results = _search(query, generation)
+        except QuerySyntaxError as e:
+            await bot.send(event=event, message=f"❌ 查询语法错误：{e}")
+            return
+        if results:
+            msg = _format_first_page(results, query)
+        else:
+            msg = f"❌ 未找到符合「{query}」的卡牌。"
+        cached = CachedResult(tuple(card.id for card in results), msg)
+        result_cache.put(key, cached)
+
+    await bot.send(event=event, message=cached.message)
+    if cached.card_ids:
+        _save_cursor(event, query, cached.card_ids)
+        await _send_card_grid(bot, event, cached.card_ids[:SEARCH_LIMIT], generation.number)
 
 
 async def _handle_search(bot: Bot, event: MessageEvent, keyword: str):
     """处理模糊搜索。"""
-    cards = card_cache.get_all_cards()
-    results = search_cards(keyword, cards)
+    if not normalize_text(keyword).split():
+        # 只含格式标签之类归一化时会去掉的内容，没有可搜的文字
+        await bot.send(event=event, message=f"❌ 「{keyword}」里没有可搜索的文字，请换个关键词。")
+        return
+    generation = card_cache.generation
+    key = result_cache.make_key(keyword, "search", RESULT_MAX, generation.number)
+    cached = result_cache.get(key)
+    if cached is None:
+        try:
+            results = _search(keyword, generation)
+        except QuerySyntaxError as e:
+            await bot.send(event=event, message=f"❌ 查询语法错误：{e}")
+            return
+        boolean = is_boolean_query(keyword)
+        # 拉丁字母 / 谚文查询：主卡池（含拼音）有结果就用主卡池的，语言列只在后台预热；
+        # 主卡池没有结果时才等语言列加载（首次查询该语言时才下载）
+        lang = None if boolean else route_language(keyword)
+        lang_ready = True
+        if lang is not None and results:
+            language_store.warm(lang, generation)
+        elif lang is not None and language_store.available(lang):
+            columns = await language_store.columns(lang, generation)
+            if columns is None:
+                lang_ready = False
+            else:
+                positions = columns.search(normalize_text(keyword), RESULT_MAX)
+                results = [generation.cards[pos] for pos in positions]
+        if not results:
+            msg = f"❌ 未找到包含「{keyword}」的卡牌。"
+            suggestions = [] if boolean else suggest_cards(
+                keyword, generation.cards, generation.fuzzy_index
+            )
+            if suggestions:
+                msg += "\n💡 你是不是要找：" + "、".join(card.name for card in suggestions)
+        # 根据结果数量决定展示方式
+        elif len(results) == 1:
+            # 精确匹配单个结果
+            msg = _format_card(results[0])
+        else:
+            # 多个结果，展示列表第一页
+            msg = _format_first_page(results, keyword)
+        cached = CachedResult(tuple(card.id for card in results), msg)
+        # 语言列加载失败时不缓存（恢复后同一查询应能查到）
+        if lang_ready:
+            result_cache.put(key, cached)
+
+    await bot.send(event=event, message=cached.message)
+    if len(cached.card_ids) == 1:
+        await _send_card_image(bot, event, cached.card_ids[0])
+    elif cached.card_ids:
+        _save_cursor(event, keyword, cached.card_ids)
+        await _send_card_grid(bot, event, cached.card_ids[:SEARCH_LIMIT], generation.number)
+
+
+# ============== 翻页 ==============
+
+def _format_page(cards: list[Card], cursor: SearchCursor, page: int) -> str:
+    return format_search_results(
+        cards,
+        cursor.query,
+        total=len(cursor.card_ids),
+        page=page,
+        page_count=cursor.page_count,
+        start=(page - 1) * cursor.page_size + 1,
+        capped=cursor.capped,
+    )
+
+
+def _new_cursor(query: str, card_ids: tuple[str, ...], capped: Optional[bool] = None) -> SearchCursor:
+    """列表结果的第一页游标；capped 缺省时按是否达到保留上限判断（搜索结果）。"""
+    if capped is None:
+        capped = len(card_ids) >= RESULT_MAX
+    return SearchCursor(query, card_ids, 1, SEARCH_LIMIT, capped)
+
+
+def _format_first_page(results: list[Card], query: str, capped: Optional[bool] = None) -> str:
+    """完整排序结果的第一页（结果缓存里存的就是这一页的消息）。"""
+    cursor = _new_cursor(query, tuple(card.id for card in results), capped)
+    return _format_page(results[:SEARCH_LIMIT], cursor, 1)
+
+
+def _save_cursor(
+    event: MessageEvent,
+    query: str,
+    card_ids: tuple[str, ...],
+    capped: Optional[bool] = None,
+):
+    """记下本会话的列表结果，供 /sv next 等翻页（只有一页时不记）。"""
+    if len(card_ids) > SEARCH_LIMIT:
+        cursor_cache.put(_session_of(event), _new_cursor(query, card_ids, capped))
+    else:
+        cursor_cache.discard(_session_of(event))
+
+
+async def _handle_page(bot: Bot, event: MessageEvent, match: "re.Match[str]"):
+    """翻页：从游标切出目标页，不重新搜索、不重新排序。"""
+    session = _session_of(event)
+    cursor = cursor_cache.get(session)
+    if cursor is None:
+        await bot.send(event=event, message="❌ 没有可以翻页的搜索结果（或已过期），请重新搜索。")
+        return
 
-    if not results:
+    if match.group(1):
+        page = cursor.page + 1
+    elif match.group(2):
+        page = cursor.page - 1
+    else:
+        page = int(match.group(3))
+    if not 1 <= page <= cursor.page_count:
         await bot.send(
             event=event,
-            message=f"❌ 未找到包含「{keyword}」的卡牌。",
+            message=f"❌ 「{cursor.query}」的结果共 {cursor.page_count} 页，没有第 {page} 页。",
         )
         return
 
-    # 根据结果数量决定展示方式
-    if len(results) == 1:
-        # 精确匹配单个结果
-        msg = format_single_card(results[0])
-    else:
-        # 多个结果，展示列表
-        msg = format_search_results(results, keyword)
-
-    await bot.send(event=event, message=msg)
-    # TODO: 发送卡片图片
+    cursor_cache.put(session, cursor._replace(page=page))
+    # 游标只存 ID：按 ID 从当前一代取卡，刷新后被删掉的卡跳过
+    generation = card_cache.generation
+    page_ids = cursor.page_ids(page)
+    cards = [card for card in map(generation.cards_by_id.get, page_ids) if card is not None]
+    await bot.send(event=event, message=_format_page(cards, cursor, page))
+    await _send_card_grid(
+        bot, event, tuple(card.id for card in cards), generation.number,
+        (page - 1) * cursor.page_size + 1,
+    )
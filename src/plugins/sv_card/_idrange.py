@@ -0,0 +1,95 @@
+# plugins/sv_card/_idrange.py
+"""影之诗超凡世界 有序卡牌 ID 数组（按 ID 区间 / 前缀浏览）。
+
+设计说明：
+    - card_id 固定 8 位数字（1 0 S C NNNN，见 _cache.py），字符串字典序即数值序，
+      同一卡包（S）、同一卡包内同一职业（SC）的卡都落在一段连续的 ID 区间里
+    - 加载时把全部 ID 排序成一个列表，另存一个与之对齐的卡池下标数组
+    - 区间查询 = 两次 bisect 定位边界 + 切片，代价 O(log n + k)，不逐卡判断
+    - 前缀查询（"1001" → 卡包 0 的精灵卡）换算成区间 [前缀, 前缀末位 + 1)
+    - 增量刷新：copy() 共享两个数组，patch() 生成插入 / 删除后的新数组（不原地修改），
+      旧一代不受影响
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Optional
+
+
+def prefix_upper(prefix: str) -> Optional[str]:
+    """前缀区间的上界（不含）：最后一个字符加一；空前缀没有上界。"""
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class CardIdIndex:
+    """排序后的卡牌 ID 数组 + 对齐的卡池下标。"""
+
+    def __init__(self):
+        # 升序 ID
+        self._ids: list[str] = []
+        # _ids[i] 对应的卡池下标
+        self._positions = array("I")
+        # 全量构建时的暂存（finish() 后清空）
+        self._pending: Optional[list[tuple[str, int]]] = []
+
+    def add(self, pos: int, card_id: str):
+        """登记一张卡牌（仅用于全量构建）。"""
+        if card_id:
+            self._pending.append((card_id, pos))
+
+    def finish(self):
+        """全量构建结束：按 ID 排序。"""
+        self._pending.sort()
+        self._ids = [card_id for card_id, _ in self._pending]
+        self._positions = array("I", [pos for _, pos in self._pending])
+        self._pending = None
+
+    def range(self, low: str, high: Optional[str] = None) -> array:
+        """low <= ID < high 的卡池下标（按 ID 升序）；high 为 None 表示不设上界。"""
+        ids = self._ids
+        start = bisect_left(ids, low)
+        end = len(ids) if high is None else bisect_left(ids, high, start)
+        return self._positions[start:end]
+
+    def prefix(self, prefix: str) -> array:
+        """ID 以 prefix 开头的卡池下标（按 ID 升序）。"""
+        return self.range(prefix, prefix_upper(prefix))
+
+    def position(self, card_id: str) -> Optional[int]:
+        """card_id 对应的卡池下标；不存在时返回 None。"""
+        ids = self._ids
+        i = bisect_left(ids, card_id)
+        if i < len(ids) and ids[i] == card_id:
+            return self._positions[i]
+        return None
+
+    def copy(self) -> "CardIdIndex":
+        """浅拷贝：共享两个数组，之后 patch() 生成新数组。"""
+        clone = CardIdIndex()
+        clone._ids = self._ids
+        clone._positions = self._positions
+        clone._pending = None
+        return clone
+
+    def patch(self, pos: int, old_id: Optional[str], new_id: Optional[str]):
+        """把下标 pos 登记的 ID 从 old_id 换成 new_id（old 为 None 表示新增）。"""
+        if old_id == new_id:
+            return
+        ids = list(self._ids)
+        positions = array("I", self._positions)
+        if old_id:
+            i = bisect_left(ids, old_id)
+            if i < len(ids) and ids[i] == old_id and positions[i] == pos:
+                del ids[i]
+                del positions[i]
+        if new_id:
+            i = bisect_left(ids, new_id)
+            ids.insert(i, new_id)
+            positions.insert(i, pos)
+        self._ids = ids
+        self._positions = positions
+
+    def __len__(self) -> int:
+        return len(self._ids)
@@ -0,0 +1,386 @@
+# plugins/sv_card/_images.py
+"""影之诗超凡世界 卡图获取与磁盘缓存。
+
+设计说明：
+    - 内容寻址：图片按内容 sha256 存为 <缓存目录>/<前2位>/<sha256>.<格式>，
+      不同卡 / 语言指向同一张图时只存一份
+    - 索引：(card_id, 语言, 格式) → sha256，按最近使用顺序保存在 index.json，
+      超出容量上限（按总字节数）时从最久未用的条目开始淘汰，无人引用的文件随之删除
+    - 命中直接返回本地文件路径，handler 以本地文件发送，不再访问网络
+    - 未命中：同一张卡的并发请求合并为一次下载（single-flight），
+      全局下载并发受 Semaphore 限制；下载走线程池（requests），
+      转码（QQ 兼容格式，见 SVCardConfig.image_format）在独立的工作线程池中执行
+    - 404 等确定不存在的图片在本进程内记住，不反复请求
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+import requests
+
+from ._config import sv_card_config
+from ._formatter import get_card_image_url
+
+# 注意：logger 在首次使用时才导入，避免在 NoneBot 初始化前导入
+
+
+def _get_logger():
+    from nonebot.log import logger
+    return logger
+
+
+INDEX_FILE_NAME = "index.json"
+
+# 配置里的格式名 → Pillow 格式名
+_PIL_FORMATS = {"png": "PNG", "jpg": "JPEG", "jpeg": "JPEG", "webp": "WEBP", "gif": "GIF"}
+
+
+class ImageNotFound(Exception):
+    """图片源确定不存在（如 404）。"""
+
+
+# ============== 磁盘缓存 ==============
+
+class ImageDiskCache:
+    """内容寻址的卡图磁盘缓存（按总字节数 LRU 淘汰）。
+
+    只在事件循环线程中修改内存状态；文件读写由调用方放到线程池执行。
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        # 键 → sha256（最近使用的在末尾）
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        # sha256 → (文件名, 字节数)
+        self._objects: dict[str, tuple[str, int]] = {}
+        # sha256 → 引用它的键数量
+        self._refs: dict[str, int] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ---------- 持久化 ----------
+
+    def read_index(self) -> list[list]:
+        """读取 index.json，丢弃文件已不存在的条目（线程池中调用）。"""
+        path = self.root / INDEX_FILE_NAME
+        try:
+            with open(path, encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return [
+            entry for entry in raw.get("entries", [])
+            if (self.root / entry[2]).is_file()
+        ]
+
+    def restore(self, entries: list[list]):
+        """用 read_index 的结果恢复内存索引（按最近使用顺序）。"""
+        for key, digest, name, size in entries:
+            if digest not in self._objects:
+                self._objects[digest] = (name, size)
+                self.total_bytes += size
+            self._entries[key] = digest
+            self._refs[digest] = self._refs.get(digest, 0) + 1
+
+    def index_entries(self) -> list[list]:
+        """当前索引内容（事件循环线程中取快照，再交给 write_index 写盘）。"""
+        return [
+            [key, digest, *self._objects[digest]]
+            for key, digest in self._entries.items()
+        ]
+
+    def write_index(self, entries: list[list]):
+        """原子写入 index.json（线程池中调用）。"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / INDEX_FILE_NAME
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    # ---------- 查询 / 写入 ----------
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """命中返回本地文件路径并刷新最近使用顺序。"""
+        digest = self._entries.get(key)
+        if digest is None:
+            self.misses += 1
+            return None
+        path = self.root / self._objects[digest][0]
+        if not path.is_file():
+            # 文件被外部删除：当作未命中
+            self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return path
+
+    def object_name(self, digest: str, ext: str) -> str:
+        return f"{digest[:2]}/{digest}.{ext}"
+
+    def write_object(self, data: bytes, ext: str) -> tuple[str, str]:
+        """把图片内容写入对象文件（已存在则跳过），返回 (sha256, 文件名)。线程池中调用。"""
+        digest = hashlib.sha256(data).hexdigest()
+        name = self.object_name(digest, ext)
+        path = self.root / name
+        if not path.is_file():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest, name
+
+    def insert(self, key: str, digest: str, name: str, size: int) -> list[Path]:
+        """登记键 → 对象，按容量淘汰，返回需要删除的文件路径（由调用方在线程池删除）。"""
+        if key in self._entries:
+            self._drop(key)
+        if digest not in self._objects:
+            self._objects[digest] = (name, size)
+            self.total_bytes += size
+        self._entries[key] = digest
+        self._refs[digest] = self._refs.get(digest, 0) + 1
+
+        removed: list[Path] = []
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            path = self._drop(oldest)
+            self.evictions += 1
+            if path is not None:
+                removed.append(path)
+        return removed
+
+    def _drop(self, key: str) -> Optional[Path]:
+        """移除一个键；对象不再被引用时一并移除，返回其文件路径。"""
+        digest = self._entries.pop(key)
+        refs = self._refs[digest] - 1
+        if refs:
+            self._refs[digest] = refs
+            return None
+        del self._refs[digest]
+        name, size = self._objects.pop(digest)
+        self.total_bytes -= size
+        return self.root / name
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "objects": len(self._objects),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# ============== 下载 / 转码 ==============
+
+def _download(url: str, timeout: float) -> bytes:
+    """同步下载（线程池中执行）。"""
+    resp = requests.get(url, timeout=timeout)
+    if resp.status_code == 404:
+        raise ImageNotFound(url)
+    resp.raise_for_status()
+    return resp.content
+
+
+def _transcode(data: bytes, image_format: str) -> bytes:
+    """转成目标格式；已经是目标格式时原样返回（工作线程池中执行）。"""
+    from PIL import Image
+
+    target = _PIL_FORMATS.get(image_format.lower(), "PNG")
+    with Image.open(io.BytesIO(data)) as img:
+        if img.format == target:
+            return data
+        if target == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        out = io.BytesIO()
+        img.save(out, format=target)
+        return out.getvalue()
+
+
+def _remove_files(paths: list[Path]):
+    for path in paths:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# ============== 服务 ==============
+
+class CardImageService:
+    """卡图服务：本地缓存命中直接返回，未命中合并下载、限流、转码后入缓存。"""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int,
+        image_format: str = "png",
+        lang: str = "cht",
+        concurrency: int = 4,
+        transcode_workers: int = 2,
+        timeout: float = 15.0,
+        url_builder: Optional[Callable[[str, str], Optional[str]]] = None,
+    ):
+        self.cache = ImageDiskCache(cache_dir, max_bytes)
+        self.image_format = image_format.lower()
+        self.lang = lang
+        self.timeout = timeout
+        self._concurrency = concurrency
+        self._transcode_workers = transcode_workers
+        self._url_builder = url_builder or (
+            lambda card_id, lang: get_card_image_url({"id": card_id}, lang)
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._download_pool: Optional[ThreadPoolExecutor] = None
+        self._transcode_pool: Optional[ThreadPoolExecutor] = None
+        # 进行中的下载（single-flight：同一张图的并发请求共用这一个）
+        self._inflight: dict[str, asyncio.Future] = {}
+        # 确定不存在的图片（本进程内不再请求）
+        self._missing: set[str] = set()
+        # 启动后首次使用时读取磁盘索引（并发调用方共用这一次读取）
+        self._index_loading: Optional[asyncio.Future] = None
+        self._index_loaded = False
+        # 索引写盘可能在多个工作线程里并发，只让最新的快照落盘
+        self._persist_lock = threading.Lock()
+        self._persist_seq = 0
+        self._persisted_seq = 0
+
+    @classmethod
+    def from_config(cls) -> "CardImageService":
+        config = sv_card_config
+        return cls(
+            cache_dir=Path(config.image_cache_dir),
+            max_bytes=config.image_cache_max_mb * 1024 * 1024,
+            image_format=config.image_format,
+            lang=config.image_lang,
+            concurrency=config.image_download_concurrency,
+            transcode_workers=config.image_transcode_workers,
+            timeout=config.image_download_timeout,
+        )
+
+    def cache_key(self, card_id: str) -> str:
+        return f"{card_id}:{self.lang}:{self.image_format}"
+
+    async def get_image(self, card_id: str) -> Optional[Path]:
+        """取卡图本地文件路径；图片不存在或下载失败时返回 None。"""
+        if not self._index_loaded:
+            await self._load_index()
+
+        key = self.cache_key(card_id)
+        path = self.cache.lookup(key)
+        if path is not None:
+            return path
+        if key in self._missing:
+            return None
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(key, card_id))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield：某个调用方被取消时不影响其他等待同一下载的调用方
+        return await asyncio.shield(future)
+
+    async def _load_index(self):
+        if self._index_loading is None:
+            loop = asyncio.get_running_loop()
+            self._index_loading = loop.run_in_executor(None, self.cache.read_index)
+        entries = await asyncio.shield(self._index_loading)
+        if not self._index_loaded:
+            self._index_loaded = True
+            self.cache.restore(entries)
+
+    async def _fetch(self, key: str, card_id: str) -> Optional[Path]:
+        """下载 → 转码 → 写入缓存。"""
+        url = self._url_builder(card_id, self.lang)
+        if not url:
+            return None
+        loop = asyncio.get_running_loop()
+        self._ensure_pools()
+        try:
+            async with self._semaphore:
+                data = await loop.run_in_executor(
+                    self._download_pool, _download, url, self.timeout
+                )
+            data = await loop.run_in_executor(
+                self._transcode_pool, _transcode, data, self.image_format
+            )
+            digest, name = await loop.run_in_executor(
+                self._transcode_pool, self.cache.write_object, data, self.image_format
+            )
+        except ImageNotFound:
+            self._missing.add(key)
+            _get_logger().warning(f"卡图不存在: {url}")
+            return None
+        except Exception as e:
+            _get_logger().warning(f"卡图获取失败 {url}: {e}")
+            return None
+
+        removed = self.cache.insert(key, digest, name, len(data))
+        path = self.cache.root / name
+        self._persist_seq += 1
+        await loop.run_in_executor(
+            self._transcode_pool, self._persist,
+            removed, self.cache.index_entries(), self._persist_seq,
+        )
+        return path
+
+    def _persist(self, removed: list[Path], entries: list[list], seq: int):
+        """删除被淘汰的文件并写索引（线程池中调用）。"""
+        _remove_files(removed)
+        with self._persist_lock:
+            if seq <= self._persisted_seq:
+                return
+            try:
+                self.cache.write_index(entries)
+                self._persisted_seq = seq
+            except OSError as e:
+                _get_logger().warning(f"卡图缓存索引写入失败: {e}")
+
+    def _ensure_pools(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        if self._download_pool is None:
+            self._download_pool = ThreadPoolExecutor(
+                self._concurrency, thread_name_prefix="sv_card_image_dl"
+            )
+        if self._transcode_pool is None:
+            self._transcode_pool = ThreadPoolExecutor(
+                self._transcode_workers, thread_name_prefix="sv_card_image_io"
+            )
+
+    def close(self):
+        """关闭线程池并保存索引（插件卸载 / 进程退出时调用）。"""
+        for pool in (self._download_pool, self._transcode_pool):
+            if pool is not None:
+                pool.shutdown(wait=False)
+        self._download_pool = self._transcode_pool = None
+        if self._index_loaded:
+            # 保存命中带来的最近使用顺序变化
+            self._persist_seq += 1
+            self._persist([], self.cache.index_entries(), self._persist_seq)
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        stats["inflight"] = len(self._inflight)
+        stats["missing"] = len(self._missing)
+        return stats
+
+
+# 全局实例
+image_service = CardImageService.from_config()
@@ -0,0 +1,149 @@
+# plugins/sv_card/_index.py
+"""影之诗超凡世界 字符 n-gram 倒排索引。
+
+设计说明：
+    - 对 name / name_ja / skill_text / skill_text_ja 建立 1~3 字符 n-gram 倒排表
+      （中文单字查询很常见，如 "龙"，因此额外收录 unigram）
+    - posting 是卡牌下标的升序 array('I')（每项 4 字节，同 _bm25.py）；
+      Python set 每项约 50 字节，1 万张卡时 posting 总项数约 270 万
+    - 查询时：关键词长度 <= 3 取对应 posting；更长的关键词取其全部
+      trigram 的 posting 求交集（从最短的表开始，遇空即停）。结果按查询现建 frozenset，
+      代价与 posting 长度成正比，与卡池大小无关
+    - 返回的是候选集（超集），最终是否命中由 _searcher 打分时逐张确认
+    - 全量构建时下标递增，add() 直接追加即保持升序；finish() 把各数组复制成定长
+    - 增量刷新：copy() 复制 gram → 数组的 dict，patch() 为被改动的 gram 生成新数组
+      （同 _bm25.py，不原地修改），旧一代索引保持不变
+    - pickle（快照）时全部 posting 首尾相接成一个数组 + 各 gram 的结束偏移，
+      不逐个序列化几万个小数组；读取时按偏移切回 dict，耗时约为逐个序列化的一半
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import AbstractSet, Iterable, Optional, Sequence
+
+# 最大 gram 长度
+NGRAM_MAX = 3
+
+_EMPTY: frozenset[int] = frozenset()
+
+
+class NgramIndex:
+    """字符 n-gram 倒排索引（gram → 卡牌下标升序数组）。"""
+
+    def __init__(self, max_n: int = NGRAM_MAX):
+        self._max_n = max_n
+        self._postings: dict[str, array] = {}
+
+    def _grams(self, texts: Iterable[str]) -> set[str]:
+        """切出若干文本字段的全部 1~max_n gram。"""
+        max_n = self._max_n
+        grams: set[str] = set()
+        for text in texts:
+            if not text:
+                continue
+            grams.update(text)
+            for n in range(2, max_n + 1):
+                grams.update([text[i:i + n] for i in range(len(text) - n + 1)])
+        return grams
+
+    def add(self, pos: int, texts: Iterable[str]):
+        """把一张卡牌的若干文本字段登记到索引（仅用于全量构建，下标须递增）。
+
+        Args:
+            pos: 卡牌在列表中的下标
+            texts: 已归一化的文本字段
+        """
+        postings = self._postings
+        for gram in self._grams(texts):
+            try:
+                postings[gram].append(pos)
+            except KeyError:
+                postings[gram] = array("I", (pos,))
+
+    def finish(self):
+        """全量构建结束：各 posting 复制成定长数组（去掉 append 预留的空间）。"""
+        self._postings = {gram: array("I", bucket) for gram, bucket in self._postings.items()}
+
+    def positions(self, gram: str) -> Sequence[int]:
+        """单个 gram（长度 <= max_n）的 posting：卡牌下标升序数组（只读）。"""
+        return self._postings.get(gram, ())
+
+    def candidates(self, keyword: str) -> Optional[AbstractSet[int]]:
+        """返回可能包含 keyword 的卡牌下标集合。
+
+        Returns:
+            候选下标集合（只读，调用方不得修改）；keyword 为空时返回 None
+        """
+        if not keyword:
+            return None
+        postings = self._postings
+        if len(keyword) <= self._max_n:
+            bucket = postings.get(keyword)
+            return frozenset(bucket) if bucket else _EMPTY
+
+        n = self._max_n
+        grams = {keyword[i:i + n] for i in range(len(keyword) - n + 1)}
+        lists = []
+        for gram in grams:
+            bucket = postings.get(gram)
+            if not bucket:
+                return _EMPTY
+            lists.append(bucket)
+        lists.sort(key=len)
+        result = set(lists[0])
+        for bucket in lists[1:]:
+            result.intersection_update(bucket)
+            if not result:
+                break
+        return result
+
+    def __getstate__(self):
+        grams = list(self._postings)
+        flat = array("I")
+        ends = array("I")
+        for gram in grams:
+            flat.extend(self._postings[gram])
+            ends.append(len(flat))
+        return self._max_n, grams, flat, ends
+
+    def __setstate__(self, state):
+        self._max_n, grams, flat, ends = state
+        postings: dict[str, array] = {}
+        start = 0
+        for gram, end in zip(grams, ends):
+            postings[gram] = flat[start:end]
+            start = end
+        self._postings = postings
+
+    def copy(self) -> "NgramIndex":
+        """浅拷贝：与原索引共享全部 posting 数组，之后 patch() 只替换数组。"""
+        clone = NgramIndex(self._max_n)
+        clone._postings = dict(self._postings)
+        return clone
+
+    def patch(self, pos: int, old_texts: Iterable[str], new_texts: Iterable[str]):
+        """把下标 pos 的登记内容从 old_texts 换成 new_texts（只动差异 gram）。"""
+        old_grams = self._grams(old_texts)
+        new_grams = self._grams(new_texts)
+        for gram in old_grams - new_grams:
+            self._replace(gram, pos, False)
+        for gram in new_grams - old_grams:
+            self._replace(gram, pos, True)
+
+    def _replace(self, gram: str, pos: int, present: bool):
+        """生成 gram 的新 posting 数组（加入或去掉 pos）。"""
+        bucket = array("I", self._postings.get(gram, ()))
+        i = bisect_left(bucket, pos)
+        found = i < len(bucket) and bucket[i] == pos
+        if present and not found:
+            bucket.insert(i, pos)
+        elif not present and found:
+            del bucket[i]
+        if bucket:
+            self._postings[gram] = bucket
+        else:
+            self._postings.pop(gram, None)
+
+    @property
+    def gram_count(self) -> int:
+        return len(self._postings)
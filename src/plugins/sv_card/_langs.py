@@ -0,0 +1,287 @@
+# plugins/sv_card/_langs.py
+"""影之诗超凡世界 多语言卡牌文本（按需加载的语言列）。
+
+设计说明：
+    - 主卡池（_cache.py，中文数据文件）是唯一的按 card_id 组织的卡牌存储：
+      数值列、分面位图、有序 ID 数组、Card 对象都只有一份，所有语言共享
+    - 主卡池已经覆盖的语言不另建列：
+        chs  卡名 / 技能文本本身
+        cht  归一化时逐字转简体（_normalize.py），与 chs 共用索引
+        ja   数据文件自带 name_ja / skill_text_ja，已登记在主索引里
+    - 其余语言（en / ko）是"语言列"：只有卡名 + 技能文本两列，按主卡池下标对齐，
+      外加一个只覆盖这两列的 n-gram 索引；命中后直接取主卡池的 Card 展示
+    - 懒加载：启动时不读任何语言列；某语言第一次被查询时才读取数据源
+      （本地路径或 URL，URL 下载后缓存到磁盘）、建列建索引，之后常驻。
+      没被查询过的语言不占内存
+    - 路由：按查询串的文字种类选语言列——含谚文 → ko，纯拉丁字母 → en，
+      汉字 / 假名 → 只查主卡池。拉丁字母也可能是拼音 / 首字母（bqdzs、tianshi），
+      所以语言列只在主卡池没有结果时才查；主卡池有结果时只在后台预热该语言列，不等待
+    - 默认不预加载（default_lang 默认为 chs）；配置成不属于主卡池的语言（en / ko）时，
+      启动后在后台预加载该语言列，第一次英文查询不用等下载
+    - 主卡池刷新换代后，语言列按新一代的下标重新对齐（文本已在内存，不重新下载）
+"""
+
+import asyncio
+import json
+import re
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+import requests
+
+from ._cache import _card_id_of
+from ._config import sv_card_config
+from ._index import NgramIndex
+from ._normalize import normalize_text
+
+# 注意：logger 在首次使用时才导入，避免在 NoneBot 初始化前导入
+
+
+def _get_logger():
+    from nonebot.log import logger
+    return logger
+
+
+# 支持的语言（与 SVCardConfig.default_lang / image_lang 取值一致）
+LANGS = ("en", "chs", "cht", "ja", "ko")
+
+# 主卡池已覆盖、不需要单独加载的语言
+PRIMARY_LANGS = frozenset({"chs", "cht", "ja"})
+
+# 数据源加载失败后，多久内不再重试（秒）
+RETRY_SECONDS = 600
+
+_HANGUL_RE = re.compile(r"[\u1100-\u11ff\u3130-\u318f\uac00-\ud7af]")
+# 纯拉丁文本查询：字母、数字、空格和卡名里常见的标点，至少一个字母
+_LATIN_RE = re.compile(r"^(?=.*[A-Za-z])[A-Za-z0-9 '\-.,!&]+$")
+
+
+def route_language(query: str) -> Optional[str]:
+    """按查询串的文字种类选择语言列；返回 None 表示走主卡池。"""
+    if _HANGUL_RE.search(query):
+        return "ko"
+    if _LATIN_RE.match(query):
+        return "en"
+    return None
+
+
+# ============== 语言列 ==============
+
+def _iter_raw_cards(raw_data) -> Iterator[dict]:
+    """兼容 {card_id: 卡牌} 与 [卡牌, ...] 两种结构，跳过 _meta 和非 dict 条目。"""
+    if isinstance(raw_data, dict):
+        items = (v for k, v in raw_data.items() if k != "_meta")
+    else:
+        items = raw_data
+    for raw in items:
+        if isinstance(raw, dict):
+            yield raw
+
+
+def parse_language_texts(raw_data) -> dict[str, tuple[str, str]]:
+    """原始数据 → card_id → (卡名, 技能文本)，均已归一化。"""
+    texts = {}
+    for raw in _iter_raw_cards(raw_data):
+        card_id = _card_id_of(raw)
+        skill = "\n".join(
+            text for text in (raw.get("skill_text"), raw.get("evo_skill_text")) if text
+        )
+        texts[card_id] = (normalize_text(raw.get("name") or ""), normalize_text(skill))
+    return texts
+
+
+class LanguageColumns:
+    """某一语言对齐到某一代主卡池的卡名 / 技能文本列及其 n-gram 索引。"""
+
+    __slots__ = ("lang", "generation", "names", "skills", "index")
+
+    def __init__(
+        self,
+        lang: str,
+        generation: int,
+        cards: list,
+        texts: dict[str, tuple[str, str]],
+    ):
+        self.lang = lang
+        self.generation = generation
+        # 主卡池下标 → 文本（该语言缺这张卡时为空串）
+        self.names: list[str] = []
+        self.skills: list[str] = []
+        self.index = NgramIndex()
+        for pos, card in enumerate(cards):
+            name, skill = texts.get(card.id, ("", ""))
+            self.names.append(name)
+            self.skills.append(skill)
+            if name or skill:
+                self.index.add(pos, (name, skill))
+        self.index.finish()
+
+    def search(self, keyword: str, limit: int) -> list[int]:
+        """按卡名完全 / 前缀 / 包含、技能包含四档排序，返回主卡池下标。"""
+        candidates = self.index.candidates(keyword)
+        if not candidates:
+            return []
+        names = self.names
+        skills = self.skills
+        scored = []
+        for pos in candidates:
+            name = names[pos]
+            if name == keyword:
+                score = 100
+            elif name.startswith(keyword):
+                score = 80
+            elif keyword in name:
+                score = 60
+            elif keyword in skills[pos]:
+                score = 30
+            else:
+                continue
+            scored.append((-score, pos))
+        scored.sort()
+        return [pos for _, pos in scored[:limit]]
+
+    def __len__(self) -> int:
+        return sum(1 for name in self.names if name)
+
+
+# ============== 按需加载 ==============
+
+class LanguageStore:
+    """语言列管理：第一次查询某语言时才加载，之后按主卡池代号重新对齐。"""
+
+    def __init__(
+        self,
+        sources: dict[str, str],
+        cache_dir: Path,
+        expire_hours: int,
+        timeout: float = 30.0,
+        default_lang: Optional[str] = None,
+    ):
+        # 语言 → 数据源（本地路径或 http(s) URL）；主卡池已覆盖的语言忽略
+        self._sources = {
+            lang: source for lang, source in sources.items()
+            if source and lang not in PRIMARY_LANGS
+        }
+        self._cache_dir = cache_dir
+        self._expire_seconds = expire_hours * 3600
+        self._timeout = timeout
+        self._default_lang = default_lang
+        # 语言 → card_id → (卡名, 技能文本)
+        self._texts: dict[str, dict[str, tuple[str, str]]] = {}
+        # 语言 → 对齐到最近一代的语言列
+        self._columns: dict[str, LanguageColumns] = {}
+        # 进行中的加载（同一语言 + 代号的并发查询共用这一次）
+        self._inflight: dict[tuple[str, int], asyncio.Future] = {}
+        # 语言 → 最近一次加载失败的时间
+        self._failed: dict[str, float] = {}
+
+    @classmethod
+    def from_config(cls) -> "LanguageStore":
+        config = sv_card_config
+        sources = {"en": config.en_cards_url}
+        sources.update(config.lang_sources)
+        return cls(
+            sources=sources,
+            cache_dir=Path(config.lang_cache_dir),
+            expire_hours=config.cache_expire_hours,
+            default_lang=config.default_lang,
+        )
+
+    def available(self, lang: str) -> bool:
+        """该语言配置了数据源（且没在失败冷却期内）。"""
+        if lang not in self._sources:
+            return False
+        failed_at = self._failed.get(lang)
+        return failed_at is None or time.monotonic() - failed_at > RETRY_SECONDS
+
+    async def columns(self, lang: str, generation) -> Optional[LanguageColumns]:
+        """取对齐到 generation 的语言列；数据源不可用时返回 None。"""
+        columns = self._columns.get(lang)
+        if columns is not None and columns.generation == generation.number:
+            return columns
+        if not self.available(lang):
+            return None
+        return await asyncio.shield(self._start(lang, generation))
+
+    def warm(self, lang: str, generation):
+        """在后台加载 / 对齐语言列，不等待结果（已就绪、加载中或不可用时什么也不做）。"""
+        columns = self._columns.get(lang)
+        if columns is not None and columns.generation == generation.number:
+            return
+        if self.available(lang):
+            self._start(lang, generation)
+
+    def warm_default(self, generation):
+        """后台预加载 default_lang 的语言列（主卡池已覆盖的语言不需要）。"""
+        if self._default_lang is not None and self._default_lang not in PRIMARY_LANGS:
+            self.warm(self._default_lang, generation)
+
+    def _start(self, lang: str, generation) -> asyncio.Future:
+        """启动（或复用进行中的）加载任务。"""
+        key = (lang, generation.number)
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._load(lang, generation))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return future
+
+    async def _load(self, lang: str, generation) -> Optional[LanguageColumns]:
+        loop = asyncio.get_running_loop()
+        texts = self._texts.get(lang)
+        if texts is None:
+            try:
+                texts = await loop.run_in_executor(None, self._read_texts, lang)
+            except Exception as e:
+                self._failed[lang] = time.monotonic()
+                _get_logger().warning(f"加载 {lang} 卡牌文本失败: {e}")
+                return None
+            self._failed.pop(lang, None)
+            self._texts[lang] = texts
+            _get_logger().info(f"已加载 {lang} 卡牌文本 {len(texts)} 张。")
+
+        columns = await loop.run_in_executor(
+            None, LanguageColumns, lang, generation.number, generation.cards, texts
+        )
+        current = self._columns.get(lang)
+        if current is None or current.generation <= columns.generation:
+            self._columns[lang] = columns
+        return columns
+
+    def _read_texts(self, lang: str) -> dict[str, tuple[str, str]]:
+        """读取并解析语言数据源（线程池中执行）；URL 下载后缓存到磁盘。"""
+        source = self._sources[lang]
+        if not source.startswith(("http://", "https://")):
+            with open(source, "r", encoding="utf-8") as f:
+                return parse_language_texts(json.load(f))
+
+        cache_file = self._cache_dir / f"cards_{lang}.json"
+        try:
+            fresh = time.time() - cache_file.stat().st_mtime < self._expire_seconds
+        except FileNotFoundError:
+            fresh = False
+        if not fresh:
+            try:
+                resp = requests.get(source, timeout=self._timeout)
+                resp.raise_for_status()
+            except requests.RequestException as e:
+                # 下载失败时退回过期的本地缓存（没有缓存才算加载失败）
+                if not cache_file.exists():
+                    raise
+                _get_logger().warning(f"下载 {lang} 卡牌数据失败，使用本地缓存: {e}")
+            else:
+                self._cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp_file = cache_file.with_suffix(".tmp")
+                tmp_file.write_bytes(resp.content)
+                tmp_file.replace(cache_file)
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return parse_language_texts(json.load(f))
+
+    def stats(self) -> dict[str, int]:
+        """已加载的语言 → 有文本的卡牌数。"""
+        return {lang: len(columns) for lang, columns in self._columns.items()}
+
+
+# 全局实例
+language_store = LanguageStore.from_config()
@@ -0,0 +1,140 @@
+# plugins/sv_card/_markup.py
+"""影之诗超凡世界 skill_text 格式标签渲染。
+
+设计说明：
+    - 一个预编译正则一次扫过全部 <...> 标签，按标签名查表替换，不再逐个标签 re.sub
+    - 渲染结果与预览行在加载时随 Card 计算一次（见 _cache._normalize_card），
+      _formatter 只做字符串拼接
+    - 与旧版逐步替换的渲染规则逐字一致：
+        <color=...>...</color>  → 去掉标签，保留内部文字
+        <ev>                    → 换行 + ↳ 进化时：
+        <sev>                   → 换行 + ↳ 超进化时：
+        <hr>                    → 单独一行 ────────
+        <ridx=N>...</ridx>      → 去掉标签（原文已带（1）（2））
+        其余任何 <...> 标签     → 去掉
+      之后把 3 个以上连续换行压成 2 个、2 个以上连续空格压成 1 个
+
+结构化分段（parse_skill_segments，同样一次扫描）：
+    - base    ：<ev> / <sev> 之外的全部文字（<hr> 只是段落分隔，前后都属于基础效果）
+    - evolve  ：<ev>...</ev> 内的文字（进化时）
+    - super   ：<sev>...</sev> 内的文字（超进化时）
+    - choices ：每个 <ridx=N>...</ridx> 选项块的文字（同时也计入所在段）
+    - keywords：<color=Keyword>...</color> 标出的关键词名（按首次出现顺序去重）
+"""
+
+import re
+from typing import NamedTuple
+
+# 预览行最大长度（超出截断并加省略号）
+PREVIEW_MAX_LEN = 30
+
+_MARKUP_RE = re.compile(r"<[^>]+>")
+
+# 需要替换成文字的标签（小写标签名 → 替换文本）；不在表中的标签一律删除
+_TAG_TEXT = {
+    "ev": "\n↳ 进化时：",
+    "sev": "\n↳ 超进化时：",
+    "hr": "\n────────\n",
+}
+
+_BLANK_RE = re.compile(r"\n{3,}| {2,}")
+
+
+def _replace_tag(match: "re.Match[str]") -> str:
+    return _TAG_TEXT.get(match.group()[1:-1].lower(), "")
+
+
+def _squeeze_blank(match: "re.Match[str]") -> str:
+    return "\n\n" if match.group()[0] == "\n" else " "
+
+
+def render_skill_text(text: str) -> str:
+    """把 skill_text 中的格式标签转换为适合纯文本显示的形式。"""
+    if not text:
+        return ""
+    out = _MARKUP_RE.sub(_replace_tag, text) if "<" in text else text
+    return _BLANK_RE.sub(_squeeze_blank, out).strip()
+
+
+def preview_line(rendered: str) -> str:
+    """渲染后技能文本的第一行（列表展示用，过长时截断）。"""
+    first_line = rendered.split("\n", 1)[0] if rendered else ""
+    if len(first_line) > PREVIEW_MAX_LEN:
+        first_line = first_line[:PREVIEW_MAX_LEN - 3] + "..."
+    return first_line
+
+
+# ============== 结构化分段 ==============
+
+class SkillSegments(NamedTuple):
+    """技能文本按效果段拆分后的结果（文字均已去标签）。"""
+
+    base: str
+    evolve: str
+    super_evolve: str
+    choices: tuple[str, ...]
+    keywords: tuple[str, ...]
+
+
+EMPTY_SEGMENTS = SkillSegments("", "", "", (), ())
+
+
+def parse_skill_segments(text: str) -> SkillSegments:
+    """把 skill_text 拆成基础 / 进化 / 超进化 / 选项块 / 关键词。"""
+    if not text:
+        return EMPTY_SEGMENTS
+
+    sections: dict[str, list[str]] = {"base": [], "evolve": [], "super": []}
+    section = "base"
+    choices: list[str] = []
+    choice: list[str] = []
+    in_choice = False
+    keywords: list[str] = []
+    keyword: list[str] = []
+    in_keyword = False
+
+    def emit(chunk: str):
+        if not chunk:
+            return
+        sections[section].append(chunk)
+        if in_choice:
+            choice.append(chunk)
+        if in_keyword:
+            keyword.append(chunk)
+
+    last = 0
+    for match in _MARKUP_RE.finditer(text):
+        emit(text[last:match.start()])
+        last = match.end()
+        tag = match.group()[1:-1].lower()
+        if tag == "ev":
+            section = "evolve"
+        elif tag == "sev":
+            section = "super"
+        elif tag in ("/ev", "/sev"):
+            section = "base"
+        elif tag == "hr":
+            emit("\n")
+        elif tag.startswith("ridx"):
+            in_choice, choice = True, []
+        elif tag == "/ridx":
+            if in_choice:
+                choices.append("".join(choice).strip())
+            in_choice = False
+        elif tag.startswith("color=keyword"):
+            in_keyword, keyword = True, []
+        elif tag == "/color":
+            # 个别关键词被换行截断，去掉其中的空白
+            name = "".join("".join(keyword).split())
+            if in_keyword and name and name not in keywords:
+                keywords.append(name)
+            in_keyword = False
+    emit(text[last:])
+
+    return SkillSegments(
+        base="".join(sections["base"]).strip(),
+        evolve="".join(sections["evolve"]).strip(),
+        super_evolve="".join(sections["super"]).strip(),
+        choices=tuple(c for c in choices if c),
+        keywords=tuple(keywords),
+    )
@@ -0,0 +1,81 @@
+# plugins/sv_card/_normalize.py
+"""影之诗超凡世界 搜索文本归一化。
+
+建索引和查询共用同一套规则，保证两边的文本落在同一个"比较空间"：
+    1. 去掉 <color=...> <ev> <sev> <hr> <ridx=N> 等格式标签（避免标签文字误命中）
+    2. 一次 str.translate 完成：
+        - 全角 ASCII / 全角空格 → 半角，半角片假名 → 全角
+        - 繁体 → 简体（逐字，取自 zhconv 的 zh-cn 单字表）
+        - 标点变体合并：各种间隔号（・ ･ • ‧ ∙）→ ·，波浪线 → ~，破折号 → -，
+          开引号（「『“‘）→ 「，闭引号（」』”’）→ 」（卡牌文本用「」『』引用卡名，
+          查询里用哪一种都能命中；引号保留而不删除，只搜引号本身也有结果）
+    3. 小写化
+
+转换表在导入时生成一次，查询期没有任何词典遍历，归一化代价 O(len(text))。
+逐字繁简转换不处理 zhconv 的词组规则（如「乾隆」），但建索引和查询两边一致，不影响匹配。
+"""
+
+import re
+import unicodedata
+
+from zhconv import zhconv
+
+# 卡牌数据中的格式标签（只认已知标签名，避免误伤查询里的 cost<=2 atk>=3 之类）
+_TAG_RE = re.compile(r"</?(?:color|ev|sev|hr|ridx)\b[^>]*>", re.IGNORECASE)
+
+# 标点变体 → 统一形式
+_PUNCT_FOLD = {
+    "・": "·", "･": "·", "•": "·", "‧": "·", "∙": "·", "⋅": "·",
+    "～": "~", "〜": "~",
+    "—": "-", "–": "-", "―": "-", "－": "-", "‐": "-",
+    "『": "「", "“": "「", "‘": "「",
+    "』": "」", "”": "」", "’": "」",
+}
+
+
+def _build_t2s_table() -> dict[int, str]:
+    """繁 → 简单字表（取自 zhconv 的 zh-cn 转换表，只取一对一的单字映射）。"""
+    return {
+        ord(src): dst
+        for src, dst in zhconv.getdict("zh-cn").items()
+        if len(src) == 1 and len(dst) == 1 and src != dst
+        and unicodedata.category(src) == "Lo"
+    }
+
+
+def _build_normalize_table(t2s: dict[int, str]) -> dict[int, object]:
+    """生成归一化用的 str.translate 表（导入时调用一次）。"""
+    table: dict[int, object] = dict(t2s)
+
+    # 全角 ASCII（U+FF01-U+FF5E）→ 半角，全角空格 → 半角空格
+    for code in range(0xFF01, 0xFF5F):
+        table[code] = chr(code - 0xFEE0)
+    table[0x3000] = " "
+
+    # 半角片假名（U+FF61-U+FF9F）→ 全角（NFKC 结果不止一个字符的保持原样）
+    for code in range(0xFF61, 0xFFA0):
+        folded = unicodedata.normalize("NFKC", chr(code))
+        if len(folded) == 1:
+            table[code] = folded
+
+    # 标点变体最后写入，覆盖上面的映射
+    for src, dst in _PUNCT_FOLD.items():
+        table[ord(src)] = dst
+    return table
+
+
+_T2S_TABLE = _build_t2s_table()
+_NORMALIZE_TABLE = _build_normalize_table(_T2S_TABLE)
+
+
+def to_simplified(text: str) -> str:
+    """逐字繁体 → 简体（不做其他归一化，用于展示用的卡名）。"""
+    return text.translate(_T2S_TABLE) if text else ""
+
+
+def normalize_text(text: str) -> str:
+    """把卡牌文本或查询串归一化为搜索用形式。"""
+    if not text:
+        return ""
+    out = _TAG_RE.sub("", text) if "<" in text else text
+    return out.translate(_NORMALIZE_TABLE).lower()
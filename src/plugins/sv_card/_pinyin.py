@@ -0,0 +1,155 @@
+# plugins/sv_card/_pinyin.py
+"""影之诗超凡世界 卡名拼音 / 首字母前缀索引。
+
+设计说明：
+    - 加载时用 pypinyin 把中文卡名转成音节序列，存进 Card.name_pinyin（每张卡只转一次，
+      未变化的卡在增量刷新时直接复用，查询期不做任何注音）
+    - 每张卡登记三类键：
+        全拼     不屈的战士 → buqudezhanshi
+        首字母   不屈的战士 → bqdzs
+        音节后缀 从第 2 个音节起的全拼 → qudezhanshi / dezhanshi / zhanshi / shi
+    - 所有键排序成一个列表，另存与之对齐的卡牌下标和键种类数组（每个 (键, 卡牌) 只占一行，
+      不在每个前缀上重复记录卡牌）；前缀查询 = 两次 bisect 定位区间 + 逐行取最高分，
+      代价 O(log n + 命中行数)
+    - 增量刷新：copy() 共享三个数组，patch() 生成插入 / 删除后的新数组（不原地修改），
+      旧一代不受影响
+"""
+
+import re
+from array import array
+from bisect import bisect_left
+from typing import Iterator, Optional
+
+from pypinyin import lazy_pinyin
+
+from ._card import intern_str
+from ._idrange import prefix_upper
+
+# 分数（与 _searcher 卡名各层并列：中文名完全 100 / 日文名完全 95 / 中文名前缀 80 / 包含 60）
+PINYIN_EXACT_SCORE = 90    # 全拼或首字母与整个卡名完全相等
+PINYIN_PREFIX_SCORE = 70   # 全拼或首字母前缀
+PINYIN_INNER_SCORE = 50    # 从卡名中间某个音节开始的全拼前缀
+
+# 最短查询长度（单个字母命中面太广，不走拼音）
+PINYIN_MIN_QUERY = 2
+
+# 可以按拼音查询的关键词：字母开头的小写字母数字串（卡名里可能夹着数字）
+PINYIN_QUERY_RE = re.compile(r"^[a-z][0-9a-z]*$")
+
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+
+
+def romanize(name: str) -> tuple[str, ...]:
+    """把卡名转为小写无声调的音节序列（ü 记作 v，名字里的字母数字原样保留）。"""
+    if not name:
+        return ()
+    syllables = []
+    for item in lazy_pinyin(name):
+        item = _NON_ALNUM_RE.sub("", item.lower())
+        if item:
+            syllables.append(intern_str(item))
+    return tuple(syllables)
+
+
+# 键的种类 → (前缀分, 完全相等分)
+_KIND_SCORES = (
+    (PINYIN_PREFIX_SCORE, PINYIN_EXACT_SCORE),   # 全拼 / 首字母
+    (PINYIN_INNER_SCORE, PINYIN_INNER_SCORE),    # 音节后缀
+)
+
+
+def _keys(syllables: tuple[str, ...]) -> Iterator[tuple[str, int]]:
+    """一张卡登记的 (键, 种类)。"""
+    if not syllables:
+        return
+    yield "".join(syllables), 0
+    if len(syllables) > 1:
+        yield "".join(s[0] for s in syllables), 0
+    for i in range(1, len(syllables)):
+        yield "".join(syllables[i:]), 1
+
+
+class PinyinIndex:
+    """卡名拼音有序键数组（键 → 卡牌下标及种类，前缀查询用二分）。"""
+
+    def __init__(self):
+        # 升序键（同一个键可能对应多张卡，按 (键, 下标, 种类) 排序）
+        self._keys: list[str] = []
+        # 与 _keys 对齐的卡牌下标与键种类
+        self._positions = array("I")
+        self._kinds = array("B")
+        # 全量构建时的暂存（finish() 后清空）
+        self._pending: Optional[list[tuple[str, int, int]]] = []
+
+    def add(self, pos: int, syllables: tuple[str, ...]):
+        """登记一张卡牌的卡名音节（仅用于全量构建）。"""
+        for key, kind in _keys(syllables):
+            self._pending.append((key, pos, kind))
+
+    def finish(self):
+        """全量构建结束：按键排序。"""
+        rows = sorted(set(self._pending))
+        self._keys = [key for key, _, _ in rows]
+        self._positions = array("I", [pos for _, pos, _ in rows])
+        self._kinds = array("B", [kind for _, _, kind in rows])
+        self._pending = None
+
+    def lookup(self, keyword: str) -> dict[int, int]:
+        """前缀查询，返回 {卡牌下标: 分数}（keyword 过短或不是字母串时为空）。"""
+        if len(keyword) < PINYIN_MIN_QUERY or not PINYIN_QUERY_RE.match(keyword):
+            return {}
+        keys = self._keys
+        positions = self._positions
+        kinds = self._kinds
+        start = bisect_left(keys, keyword)
+        end = bisect_left(keys, prefix_upper(keyword), start)
+        hits: dict[int, int] = {}
+        for i in range(start, end):
+            prefix_score, exact_score = _KIND_SCORES[kinds[i]]
+            score = exact_score if keys[i] == keyword else prefix_score
+            pos = positions[i]
+            if hits.get(pos, 0) < score:
+                hits[pos] = score
+        return hits
+
+    def copy(self) -> "PinyinIndex":
+        """浅拷贝：共享三个数组，之后 patch() 生成新数组。"""
+        clone = PinyinIndex()
+        clone._keys = self._keys
+        clone._positions = self._positions
+        clone._kinds = self._kinds
+        clone._pending = None
+        return clone
+
+    def patch(self, pos: int, old_syllables: tuple[str, ...], new_syllables: tuple[str, ...]):
+        """把下标 pos 的登记内容从 old_syllables 换成 new_syllables（不原地修改）。"""
+        if old_syllables == new_syllables:
+            return
+        keys = list(self._keys)
+        positions = array("I", self._positions)
+        kinds = array("B", self._kinds)
+        for key, kind in set(_keys(old_syllables)):
+            i = self._find(keys, positions, kinds, key, pos, kind)
+            if i < len(keys) and (keys[i], positions[i], kinds[i]) == (key, pos, kind):
+                del keys[i]
+                del positions[i]
+                del kinds[i]
+        for key, kind in set(_keys(new_syllables)):
+            i = self._find(keys, positions, kinds, key, pos, kind)
+            keys.insert(i, key)
+            positions.insert(i, pos)
+            kinds.insert(i, kind)
+        self._keys = keys
+        self._positions = positions
+        self._kinds = kinds
+
+    @staticmethod
+    def _find(keys: list[str], positions: array, kinds: array, key: str, pos: int, kind: int) -> int:
+        """(key, pos, kind) 在有序数组中的插入位置。"""
+        i = bisect_left(keys, key)
+        while i < len(keys) and keys[i] == key and (positions[i], kinds[i]) < (pos, kind):
+            i += 1
+        return i
+
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,600 @@
+# plugins/sv_card/_query.py
+"""影之诗超凡世界 布尔查询语言。
+
+语法（运算符区分大小写，优先级 NOT > AND > OR）：
+    守护 随从              相邻的词隐式 AND
+    守护 AND 突进          显式 AND（也可写 &）
+    #精灵 OR #皇家         OR（也可写 |）
+    NOT 中立 / -中立       取反
+    "抽取 2"               引号内为一个短语（整体作为子串匹配，支持 "" “” 「」 『』）
+    (#精灵 OR #皇家) 守护  括号分组
+    field:value            字段限定：
+        name: / 名:        只匹配卡名（含日文名、拼音）
+        skill: / 技能:     只匹配技能文本（中日）
+        class: type: rarity: set: tribe: cost:   分面（职业/类型/稀有度/卡包/种族/费用段）
+        kw: ev: sev: base: choice:               同普通查询（关键词分面 / 技能段）
+    cost<=2 atk>=3 …       数值谓词，同普通查询
+    未加引号、也没有字段前缀的词：能识别为分面词（#职业、随从、金、3费 …）时按分面处理，
+    否则在卡名 / 技能 / 类型里匹配（与普通查询单个关键词的命中规则一致）
+
+执行：
+    1. 解析成 AST（And / Or / Not / 词项叶子），语法错误抛 QuerySyntaxError
+    2. 编译成执行计划：分面 / 谓词叶子直接取位图；文本叶子只取 n-gram 候选集（不确认），
+       二者的大小即选择度估计
+    3. AND 按估计从小到大求值，每个子节点只在已有幸存者范围内求值（文本叶子只确认
+       候选集与幸存者的交集），NOT 最后做差集，遇空即停；OR 在同一范围内求并集
+    4. 只对最终幸存者打分：未被取反的文本词按普通查询的分档计分求和，
+       同分按技能文本 BM25 相关度、再按卡池顺序；不含文本词时按卡池顺序
+"""
+
+import heapq
+import re
+from itertools import islice
+from typing import AbstractSet, Iterable, NamedTuple, Optional, Union
+
+from ._bm25 import SkillBM25
+from ._card import Card
+from ._facets import FacetIndex, StatIndex, iter_positions, popcount
+from ._index import NGRAM_MAX, NgramIndex
+from ._normalize import normalize_text
+from ._pinyin import PinyinIndex
+from ._searcher import (
+    _KEYWORD_PREFIXES,
+    _calculate_score,
+    parse_facet_token,
+    parse_segment_token,
+    parse_stat_token,
+)
+from ._segments import segment_contains
+
+
+class QuerySyntaxError(ValueError):
+    """布尔查询语法错误（消息直接展示给用户）。"""
+
+
+# ============== AST ==============
+
+class Term(NamedTuple):
+    """文本词：field 为 any（卡名 / 技能 / 类型）、name 或 skill；text 已归一化。"""
+
+    field: str
+    text: str
+
+
+class Filter(NamedTuple):
+    """位图类叶子：kind 为 facet / stat / segment，args 为对应解析结果。"""
+
+    kind: str
+    args: tuple
+
+
+class Not(NamedTuple):
+    child: "Node"
+
+
+class And(NamedTuple):
+    children: tuple
+
+
+class Or(NamedTuple):
+    children: tuple
+
+
+Node = Union[Term, Filter, Not, And, Or]
+
+
+# ============== 词法 ==============
+
+_QUOTES = {'"': '"', "＂": "＂", "“": "”", "「": "」", "『": "』"}
+_OPERATORS = {"AND": "AND", "OR": "OR", "NOT": "NOT"}
+
+# 字段名 → 文本字段 / 分面
+_TEXT_FIELDS = {"name": "name", "名": "name", "卡名": "name", "skill": "skill", "技能": "skill"}
+_FACET_FIELDS = {
+    "class": "class", "职业": "class",
+    "type": "type", "类型": "type",
+    "rarity": "rarity", "稀有度": "rarity",
+    "set": "set", "卡包": "set",
+    "tribe": "tribe", "种族": "tribe",
+    "cost": "cost", "费用": "cost",
+}
+
+# 只含这些语法时才走布尔查询，其余查询保持原有的隐式 AND 行为
+_BOOLEAN_HINT_RE = re.compile(
+    r"(?:^|\s)(?:AND|OR|NOT)(?:\s|$)"
+    r"|[()（）|｜\"＂“”「」『』]"
+    r"|(?:^|\s)[&＆](?:\s|$)"
+    r"|(?:^|[\s(（])[-－](?=[^\d\s\-－])"
+    r"|(?:^|[\s(（])(?i:" + "|".join([*_TEXT_FIELDS, *_FACET_FIELDS]) + r")[:：]"
+)
+
+
+def is_boolean_query(text: str) -> bool:
+    """查询串是否用到了布尔查询语法（运算符、引号、括号、取反或字段限定）。"""
+    return bool(_BOOLEAN_HINT_RE.search(text))
+
+
+def tokenize(text: str) -> list[tuple[str, str]]:
+    """切分为 [(类别, 原文)]：( ) AND OR NOT WORD PHRASE，以及 FIELD（field:"短语"）。"""
+    tokens: list[tuple[str, str]] = []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch.isspace():
+            i += 1
+        elif ch in "(（":
+            tokens.append(("(", ch))
+            i += 1
+        elif ch in ")）":
+            tokens.append((")", ch))
+            i += 1
+        elif ch in "|｜":
+            tokens.append(("OR", ch))
+            i += 1
+        elif ch in "&＆":
+            tokens.append(("AND", ch))
+            i += 1
+        elif ch in "-－" and i + 1 < n and not (text[i + 1].isspace() or text[i + 1].isdigit()):
+            tokens.append(("NOT", ch))
+            i += 1
+        elif ch in _QUOTES:
+            phrase, i = _read_quoted(text, i)
+            tokens.append(("PHRASE", phrase))
+        else:
+            j = i
+            while j < n and not text[j].isspace() and text[j] not in "()（）|｜":
+                if text[j] in _QUOTES and text[j - 1] in ":：":
+                    break
+                j += 1
+            word = text[i:j]
+            if j < n and text[j] in _QUOTES and word.endswith((":", "：")):
+                phrase, j = _read_quoted(text, j)
+                tokens.append(("FIELD", word[:-1] + ":" + phrase))
+            else:
+                tokens.append((_OPERATORS.get(word, "WORD"), word))
+            i = j
+    return tokens
+
+
+def _read_quoted(text: str, start: int) -> tuple[str, int]:
+    """读取 start 处开始的引号短语，返回 (内容, 闭引号之后的位置)。"""
+    close = _QUOTES[text[start]]
+    end = text.find(close, start + 1)
+    if end == -1:
+        raise QuerySyntaxError(f"引号 {text[start]} 没有闭合")
+    return text[start + 1:end], end + 1
+
+
+# ============== 语法 ==============
+
+class _Parser:
+    """递归下降：or := and (OR and)*；and := not (AND? not)*；not := NOT not | atom。"""
+
+    def __init__(self, tokens: list[tuple[str, str]]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def next(self) -> tuple[str, str]:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self) -> Node:
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"多余的「{self.tokens[self.pos][1]}」")
+        return node
+
+    def parse_or(self) -> Node:
+        children = [self.parse_and()]
+        while self.peek() == "OR":
+            self.next()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else Or(tuple(children))
+
+    def parse_and(self) -> Node:
+        children = [self.parse_not()]
+        while self.peek() not in (None, ")", "OR"):
+            if self.peek() == "AND":
+                self.next()
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else And(tuple(children))
+
+    def parse_not(self) -> Node:
+        if self.peek() == "NOT":
+            self.next()
+            return Not(self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self) -> Node:
+        kind = self.peek()
+        if kind is None:
+            raise QuerySyntaxError("查询在运算符之后意外结束")
+        kind, raw = self.next()
+        if kind == "(":
+            node = self.parse_or()
+            if self.peek() != ")":
+                raise QuerySyntaxError("括号没有闭合")
+            self.next()
+            return node
+        if kind == "PHRASE":
+            return _text_term("any", raw)
+        if kind == "FIELD":
+            name, _, value = raw.partition(":")
+            return _field_leaf(normalize_text(name), value)
+        if kind == "WORD":
+            return _word_leaf(raw)
+        raise QuerySyntaxError(f"「{raw}」前缺少查询词")
+
+
+def parse_query(text: str) -> Node:
+    """把查询串解析为 AST。"""
+    tokens = tokenize(text)
+    if not tokens:
+        raise QuerySyntaxError("查询为空")
+    return _Parser(tokens).parse()
+
+
+def _text_term(field: str, raw: str) -> Term:
+    text = normalize_text(raw).strip()
+    if not text:
+        raise QuerySyntaxError("空的查询词")
+    return Term(field, text)
+
+
+def _word_leaf(raw: str) -> Node:
+    """未加引号的词：限定字段 / 数值谓词 / 分面词 / 普通文本词。"""
+    word = normalize_text(raw)
+    if not word:
+        raise QuerySyntaxError(f"无法识别的查询词「{raw}」")
+
+    name, sep, value = word.partition(":")
+    if sep and (name in _TEXT_FIELDS or name in _FACET_FIELDS):
+        return _field_leaf(name, value)
+
+    scoped = parse_segment_token(word)
+    if scoped is not None:
+        return Filter("segment", scoped)
+    predicate = parse_stat_token(word)
+    if predicate is not None:
+        return Filter("stat", predicate)
+    parsed = parse_facet_token(word)
+    if parsed is not None:
+        return Filter("facet", parsed)
+    if word.startswith(("#", *_KEYWORD_PREFIXES)):
+        raise QuerySyntaxError(f"无法识别的过滤词「{raw}」")
+    return Term("any", word)
+
+
+def _field_leaf(name: str, value: str) -> Node:
+    """field:value 叶子。"""
+    if name in _TEXT_FIELDS:
+        return _text_term(_TEXT_FIELDS[name], value)
+
+    facet = _FACET_FIELDS.get(name)
+    if facet is None:
+        # 带引号的 kw:"…" / ev:"…" 等沿用普通查询的解析
+        word = f"{name}:{normalize_text(value)}"
+        scoped = parse_segment_token(word)
+        if scoped is not None:
+            return Filter("segment", scoped)
+        parsed = parse_facet_token(word)
+        if parsed is not None:
+            return Filter("facet", parsed)
+        raise QuerySyntaxError(f"未知的字段「{name}:」")
+
+    value = normalize_text(value)
+    if facet == "set" and value.isdigit():
+        # set:3 与 set:10003 都表示卡包 10003
+        number = int(value)
+        return Filter("facet", ("set", number if number >= 10000 else 10000 + number))
+    if facet == "cost" and value.isdigit():
+        value += "费"
+    if facet == "tribe":
+        value = "种族:" + value
+    parsed = parse_facet_token(value)
+    if parsed is None or parsed[0] != facet:
+        raise QuerySyntaxError(f"无法识别的字段取值「{name}:{value}」")
+    return Filter("facet", parsed)
+
+
+# ============== 执行计划 ==============
+
+class _Context(NamedTuple):
+    cards: list[Card]
+    index: NgramIndex
+    name_index: Optional[NgramIndex]
+    facets: FacetIndex
+    stats: Optional[StatIndex]
+    pinyin_index: Optional[PinyinIndex]
+
+
+def _mask_of(positions: Iterable[int], size: int) -> int:
+    """下标集合 → 位图（一次性按字节拼装，不做逐位的大整数运算）。"""
+    bits = bytearray((size + 7) >> 3)
+    for pos in positions:
+        bits[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(bits, "little")
+
+
+class _MaskLeaf:
+    """位图叶子（分面 / 数值谓词），编译时即求出位图。"""
+
+    __slots__ = ("mask", "estimate")
+
+    def __init__(self, mask: int):
+        self.mask = mask
+        self.estimate = popcount(mask)
+
+    def evaluate(self, ctx: _Context, within: int) -> int:
+        return within & self.mask
+
+
+class _VerifyLeaf:
+    """候选集叶子（文本词 / 技能段）：编译时只取候选集，求值时在幸存者范围内逐个确认。
+
+    exact 为真时候选集就是结果（索引覆盖了要匹配的全部字段、词长不超过 gram 长度），不再确认。
+    """
+
+    __slots__ = ("term", "candidates", "pinyin", "exact", "estimate")
+
+    def __init__(
+        self,
+        term: Union[Term, Filter],
+        candidates,
+        pinyin: Optional[dict[int, int]],
+        exact: bool = False,
+    ):
+        self.term = term
+        self.candidates = candidates
+        self.pinyin = pinyin
+        self.exact = exact
+        self.estimate = len(candidates)
+
+    def evaluate(self, ctx: _Context, within: int) -> int:
+        pool = self.candidates
+        if pool and within != ctx.facets.all_mask:
+            pool = pool.intersection(iter_positions(within))
+        cards = ctx.cards
+        if not self.exact:
+            pool = [pos for pos in pool if self._matches(cards[pos], pos)]
+        return _mask_of(pool, len(cards))
+
+    def _matches(self, card: Card, pos: int) -> bool:
+        term = self.term
+        if isinstance(term, Filter):
+            field, keyword = term.args
+            return segment_contains(card.skill_segments, field, keyword)
+        text = term.text
+        if self.pinyin and pos in self.pinyin:
+            return True
+        doc = card.search_doc
+        if term.field == "name":
+            return text in doc.name or (bool(doc.name_ja) and text in doc.name_ja)
+        if term.field == "skill":
+            return text in doc.skill_text or (bool(doc.skill_text_ja) and text in doc.skill_text_ja)
+        return _calculate_score(card, [text], False) > 0
+
+
+class _NotPlan:
+    __slots__ = ("child", "estimate")
+
+    def __init__(self, child, size: int):
+        self.child = child
+        self.estimate = size - child.estimate
+
+    def evaluate(self, ctx: _Context, within: int) -> int:
+        return within & ~self.child.evaluate(ctx, within)
+
+
+class _AndPlan:
+    """按选择度从小到大求交；取反的子节点最后做差集，遇空即停。"""
+
+    __slots__ = ("children", "estimate")
+
+    def __init__(self, children: list, size: int):
+        positive = sorted((c for c in children if not isinstance(c, _NotPlan)), key=_estimate)
+        negative = sorted(
+            (c for c in children if isinstance(c, _NotPlan)), key=_estimate
+        )
+        self.children = positive + negative
+        self.estimate = positive[0].estimate if positive else min(c.estimate for c in negative)
+
+    def evaluate(self, ctx: _Context, within: int) -> int:
+        for child in self.children:
+            within = child.evaluate(ctx, within)
+            if not within:
+                break
+        return within
+
+
+class _OrPlan:
+    """在同一幸存者范围内求并集；已被前面子节点覆盖的部分不再让后面的子节点确认。
+
+    位图叶子先求（代价与结果大小无关），需要逐个确认的子节点排在后面，范围更小。
+    """
+
+    __slots__ = ("children", "estimate")
+
+    def __init__(self, children: list, size: int):
+        self.children = sorted(children, key=lambda c: not isinstance(c, _MaskLeaf))
+        self.estimate = min(size, sum(c.estimate for c in children))
+
+    def evaluate(self, ctx: _Context, within: int) -> int:
+        result = 0
+        for child in self.children:
+            result |= child.evaluate(ctx, within & ~result)
+            if result == within:
+                break
+        return result
+
+
+def _estimate(plan) -> int:
+    return plan.estimate
+
+
+def _compile(node: Node, ctx: _Context, terms: list[Term], negated: bool = False):
+    """AST → 执行计划；未被取反的文本词收集到 terms 里（打分用）。"""
+    size = len(ctx.cards)
+    if isinstance(node, And):
+        return _AndPlan([_compile(c, ctx, terms, negated) for c in node.children], size)
+    if isinstance(node, Or):
+        return _OrPlan([_compile(c, ctx, terms, negated) for c in node.children], size)
+    if isinstance(node, Not):
+        return _NotPlan(_compile(node.child, ctx, terms, not negated), size)
+
+    if isinstance(node, Filter):
+        if node.kind == "facet":
+            return _MaskLeaf(ctx.facets.mask(*node.args))
+        if node.kind == "stat":
+            return _MaskLeaf(ctx.stats.mask(*node.args) if ctx.stats is not None else 0)
+        # 技能段：主索引的候选再确认段文字
+        return _VerifyLeaf(node, ctx.index.candidates(node.args[1]) or frozenset(), None)
+
+    if not negated:
+        terms.append(node)
+    candidates, _, pinyin = _term_candidates(node, ctx)
+    # 卡名索引只含卡名、全文索引含 search_doc 全部字段：短词的候选集即精确结果
+    exact = len(node.text) <= NGRAM_MAX and (
+        node.field == "any" or (node.field == "name" and ctx.name_index is not None)
+    )
+    return _VerifyLeaf(node, candidates, pinyin, exact)
+
+
+def _term_candidates(
+    term: Term,
+    ctx: _Context,
+) -> tuple[AbstractSet[int], AbstractSet[int], Optional[dict[int, int]]]:
+    """文本词的 (候选集, 卡名候选集, 拼音命中)。
+
+    卡名候选集只用于估计分数上界（打分看全部字段，skill: 词也可能在卡名上得高分）；
+    没有卡名索引时退化为整个候选集。
+    """
+    text = term.text
+    name_set = ctx.name_index.candidates(text) or frozenset() if ctx.name_index else None
+    if term.field == "name" and name_set is not None:
+        candidates = name_set
+    else:
+        candidates = ctx.index.candidates(text) or frozenset()
+    pinyin = None
+    if term.field != "skill" and ctx.pinyin_index is not None:
+        pinyin = ctx.pinyin_index.lookup(text) or None
+        if pinyin:
+            candidates = candidates | pinyin.keys()
+            if name_set is not None:
+                name_set = name_set | pinyin.keys()
+    return candidates, candidates if name_set is None else name_set, pinyin
+
+
+def plan_query(node: Node, ctx: _Context) -> tuple[object, list[Term]]:
+    """编译执行计划，返回 (计划根节点, 参与打分的文本词)。"""
+    terms: list[Term] = []
+    return _compile(node, ctx, terms), terms
+
+
+# ============== 入口 ==============
+
+def boolean_search(
+    query: str,
+    cards: list[Card],
+    index: NgramIndex,
+    facets: FacetIndex,
+    stats: Optional[StatIndex] = None,
+    name_index: Optional[NgramIndex] = None,
+    pinyin_index: Optional[PinyinIndex] = None,
+    skill_bm25: Optional[SkillBM25] = None,
+    limit: int = 10,
+) -> list[Card]:
+    """按布尔查询搜索卡牌（参数含义同 search_cards）。
+
+    Raises:
+        QuerySyntaxError: 查询语法错误
+    """
+    node = parse_query(query)
+    if not cards:
+        return []
+    ctx = _Context(cards, index, name_index, facets, stats, pinyin_index)
+    plan, terms = plan_query(node, ctx)
+    mask = plan.evaluate(ctx, facets.all_mask)
+    if not mask or limit <= 0:
+        return []
+    if not terms:
+        return [cards[pos] for pos in islice(iter_positions(mask), limit)]
+
+    return _rank_survivors(mask, terms, ctx, skill_bm25, limit)
+
+
+# ============== 幸存者打分 ==============
+
+# 单个文本词的分数上界：落在卡名候选（含拼音）里最高 100，否则最高 30（技能描述）
+_NAME_TIER_BOUND = 100
+_OTHER_TIER_BOUND = 30
+
+
+def _rank_survivors(
+    mask: int,
+    terms: list[Term],
+    ctx: _Context,
+    skill_bm25: Optional[SkillBM25],
+    limit: int,
+) -> list[Card]:
+    """对幸存者打分取前 limit 名（分数降序，同分按 BM25 相关度、再按卡池顺序）。
+
+    每张卡先只用集合查找算出分数上界并分桶，按上界从高到低逐桶打分；
+    堆已满且下一桶的上界低于堆中最差的分数时结束，低分桶里的卡不再打分。
+    """
+    cards = ctx.cards
+    keywords: list[str] = []
+    lookups = []
+    for term in terms:
+        if term.text in keywords:
+            continue
+        keywords.append(term.text)
+        candidates, name_set, pinyin = _term_candidates(term, ctx)
+        lookups.append((term.text, candidates, name_set, [pinyin] if pinyin else None))
+    relevance = None
+    if skill_bm25 is not None:
+        relevance = [skill_bm25.keyword_scores(keyword) for keyword in keywords]
+
+    buckets: dict[int, list[int]] = {}
+    for pos in iter_positions(mask):
+        bound = 0
+        for _, candidates, name_set, _ in lookups:
+            if pos in name_set:
+                bound += _NAME_TIER_BOUND
+            elif pos in candidates:
+                bound += _OTHER_TIER_BOUND
+        bucket = buckets.get(bound)
+        if bucket is None:
+            buckets[bound] = [pos]
+        else:
+            bucket.append(pos)
+
+    heap: list[tuple[int, float, int]] = []
+    # 与普通查询一致：只有得分落在技能层的词计入相关度
+    skill_hits: Optional[list[int]] = [] if relevance is not None else None
+    for bound in sorted(buckets, reverse=True):
+        if len(heap) >= limit and bound < heap[0][0]:
+            break
+        for pos in buckets[bound]:
+            card = cards[pos]
+            score = 0
+            rel = 0.0
+            for i, (keyword, candidates, _, hits) in enumerate(lookups):
+                if pos not in candidates:
+                    continue
+                score += _calculate_score(card, [keyword], False, hits, pos, skill_hits)
+                if skill_hits:
+                    rel += relevance[i].get(pos, 0.0)
+                    skill_hits.clear()
+            entry = (score, rel, -pos)
+            if len(heap) < limit:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+    heap.sort(reverse=True)
+    return [cards[-neg_pos] for _, _, neg_pos in heap]
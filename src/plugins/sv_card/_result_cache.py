@@ -0,0 +1,89 @@
+# plugins/sv_card/_result_cache.py
+"""影之诗超凡世界 /sv 查询结果缓存。
+
+设计说明：
+    - 有界 LRU（OrderedDict），键 = (归一化查询, 模式, limit, 数据代号)；
+      布尔查询的运算符区分大小写（"守护 OR 突进" 与 "守护 or 突进" 含义不同），
+      这类查询按原文（只合并空白）作键，并与普通查询分开
+    - 值同时保存排好序的卡牌 ID 列表和渲染好的消息文本，命中时直接发送
+    - 数据代号变化（CardCache 切换到新一代）时整表清空，旧结果不会被读到
+    - 命中 / 未命中 / 淘汰次数可通过 stats() 查看
+"""
+
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from ._normalize import normalize_text
+from ._query import is_boolean_query
+
+# 默认容量（条）
+RESULT_CACHE_SIZE = 256
+
+
+class CachedResult(NamedTuple):
+    """一次查询的缓存结果。"""
+
+    card_ids: tuple[str, ...]
+    message: str
+
+
+class ResultCache:
+    """按数据代号失效的 LRU 结果缓存。"""
+
+    def __init__(self, maxsize: int = RESULT_CACHE_SIZE):
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[tuple, CachedResult]" = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(query: str, mode: str, limit: int, generation: int) -> tuple:
+        """生成缓存键（查询串先归一化，空白 / 全半角 / 繁简差异不影响命中；布尔查询按原文）。"""
+        if is_boolean_query(query):
+            return (" ".join(query.split()), True, mode, limit, generation)
+        return (" ".join(normalize_text(query).split()), False, mode, limit, generation)
+
+    def _sync_generation(self, generation: int):
+        """数据换代时清空全部旧结果。"""
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, key: tuple) -> Optional[CachedResult]:
+        self._sync_generation(key[-1])
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple, result: CachedResult):
+        self._sync_generation(key[-1])
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """命中统计。"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self._maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# 全局实例
+result_cache = ResultCache()
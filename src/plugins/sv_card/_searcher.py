@@ -10,71 +10,518 @@
     6. 技能描述匹配（日文）→ score = 28
     7. 类型匹配 → score = 10
 
-职业过滤：直接按 class_name 匹配
+分面过滤（查询中含 # 开头的词时启用，见 _facets.py）：
+    /sv #精灵 随从 金 3费      职业 / 类型 / 稀有度 / 费用段 / 卡包 / 种族
+    同一分面内多个取值取并集，不同分面取交集；其余普通关键词在过滤结果内照常打分
+
+关键词（kw:守护 / 关键词:谢幕曲）：技能文本里 <color=Keyword> 标出的游戏关键词，
+    直接取关键词分面位图（精确集合查找，不在技能文本里做子串扫描）；多个 kw: 取交集
+
+数值谓词（查询中含 cost<=2 / atk>=3 / life=5 / rarity>=3 等词时启用）：
+    /sv cost<=2 atk>=3 #龙族   各谓词直接由 StatIndex 求出结果位图，与分面位图、
+    文本候选集合并，不逐卡比较数值
+限定技能段（查询中含 ev:守护 / sev:xxx / base:xxx / choice:xxx 等词时启用）：
+    只在进化时 / 超进化时 / 基础效果 / 选项块里找关键词：候选取自主 n-gram 索引，
+    再确认该段文字包含关键词（见 _segments.py），结果位图与分面位图合并
 注意：不搜索 flavour_text（用户决定）
-"""
 
-from typing import Optional
+比较对象：卡牌加载时预计算的 search_doc（去标签、全半角折叠、繁→简、小写），
+查询串经同一个 normalize_text 处理，查询期不再对每张卡做任何字符串分配。
+
+候选收窄：传入 CardCache.ngram_index 时，先用 n-gram 倒排表求出每个关键词的
+候选下标并取交集，只对幸存的卡牌打分，打分规则与全表扫描完全一致。
+
+拼音：纯字母关键词（如 bqdzs / buqu / zhanshi）再查卡名拼音前缀索引（见 _pinyin.py），
+按全拼 / 首字母完全相等 90、前缀 70、从中间音节起的前缀 50 计分，与卡名各层并列，
+该关键词最终取文本分与拼音分中较高的一个。
+
+容错：搜索无结果时，suggest_cards 用卡名 SymSpell 删除字典（见 _fuzzy.py）
+找出编辑距离 1~2 以内的卡名，作为"你是不是要找"提示。
+
+排序：有界小顶堆取 Top-K（插入时去重），不对全部命中排序；再传入卡名索引时，
+候选按分数上界分桶（卡名层 > 技能层），高层已凑满 K 个且分数更高就不再看低层。
+
+技能层相关度：传入 skill_bm25（见 _bm25.py）时，整数分相同的卡再按"落在技能层
+（30 / 28 分）的关键词"的 BM25 分之和排序，不再只按卡池顺序；桶内按 BM25 上界
+（全部关键词的 BM25 分之和）降序处理，提前终止条件照常成立。
+"""
 
-from ._cache import CLASS_NAME_TO_CODE
+import heapq
+import re
+from itertools import islice
+from typing import Hashable, Iterable, Iterator, Optional
+
+from ._cache import (
+    CLASS_NAME_TO_CODE,
+    RARITY_CODE_TO_NAME,
+    SET_ID_TO_PACK_NAME,
+    TRIBE_CODE_TO_NAME,
+    TYPE_INT_TO_NAME,
+)
+from ._bm25 import SkillBM25
+from ._card import Card
+from ._facets import (
+    COST_BUCKET_MAX,
+    FacetIndex,
+    StatIndex,
+    iter_positions,
+    popcount,
+)
+from ._fuzzy import FuzzyNameIndex
+from ._index import NgramIndex
+from ._normalize import normalize_text
+from ._pinyin import PinyinIndex
+from ._segments import SEGMENT_ALIAS, segment_contains
+
+# ============== 分面词表 ==============
+
+_TYPE_NAME_TO_INT = {v: k for k, v in TYPE_INT_TO_NAME.items()}
+_RARITY_NAME_TO_INT = {v: int(k) for k, v in RARITY_CODE_TO_NAME.items()}
+_PACK_NAME_TO_SET_ID = {v: k for k, v in SET_ID_TO_PACK_NAME.items()}
+_TRIBE_NAME_TO_CODE = {v: k for k, v in TRIBE_CODE_TO_NAME.items() if v}
+_TRIBE_PREFIXES = ("种族:", "tribe:")
+_KEYWORD_PREFIXES = ("kw:", "关键词:")
+
+# 费用：3费 / 3c / 3cost
+_COST_TOKEN_RE = re.compile(r"^(\d+)(?:费|c|cost)$")
+
+# 数值谓词：列名 + 比较符 + 整数
+_STAT_ALIAS = {
+    "cost": "cost", "费": "cost", "费用": "cost",
+    "atk": "atk", "攻": "atk", "攻击": "atk",
+    "life": "life", "hp": "life", "血": "life", "生命": "life",
+    "rarity": "rarity", "稀有度": "rarity",
+}
+_STAT_TOKEN_RE = re.compile(
+    r"^(" + "|".join(sorted(_STAT_ALIAS, key=len, reverse=True)) + r")"
+    r"(<=|>=|==|!=|<|>|=)(\d+)$"
+)
+_STAT_OP_FOLD = str.maketrans({"≤": "<=", "≥": ">=", "≠": "!="})
 
 
 def search_cards(
     keyword: str,
-    cards: list[dict],
+    cards: list[Card],
     class_filter_only: bool = False,
     limit: int = 10,
-) -> list[dict]:
-    """模糊搜索卡牌。"""
+    index: Optional[NgramIndex] = None,
+    facets: Optional[FacetIndex] = None,
+    stats: Optional[StatIndex] = None,
+    name_index: Optional[NgramIndex] = None,
+    pinyin_index: Optional[PinyinIndex] = None,
+    skill_bm25: Optional[SkillBM25] = None,
+) -> list[Card]:
+    """模糊搜索卡牌。
+
+    Args:
+        keyword: 搜索关键词（空格分隔多个，全部要匹配）
+        cards: 卡牌列表（CardCache.get_all_cards()）
+        class_filter_only: 是否为职业过滤模式（仅在未提供 facets 时使用）
+        limit: 返回数量上限
+        index: 与 cards 对应的 n-gram 索引；为 None 时退化为全表扫描
+        facets: 与 cards 对应的分面位图；提供时 # 开头的查询走位图过滤
+        stats: 与 cards 对应的数值列索引；提供时 cost<=2 等谓词走位图过滤
+        name_index: 只含卡名的 n-gram 索引；提供时按分数上界分桶并提前终止
+        pinyin_index: 卡名拼音前缀索引；提供时纯字母关键词同时按拼音 / 首字母匹配卡名
+        skill_bm25: 技能文本 BM25 统计；提供时技能层同分的卡按相关度排序
+    """
     if not keyword or not cards:
         return []
 
     # 多关键词（空格分隔，全部要匹配）
-    keywords = keyword.lower().split()
+    keywords = normalize_text(keyword).split()
     if not keywords:
         return []
 
-    results: list[tuple[dict, int]] = []
+    mask: Optional[int] = None
+    if facets is not None and _is_structured(keywords):
+        mask, keywords = _resolve_filters(keywords, facets, stats, index, cards)
+        if not mask:
+            return []
+        if not keywords:
+            # 纯过滤：位图顺序即卡池顺序，取前 limit 个即可
+            return [cards[pos] for pos in islice(iter_positions(mask), limit)]
+        class_filter_only = False
+
+    pinyin_hits = None
+    if pinyin_index is not None and not class_filter_only:
+        pinyin_hits = _lookup_pinyin(keywords, pinyin_index)
+
+    relevance = None
+    if skill_bm25 is not None and not class_filter_only:
+        relevance = [skill_bm25.keyword_scores(keyword) for keyword in keywords]
+
+    if index is not None and not class_filter_only:
+        survivors = _collect_candidates(keywords, index, mask, pinyin_hits)
+        buckets = _bucket_by_bound(survivors, keywords, name_index, pinyin_hits)
+    elif mask is not None:
+        buckets = [(_NO_BOUND, iter_positions(mask))]
+    else:
+        buckets = [(_NO_BOUND, range(len(cards)))]
+
+    return _rank_top_k(
+        buckets, cards, keywords, class_filter_only, limit, pinyin_hits, relevance
+    )
+
+
+def _lookup_pinyin(
+    keywords: list[str],
+    pinyin_index: PinyinIndex,
+) -> Optional[list[dict[int, int]]]:
+    """逐个关键词查拼音前缀索引，返回与 keywords 对齐的 [{下标: 拼音分}]；全无命中时为 None。"""
+    hits = [pinyin_index.lookup(keyword) for keyword in keywords]
+    return hits if any(hits) else None
+
 
-    for card in cards:
-        score = _calculate_score(card, keywords, class_filter_only)
-        if score > 0:
-            results.append((card, score))
+def keyword_glossary(facets: FacetIndex, limit: Optional[int] = None) -> list[tuple[str, int]]:
+    """关键词词频表：[(关键词, 卡牌数)]，按卡牌数降序、同数按关键词排序。"""
+    counts = sorted(facets.values("keyword").items(), key=lambda item: (-item[1], item[0]))
+    return counts[:limit] if limit is not None else counts
 
-    # 分数降序
-    results.sort(key=lambda x: -x[1])
 
-    # 去重（按 id）
+def suggest_cards(
+    keyword: str,
+    cards: list[Card],
+    fuzzy_index: FuzzyNameIndex,
+    limit: int = 3,
+) -> list[Card]:
+    """搜索无结果时的"你是不是要找"：按卡名编辑距离找相近的卡牌。
+
+    分面 / 谓词查询不做容错。同名卡只取卡池中最靠前的一张。
+
+    Returns:
+        至多 limit 张卡牌，按编辑距离升序
+    """
+    keywords = normalize_text(keyword).split()
+    if not keywords or _is_structured(keywords):
+        return []
+
+    results: list[Card] = []
+    seen_names: set[str] = set()
+    for term, _, positions in fuzzy_index.lookup(" ".join(keywords)):
+        card = cards[min(positions)]
+        if card.name in seen_names:
+            continue
+        seen_names.add(card.name)
+        results.append(card)
+        if len(results) >= limit:
+            break
+    return results
+
+
+# ============== Top-K 排序 ==============
+
+# 没有上界信息时的占位（永远不会提前终止）
+_NO_BOUND = 1 << 30
+
+# 单个关键词的分数上界：命中卡名候选时最高 100（完整匹配），否则最高 30（技能描述）
+_NAME_TIER_BOUND = 100
+_OTHER_TIER_BOUND = 30
+
+
+def _bucket_by_bound(
+    survivors: set[int],
+    keywords: list[str],
+    name_index: Optional[NgramIndex],
+    pinyin_hits: Optional[list[dict[int, int]]] = None,
+) -> list[tuple[int, list[int]]]:
+    """按分数上界把候选下标分桶，返回按上界降序排列的 [(上界, 升序下标列表)]。
+
+    上界 = 每个关键词在卡名候选（含拼音命中）中记 100、否则记 30 之和；
+    只用集合运算判断，不打分。
+    """
+    if name_index is None or not survivors:
+        return [(_NO_BOUND, sorted(survivors))]
+
+    name_sets = [name_index.candidates(keyword) or frozenset() for keyword in keywords]
+    if pinyin_hits is not None:
+        name_sets = [
+            name_set | hits.keys() if hits else name_set
+            for name_set, hits in zip(name_sets, pinyin_hits)
+        ]
+    if len(name_sets) == 1:
+        # 单关键词（最常见）：两个桶直接用集合运算切分
+        name_hits = survivors & name_sets[0]
+        return [
+            (_NAME_TIER_BOUND, sorted(name_hits)),
+            (_OTHER_TIER_BOUND, sorted(survivors - name_hits)),
+        ]
+
+    buckets: dict[int, list[int]] = {}
+    for pos in sorted(survivors):
+        bound = 0
+        for name_set in name_sets:
+            bound += _NAME_TIER_BOUND if pos in name_set else _OTHER_TIER_BOUND
+        bucket = buckets.get(bound)
+        if bucket is None:
+            buckets[bound] = [pos]
+        else:
+            bucket.append(pos)
+    return sorted(buckets.items(), reverse=True)
+
+
+def _rank_top_k(
+    buckets: list[tuple[int, Iterable[int]]],
+    cards: list[Card],
+    keywords: list[str],
+    class_filter_only: bool,
+    limit: int,
+    pinyin_hits: Optional[list[dict[int, int]]] = None,
+    relevance: Optional[list[dict[int, float]]] = None,
+) -> list[Card]:
+    """有界小顶堆取前 limit 名（分数降序，同分按技能层相关度、再按卡池顺序），插入时按 id 去重。
+
+    按上界从高到低、桶内按 (相关度上界降序, 下标升序) 处理；一旦 (上界, 相关度上界, -下标)
+    不优于堆顶，之后的任何卡都不可能挤进前 limit，直接结束。
+    relevance 为与 keywords 对齐的 [{下标: BM25 分}]；为 None 时相关度恒为 0。
+    """
+    if limit <= 0:
+        return []
+
+    # 堆元素 (分数, 相关度, -下标)：堆顶是当前最差的结果
+    heap: list[tuple[int, float, int]] = []
     seen_ids: set[str] = set()
-    unique_results: list[dict] = []
-    for card, score in results:
-        cid = card.get("id", "")
-        if cid not in seen_ids:
-            seen_ids.add(cid)
-            unique_results.append(card)
-            if len(unique_results) >= limit:
+    skill_hits: Optional[list[int]] = None
+    for bound, positions in buckets:
+        if relevance is not None:
+            ordered = _by_relevance_bound(positions, relevance)
+        else:
+            ordered = ((0.0, pos) for pos in positions)
+        for rel_bound, pos in ordered:
+            if len(heap) >= limit and (bound, rel_bound, -pos) <= heap[0]:
                 break
+            card = cards[pos]
+            if relevance is not None:
+                skill_hits = []
+            score = _calculate_score(
+                card, keywords, class_filter_only, pinyin_hits, pos, skill_hits
+            )
+            if score <= 0:
+                continue
+            rel = sum(relevance[i].get(pos, 0.0) for i in skill_hits) if skill_hits else 0.0
+            entry = (score, rel, -pos)
+            if len(heap) >= limit and entry <= heap[0]:
+                continue
+            cid = card.id
+            if cid in seen_ids:
+                continue
+            seen_ids.add(cid)
+            if len(heap) < limit:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heapreplace(heap, entry)
+        else:
+            continue
+        break
+
+    heap.sort(reverse=True)
+    return [cards[-neg_pos] for _, _, neg_pos in heap]
+
+
+def _by_relevance_bound(
+    positions: Iterable[int],
+    relevance: list[dict[int, float]],
+) -> Iterator[tuple[float, int]]:
+    """按 (相关度上界降序, 下标升序) 逐个产出 (上界, 下标)。
+
+    上界为全部关键词 BM25 分之和；用堆惰性出队，提前终止时不必排序整桶。
+    """
+    if len(relevance) == 1:
+        scores = relevance[0]
+        keyed = [(-scores.get(pos, 0.0), pos) for pos in positions]
+    else:
+        keyed = [(-sum(scores.get(pos, 0.0) for scores in relevance), pos) for pos in positions]
+    heapq.heapify(keyed)
+    while keyed:
+        neg_bound, pos = heapq.heappop(keyed)
+        yield -neg_bound, pos
+
+
+def _collect_candidates(
+    keywords: list[str],
+    index: NgramIndex,
+    mask: Optional[int] = None,
+    pinyin_hits: Optional[list[dict[int, int]]] = None,
+) -> set[int]:
+    """用 n-gram 倒排表求所有关键词候选集的交集，返回候选下标集合。
+
+    pinyin_hits 不为 None 时每个关键词的候选再并上其拼音命中；
+    mask 不为 None 时再与分面位图求交。
+    """
+    postings = []
+    for i, keyword in enumerate(keywords):
+        bucket = index.candidates(keyword)
+        if pinyin_hits is not None and pinyin_hits[i]:
+            bucket = (bucket or frozenset()) | pinyin_hits[i].keys()
+        if not bucket:
+            return set()
+        postings.append(bucket)
+
+    postings.sort(key=len)
+    survivors = set(postings[0])
+    for bucket in postings[1:]:
+        survivors &= bucket
+        if not survivors:
+            return survivors
+
+    if mask is not None:
+        survivors.intersection_update(iter_positions(mask))
+    return survivors
+
+
+def parse_facet_token(token: str) -> Optional[tuple[str, Hashable]]:
+    """把一个（已归一化的）查询词解析为 (分面, 取值)，不是分面词时返回 None。
+
+    支持：#职业（含别名）、随从/法术/护符/纹章、铜/银/金/虹、N费、卡包名、
+    种族名（与职业别名冲突时用 种族:精灵 显式指定）、kw:关键词。
+    """
+    name = token[1:] if token.startswith("#") else token
+    if not name:
+        return None
+
+    for prefix in _KEYWORD_PREFIXES:
+        if name.startswith(prefix):
+            keyword = name[len(prefix):]
+            return ("keyword", keyword) if keyword else None
+
+    for prefix in _TRIBE_PREFIXES:
+        if name.startswith(prefix):
+            tribe = _TRIBE_NAME_TO_CODE.get(name[len(prefix):])
+            return ("tribe", tribe) if tribe is not None else None
+
+    if name in CLASS_NAME_TO_CODE:
+        return ("class", CLASS_NAME_TO_CODE[name])
+    if name in _TYPE_NAME_TO_INT:
+        return ("type", _TYPE_NAME_TO_INT[name])
+    if name in _RARITY_NAME_TO_INT:
+        return ("rarity", _RARITY_NAME_TO_INT[name])
+    if name in _PACK_NAME_TO_SET_ID:
+        return ("set", _PACK_NAME_TO_SET_ID[name])
+    m = _COST_TOKEN_RE.match(name)
+    if m:
+        return ("cost", min(int(m.group(1)), COST_BUCKET_MAX))
+    if name in _TRIBE_NAME_TO_CODE:
+        return ("tribe", _TRIBE_NAME_TO_CODE[name])
+    return None
+
+
+def parse_stat_token(token: str) -> Optional[tuple[str, str, int]]:
+    """把 cost<=2 / 攻>=3 / life=5 这类词解析为 (列名, 比较符, 值)。"""
+    m = _STAT_TOKEN_RE.match(token.translate(_STAT_OP_FOLD))
+    if not m:
+        return None
+    return _STAT_ALIAS[m.group(1)], m.group(2), int(m.group(3))
+
+
+def parse_segment_token(token: str) -> Optional[tuple[str, str]]:
+    """把 ev:守护 这类词解析为 (技能段, 关键词)，不是限定字段词时返回 None。"""
+    prefix, sep, value = token.partition(":")
+    if not sep or not value:
+        return None
+    field = SEGMENT_ALIAS.get(prefix)
+    return (field, value) if field is not None else None
+
+
+def _is_structured(keywords: list[str]) -> bool:
+    """查询是否含分面 / 谓词 / 限定字段语法（# 开头、数值谓词或 ev:xxx）。"""
+    return any(
+        keyword.startswith(("#", *_KEYWORD_PREFIXES))
+        or parse_stat_token(keyword) is not None
+        or parse_segment_token(keyword) is not None
+        for keyword in keywords
+    )
+
+
+def _segment_mask(
+    field: str,
+    keyword: str,
+    index: NgramIndex,
+    cards: list[Card],
+) -> int:
+    """某技能段包含 keyword 的卡牌位图（候选取自主 n-gram 索引，再逐个确认段文字）。"""
+    mask = 0
+    for pos in index.candidates(keyword) or ():
+        if segment_contains(cards[pos].skill_segments, field, keyword):
+            mask |= 1 << pos
+    return mask
+
 
-    return unique_results
+def _resolve_filters(
+    keywords: list[str],
+    facets: FacetIndex,
+    stats: Optional[StatIndex],
+    index: Optional[NgramIndex] = None,
+    cards: Optional[list[Card]] = None,
+) -> tuple[int, list[str]]:
+    """把分面词、数值谓词和限定字段词合成一个位图，返回 (位图, 剩余的普通关键词)。
+
+    # 开头却无法识别的词、没有 n-gram 索引时的限定字段词视为无结果（位图为 0）。
+    关键词分面（kw:）与其他分面不同，多个取值之间取交集。
+    """
+    groups: dict[str, int] = {}
+    predicates: list[int] = []
+    text_keywords: list[str] = []
+    for keyword in keywords:
+        scoped = parse_segment_token(keyword)
+        if scoped is not None:
+            if index is None or cards is None:
+                return 0, []
+            predicates.append(_segment_mask(*scoped, index, cards))
+            continue
+
+        if stats is not None:
+            predicate = parse_stat_token(keyword)
+            if predicate is not None:
+                predicates.append(stats.mask(*predicate))
+                continue
+
+        parsed = parse_facet_token(keyword)
+        if parsed is None:
+            if keyword.startswith(("#", *_KEYWORD_PREFIXES)):
+                return 0, []
+            text_keywords.append(keyword)
+            continue
+        facet, value = parsed
+        if facet == "keyword":
+            predicates.append(facets.mask(facet, value))
+            continue
+        groups[facet] = groups.get(facet, 0) | facets.mask(facet, value)
+
+    # 从最稀疏的位图开始求交，尽早变 0
+    mask = facets.all_mask
+    for bitmap in sorted([*groups.values(), *predicates], key=popcount):
+        mask &= bitmap
+        if not mask:
+            break
+    return mask, text_keywords
 
 
 def _calculate_score(
-    card: dict,
+    card: Card,
     keywords: list[str],
     class_filter_only: bool,
+    pinyin_hits: Optional[list[dict[int, int]]] = None,
+    pos: int = -1,
+    skill_hits: Optional[list[int]] = None,
 ) -> int:
-    """计算单张卡牌与关键词的匹配分数。"""
+    """计算单张卡牌与关键词的匹配分数。
+
+    pinyin_hits 为与 keywords 对齐的拼音命中表，pos 为卡牌下标；
+    关键词的得分取文本分与拼音分中较高的一个。
+    skill_hits 不为 None 时追加得分落在技能层（30 / 28）的关键词序号，供相关度排序。
+    """
     if class_filter_only:
         return _calculate_class_score(card, keywords)
 
     total_score = 0
-    name = (card.get("name") or "").lower()
-    name_ja = (card.get("name_ja") or "").lower()
-    skill_text = (card.get("skill_text") or "").lower()
-    skill_text_ja = (card.get("skill_text_ja") or "").lower()
-    type_name = (card.get("type_name") or "").lower()
-
-    for keyword in keywords:
+    doc = card.search_doc
+    name = doc.name
+    name_ja = doc.name_ja
+    skill_text = doc.skill_text
+    skill_text_ja = doc.skill_text_ja
+    type_name = doc.type_name
+
+    for i, keyword in enumerate(keywords):
         keyword_score = 0
 
         # 1. 中文名完全相等
@@ -102,92 +549,33 @@ def _calculate_score(
         elif type_name and keyword in type_name:
             keyword_score = 10
 
+        # 9. 卡名拼音 / 首字母
+        if pinyin_hits is not None and keyword_score < 100:
+            keyword_score = max(keyword_score, pinyin_hits[i].get(pos, 0))
+
         if keyword_score == 0:
             return 0
+        if skill_hits is not None and keyword_score in (30, 28):
+            skill_hits.append(i)
 
         total_score += keyword_score
 
     return total_score
 
 
-def _calculate_class_score(card: dict, keywords: list[str]) -> int:
+def _calculate_class_score(card: Card, keywords: list[str]) -> int:
     """计算职业过滤的匹配分数。"""
-    class_name = card.get("class_name", "")
+    class_name = card.class_name
 
     for keyword in keywords:
         # 用别名表查 code
         target_code = CLASS_NAME_TO_CODE.get(keyword)
         if target_code is not None:
-            if card.get("class_code") == target_code:
+            if card.class_code == target_code:
                 return 100
 
-        # 直接匹配 class_name
+        # 直接匹配 class_name（英文别名已包含在 CLASS_NAME_TO_CODE 中）
         if keyword == class_name:
             return 100
 
-        # 兼容：英文职业名
-        en_map = {
-            "neutral": "中立",
-            "forest": "精灵",
-            "elf": "精灵",
-            "sword": "皇家",
-            "royal": "皇家",
-            "rune": "法师",
-            "witch": "法师",
-            "dragon": "龙族",
-            "abyss": "梦魇",
-            "shadow": "梦魇",
-            "vampire": "梦魇",
-            "haven": "主教",
-            "bishop": "主教",
-            "portal": "超越者",
-            "nemesis": "超越者",
-        }
-        if en_map.get(keyword.lower()) == class_name:
-            return 100
-
     return 0
-
-
-def fuzzy_match_score(keyword: str, text: str) -> int:
-    """计算两个字符串的模糊匹配分数（编辑距离 + 前缀 + 包含）。"""
-    if not keyword or not text:
-        return 0
-
-    keyword = keyword.lower()
-    text = text.lower()
-
-    if keyword == text:
-        return 100
-    if text.startswith(keyword):
-        return 80 + (len(keyword) / len(text)) * 10
-    if keyword in text:
-        return 60 + (len(keyword) / len(text)) * 10
-
-    distance = _levenshtein_distance(keyword, text)
-    max_len = max(len(keyword), len(text))
-    similarity = 1 - (distance / max_len)
-
-    if similarity > 0.5:
-        return int(similarity * 40)
-    return 0
-
-
-def _levenshtein_distance(s1: str, s2: str) -> int:
-    """编辑距离。"""
-    if len(s1) < len(s2):
-        return _levenshtein_distance(s2, s1)
-    if len(s2) == 0:
-        return len(s1)
-
-    previous_row = list(range(len(s2) + 1))
-    for i, c1 in enumerate(s1):
-        current_row = [i + 1]
-        for j, c2 in enumerate(s2):
-            insertions = previous_row[j + 1] + 1
-            deletions = current_row[j] + 1
-            substitutions = current_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
-        previous_row = current_row
-
-    return previous_row[-1]
@@ -0,0 +1,32 @@
+# plugins/sv_card/_segments.py
+"""影之诗超凡世界 技能分段（base / ev / sev / choice 限定字段搜索）。
+
+设计说明：
+    - 加载时 _markup.parse_skill_segments 把中日文技能文本拆成基础 / 进化 / 超进化 /
+      选项块 / 关键词，归一化后存进 Card.skill_segments（中日文同一段用换行拼接）
+    - 各段文字都是技能文本去标签后的片段，已被主 n-gram 索引（search_doc 的技能文本）覆盖，
+      不再为每一段另建索引（否则每个 gram 的 posting 要按段重复存几份）
+    - 查询 ev:守护 时：取主索引里"守护"的候选，再对候选卡的 evolve 段做一次子串确认，
+      查询期没有任何正则
+"""
+
+# 查询前缀 → 可检索的段（SkillSegments 字段名）
+SEGMENT_ALIAS = {
+    "base": "base", "基础": "base",
+    "ev": "evolve", "evo": "evolve", "进化": "evolve",
+    "sev": "super_evolve", "超进化": "super_evolve",
+    "choice": "choices", "选项": "choices", "抉择": "choices",
+}
+
+
+def segment_texts(segments, field: str) -> tuple[str, ...]:
+    """某张卡某一段的全部文字（choices 为多个选项块，其余为单段）。"""
+    value = getattr(segments, field)
+    if field == "choices":
+        return value
+    return (value,) if value else ()
+
+
+def segment_contains(segments, field: str, keyword: str) -> bool:
+    """某张卡某一段是否包含 keyword。"""
+    return any(keyword in text for text in segment_texts(segments, field))
@@ -0,0 +1,438 @@
+# plugins/sv_card/_similar.py
+"""影之诗超凡世界 相似卡牌推荐（加载时预计算的近邻表）。
+
+设计说明：
+    - 每张卡向量化为四块特征，相似度 = 各块相似度的加权和：
+        技能  基础 / 进化 / 超进化段的二字词项 + 游戏关键词，TF-IDF 后按行单位化，块内取余弦
+        职业  相同记 1
+        类型  相同记 1
+        数值  费用 / 攻击 / 生命按全卡池最大值缩放到 [0, 1]，记 1 - 平方距离 / 3
+    - 词表只保留至少两张卡共有、且不超过半数卡牌出现的词项（前者对相似度没有贡献，
+      后者近似停用词），超过 MAX_TERMS 时保留 df 最高的一批；技能向量按行稀疏存储（CSR）
+    - 候选：不与全卡池两两比较，每张卡只对两组候选精确打分：
+        锚点  idf 最高的 ANCHOR_TERMS 个词项到已有的倒排索引里取 posting（二字词项查
+              n-gram 索引，关键词查关键词分面位图），按共享锚点数保留前 CANDIDATE_LIMIT 张
+        同组  同职业同类型的卡里数值最接近的 STAT_CANDIDATES 张（没有技能文字的白板随从
+              只能靠这一组找近邻）
+      每张卡的候选数有上限，构建代价随卡池规模近似线性增长。候选之外的卡不会出现在近邻里，
+      与全量两两比较的结果相比，735 张卡时约 96% 的近邻相同，10000 张卡时约 92%
+    - 打分按行分块用 NumPy 向量化：块内各行的技能向量展开成稠密缓冲，候选的稀疏向量按项取值求点积
+    - 每张卡只留前 SIMILAR_SIZE 个近邻（相似度降序，同分按卡池下标升序），
+      下标和分数各存一个矩阵（不足处下标填 -1、分数填 -inf）
+    - 查询 /sv like <卡牌> 或单卡详情附带推荐时，只读矩阵的一行，没有任何计算
+    - 同名卡（自身、异画 / 再录）不互相推荐
+    - 增量刷新：词表、idf、数值缩放沿用全量构建时的值（同 _bm25.py 沿用 avgdl），
+      只重算变化的卡、以及近邻里含有变化卡的行；其余行只在变化卡的候选范围内检查
+      变化卡能否挤进前 SIMILAR_SIZE。候选关系不对称，补丁结果与整表重建可能有个别出入
+"""
+
+import math
+from collections import Counter
+from typing import Iterable, NamedTuple, Optional
+
+import numpy as np
+
+from ._facets import iter_positions
+
+# 每张卡保留的近邻数
+SIMILAR_SIZE = 10
+
+# 词表宽度上限（也是分块打分时稠密缓冲的宽度）
+MAX_TERMS = 4096
+
+# 词项最多出现在多大比例的卡牌里
+MAX_DF_RATIO = 0.5
+
+# 游戏关键词相对普通词项的权重
+KEYWORD_BOOST = 2.0
+
+# 各特征块的权重（和为 1）
+TEXT_WEIGHT = 0.6
+CLASS_WEIGHT = 0.15
+TYPE_WEIGHT = 0.15
+STAT_WEIGHT = 0.1
+
+# 每张卡取多少个 idf 最高的词项去倒排索引里找候选
+ANCHOR_TERMS = 8
+
+# 按共享锚点数保留的候选上限
+CANDIDATE_LIMIT = 64
+
+# 同职业同类型的卡里，按数值距离再取的候选数
+STAT_CANDIDATES = 64
+
+# 分块打分时每块的行数
+ROW_BLOCK = 256
+
+# 参与向量化的技能段（SkillSegments 字段名；choices 的文字已包含在这些段中）
+_DOC_FIELDS = ("base", "evolve", "super_evolve")
+
+# 关键词词项前缀（与二字词项区分开）
+_KEYWORD_PREFIX = "\0"
+
+
+def _skill_terms(segments) -> Counter:
+    """一张卡的技能词项及词频：二字词项 + 带前缀的游戏关键词。"""
+    counts: Counter = Counter()
+    if segments is None:
+        return counts
+    for field in _DOC_FIELDS:
+        for run in getattr(segments, field).split():
+            counts.update(run[i:i + 2] for i in range(len(run) - 1))
+    counts.update(_KEYWORD_PREFIX + keyword for keyword in segments.keywords)
+    return counts
+
+
+def _vocabulary(doc_terms: list[Counter]) -> tuple[list[str], np.ndarray]:
+    """词表（列号 → 词项）及各列的 idf（关键词已乘 KEYWORD_BOOST）。"""
+    df: Counter = Counter()
+    for counts in doc_terms:
+        df.update(counts.keys())
+
+    doc_count = len(doc_terms)
+    max_df = max(2, int(doc_count * MAX_DF_RATIO))
+    terms = [term for term, n in df.items() if 2 <= n <= max_df]
+    if len(terms) > MAX_TERMS:
+        terms.sort(key=lambda term: (-df[term], term))
+        del terms[MAX_TERMS:]
+    idf = np.array(
+        [
+            math.log(doc_count / df[term]) * (KEYWORD_BOOST if term.startswith(_KEYWORD_PREFIX) else 1)
+            for term in terms
+        ],
+        dtype=np.float32,
+    )
+    return terms, idf
+
+
+def _vectorize(
+    doc_terms: list[Counter], columns: dict[str, int], idf: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """若干张卡的 TF-IDF 稀疏向量（各行非零项数, 列号, 权重），已按行单位化；词表外的词项忽略。"""
+    get = columns.get
+    lengths = []
+    cols: list[int] = []
+    tfs: list[int] = []
+    for counts in doc_terms:
+        before = len(cols)
+        for term, tf in counts.items():
+            col = get(term)
+            if col is not None:
+                cols.append(col)
+                tfs.append(tf)
+        lengths.append(len(cols) - before)
+
+    lengths = np.array(lengths, dtype=np.int64)
+    indices = np.array(cols, dtype=np.int32)
+    data = (1 + np.log(np.array(tfs, dtype=np.float32))) * idf[indices]
+    row_of = np.repeat(np.arange(len(lengths)), lengths)
+    norms = np.sqrt(np.bincount(row_of, weights=data * data, minlength=len(lengths)))
+    data /= norms[row_of].astype(np.float32)
+    return lengths, indices, data
+
+
+def _stat_values(cards: list) -> np.ndarray:
+    """费用 / 攻击 / 生命原始值（卡牌数 × 3）。"""
+    return np.array(
+        [(card.cost or 0, card.atk or 0, card.life or 0) for card in cards],
+        dtype=np.float32,
+    ).reshape(len(cards), 3)
+
+
+def _codes(values: Iterable) -> np.ndarray:
+    """把枚举值映射成整数编码（相同值同码）。"""
+    table: dict = {}
+    return np.array([table.setdefault(value, len(table)) for value in values], dtype=np.int64)
+
+
+def _ragged_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """依次拼接各区间 [starts[i], starts[i] + lengths[i]) 的全部下标。"""
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(len(offsets))
+
+
+def _rank_in_rows(rows: np.ndarray) -> np.ndarray:
+    """rows 已按行排好序时，各元素在本行内的名次（从 0 开始）。"""
+    if not len(rows):
+        return rows
+    firsts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    return np.arange(len(rows)) - np.repeat(firsts, np.diff(np.r_[firsts, len(rows)]))
+
+
+class _Features(NamedTuple):
+    """打分用的逐卡特征列（与卡池下标对齐）。"""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    classes: np.ndarray
+    types: np.ndarray
+    names: np.ndarray
+    stats: np.ndarray
+
+
+def _score_pairs(features: _Features, width: int, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """(rows[k], cols[k]) 各对卡牌的相似度；同名卡记 -inf。
+
+    rows 中不同的行数决定稠密缓冲的高度，调用方按 ROW_BLOCK 分块。
+    """
+    indptr, indices, data = features.indptr, features.indices, features.data
+
+    # 各行的技能向量展开成稠密缓冲（按行拉平）
+    block_rows, local = np.unique(rows, return_inverse=True)
+    row_len = indptr[block_rows + 1] - indptr[block_rows]
+    k = _ragged_ranges(indptr[block_rows], row_len)
+    dense = np.zeros(len(block_rows) * width, dtype=np.float32)
+    dense[np.repeat(np.arange(len(block_rows)) * width, row_len) + indices[k]] = data[k]
+
+    # 候选的稀疏向量逐项取值、按对求和
+    col_len = indptr[cols + 1] - indptr[cols]
+    k = _ragged_ranges(indptr[cols], col_len)
+    products = dense.take(np.repeat(local * width, col_len) + indices.take(k))
+    products *= data.take(k)
+    sim = np.zeros(len(cols), dtype=np.float64)
+    nonempty = col_len > 0
+    if len(products):
+        # reduceat 按各对的起点分段求和（空段会取到下一段的首项，单独置零）
+        starts = np.cumsum(col_len) - col_len
+        sim[nonempty] = np.add.reduceat(products, starts[nonempty])
+    sim *= TEXT_WEIGHT
+
+    sim += CLASS_WEIGHT * (features.classes[rows] == features.classes[cols])
+    sim += TYPE_WEIGHT * (features.types[rows] == features.types[cols])
+    diff = features.stats[rows] - features.stats[cols]
+    sim += STAT_WEIGHT * (1 - (diff * diff).sum(axis=1) / diff.shape[1])
+    sim[features.names[rows] == features.names[cols]] = -np.inf
+    return sim
+
+
+class _CandidateSource:
+    """取候选近邻：锚点词项查已有的倒排索引，另加同职业同类型里数值最接近的卡。"""
+
+    def __init__(self, terms: list[str], idf: np.ndarray, features: _Features, ngram_index, facets):
+        self._terms = terms
+        self._features = features
+        self._ngram_index = ngram_index
+        self._facets = facets
+        self._doc_count = len(features.classes)
+        # 列号 → posting 下标数组（同一次构建内复用）
+        self._postings: dict[int, np.ndarray] = {}
+
+        # 各行的锚点：行内按 idf 降序取前 ANCHOR_TERMS 个词项
+        indptr, indices = features.indptr, features.indices
+        row_of = np.repeat(np.arange(self._doc_count), np.diff(indptr))
+        order = np.lexsort((-idf[indices], row_of))
+        keep = _rank_in_rows(row_of[order]) < ANCHOR_TERMS
+        self._anchor_cols = indices[order[keep]]
+        self._anchor_ptr = np.concatenate(
+            ([0], np.cumsum(np.bincount(row_of[order[keep]], minlength=self._doc_count)))
+        )
+
+        # 职业 × 类型分组：各卡所在组号，以及各组的下标数组
+        key = features.classes * (int(features.types.max(initial=0)) + 1) + features.types
+        order = np.argsort(key, kind="stable")
+        self._groups = np.split(order, np.flatnonzero(np.diff(key[order])) + 1)
+        self._group_of = np.empty(self._doc_count, dtype=np.int64)
+        for number, members in enumerate(self._groups):
+            self._group_of[members] = number
+
+    def _posting(self, col: int) -> np.ndarray:
+        posting = self._postings.get(col)
+        if posting is None:
+            term = self._terms[col]
+            if term.startswith(_KEYWORD_PREFIX):
+                positions = iter_positions(self._facets.mask("keyword", term[1:]))
+                posting = np.fromiter(positions, dtype=np.int64)
+            else:
+                posting = np.asarray(self._ngram_index.positions(term), dtype=np.int64)
+            self._postings[col] = posting
+        return posting
+
+    def pairs(self, block: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """block 中各行的候选近邻，展开成 (行, 候选) 两个数组（按行、候选升序，不含自身）。"""
+        doc_count = self._doc_count
+        parts = []
+
+        # 锚点：按共享锚点数取前 CANDIDATE_LIMIT 张，同数按下标
+        ptr = self._anchor_ptr
+        counts = ptr[block + 1] - ptr[block]
+        anchor_cols = self._anchor_cols[_ragged_ranges(ptr[block], counts)].tolist()
+        if anchor_cols:
+            postings = [self._posting(col) for col in anchor_cols]
+            rows = np.repeat(np.repeat(block, counts), [len(p) for p in postings])
+            keys, shared = np.unique(rows * doc_count + np.concatenate(postings), return_counts=True)
+            order = np.lexsort((keys, -shared, keys // doc_count))
+            keys = keys[order]
+            parts.append(keys[_rank_in_rows(keys // doc_count) < CANDIDATE_LIMIT])
+
+        # 同组：数值距离最近的 STAT_CANDIDATES 张
+        stats = self._features.stats
+        block_groups = self._group_of[block]
+        for number in np.unique(block_groups).tolist():
+            members = block[block_groups == number]
+            group = self._groups[number]
+            if len(group) > STAT_CANDIDATES + 1:
+                diff = stats[members][:, None, :] - stats[group][None, :, :]
+                dist = (diff * diff).sum(axis=2)
+                nearest = np.argpartition(dist, STAT_CANDIDATES, axis=1)[:, :STAT_CANDIDATES + 1]
+                parts.append((members[:, None] * doc_count + group[nearest]).ravel())
+            else:
+                parts.append((members[:, None] * doc_count + group[None, :]).ravel())
+
+        keys = np.unique(np.concatenate(parts))
+        rows, cols = np.divmod(keys, doc_count)
+        keep = rows != cols
+        return rows[keep], cols[keep]
+
+
+class SimilarTable:
+    """每张卡的前 SIMILAR_SIZE 个相似卡牌下标（按相似度降序，-1 表示空位）。"""
+
+    def __init__(self, terms: list[str], idf: np.ndarray, stat_scale: np.ndarray):
+        # 全量构建时的词表、idf 与数值缩放（补丁沿用）
+        self._terms = terms
+        self._idf = idf
+        self._stat_scale = stat_scale
+        # 技能向量（CSR：行指针 / 列号 / 权重）
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._data = np.zeros(0, dtype=np.float32)
+        # 近邻下标与分数
+        self._neighbours = np.full((0, SIMILAR_SIZE), -1, dtype=np.int32)
+        self._scores = np.full((0, SIMILAR_SIZE), -np.inf, dtype=np.float32)
+
+    def neighbours(self, pos: int, limit: Optional[int] = None) -> list[int]:
+        """下标 pos 的相似卡牌下标（按相似度降序）。"""
+        if not 0 <= pos < len(self._neighbours):
+            return []
+        row = self._neighbours[pos, :limit]
+        return [int(p) for p in row if p >= 0]
+
+    def __len__(self) -> int:
+        return len(self._neighbours)
+
+    def _features(self, cards: list) -> _Features:
+        stats = _stat_values(cards)
+        scale = self._stat_scale
+        np.divide(stats, scale, out=stats, where=scale > 0)
+        return _Features(
+            self._indptr,
+            self._indices,
+            self._data,
+            _codes(card.class_code for card in cards),
+            _codes(card.type for card in cards),
+            _codes(card.name for card in cards),
+            stats,
+        )
+
+    def _fill_rows(self, positions: np.ndarray, cards: list, ngram_index, facets) -> tuple:
+        """重算若干行的近邻（按 ROW_BLOCK 分块打分），返回本次用到的 (特征列, 候选来源)。"""
+        features = self._features(cards)
+        source = _CandidateSource(self._terms, self._idf, features, ngram_index, facets)
+        width = len(self._terms)
+        neighbours, scores = self._neighbours, self._scores
+        neighbours[positions] = -1
+        scores[positions] = -np.inf
+        for start in range(0, len(positions), ROW_BLOCK):
+            rows, cols = source.pairs(positions[start:start + ROW_BLOCK])
+            sims = _score_pairs(features, width, rows, cols)
+
+            # 行内按相似度降序、同分按下标升序，各取前 SIMILAR_SIZE
+            keep = np.isfinite(sims)
+            rows, cols, sims = rows[keep], cols[keep], sims[keep]
+            order = np.lexsort((cols, -sims, rows))
+            rows, cols, sims = rows[order], cols[order], sims[order]
+            rank = _rank_in_rows(rows)
+            keep = rank < SIMILAR_SIZE
+            neighbours[rows[keep], rank[keep]] = cols[keep]
+            scores[rows[keep], rank[keep]] = sims[keep]
+        return features, source
+
+    # ---------- 增量刷新 ----------
+
+    def copy(self) -> "SimilarTable":
+        """浅拷贝：共享词表与各数组，之后 patch() 只替换数组（不原地修改）。"""
+        clone = SimilarTable(self._terms, self._idf, self._stat_scale)
+        clone._indptr, clone._indices, clone._data = self._indptr, self._indices, self._data
+        clone._neighbours, clone._scores = self._neighbours, self._scores
+        return clone
+
+    def patch(self, cards: list, changed: list[int], ngram_index, facets):
+        """卡池中 changed 这些下标的卡牌被修改或追加后，更新近邻表。
+
+        Args:
+            cards: 新一代卡池（旧卡下标不变，新增的卡在末尾）
+            changed: 修改或追加的卡牌下标
+            ngram_index: 与 cards 对应的 n-gram 索引（取候选用）
+            facets: 与 cards 对应的分面位图（取候选用）
+        """
+        if not changed:
+            return
+        old_count = len(self._neighbours)
+        doc_count = len(cards)
+        changed = np.unique(np.array(changed, dtype=np.int64))
+
+        # 技能向量：变化的行重新向量化，其余行原样拼接
+        columns = {term: col for col, term in enumerate(self._terms)}
+        new_len, new_indices, new_data = _vectorize(
+            [_skill_terms(cards[pos].skill_segments) for pos in changed.tolist()], columns, self._idf
+        )
+        lengths = np.zeros(doc_count, dtype=np.int64)
+        lengths[:old_count] = np.diff(self._indptr)
+        lengths[changed] = new_len
+        indptr = np.concatenate(([0], np.cumsum(lengths)))
+        indices = np.empty(indptr[-1], dtype=np.int32)
+        data = np.empty(indptr[-1], dtype=np.float32)
+        kept = np.setdiff1d(np.arange(old_count), changed)
+        src = _ragged_ranges(self._indptr[kept], lengths[kept])
+        dst = _ragged_ranges(indptr[kept], lengths[kept])
+        indices[dst], data[dst] = self._indices[src], self._data[src]
+        dst = _ragged_ranges(indptr[changed], new_len)
+        indices[dst], data[dst] = new_indices, new_data
+        self._indptr, self._indices, self._data = indptr, indices, data
+
+        neighbours = np.full((doc_count, SIMILAR_SIZE), -1, dtype=np.int32)
+        scores = np.full((doc_count, SIMILAR_SIZE), -np.inf, dtype=np.float32)
+        neighbours[:old_count] = self._neighbours
+        scores[:old_count] = self._scores
+        self._neighbours, self._scores = neighbours, scores
+
+        # 变化的卡自身，以及近邻里含有变化卡的行：整行重算
+        stale = np.zeros(doc_count, dtype=bool)
+        stale[changed] = True
+        stale[:old_count] |= np.isin(neighbours[:old_count], changed).any(axis=1)
+        features, source = self._fill_rows(np.flatnonzero(stale), cards, ngram_index, facets)
+
+        # 其余行：变化的卡比该行现有的末位更相似时插进去（相似度对称，按变化卡的候选算）
+        rows, others = source.pairs(changed)
+        keep = ~stale[others]
+        rows, others = rows[keep], others[keep]
+        sims = _score_pairs(features, len(self._terms), rows, others)
+        for pos, other, sim in zip(rows.tolist(), others.tolist(), sims.tolist()):
+            last_score, last_pos = float(scores[other, -1]), int(neighbours[other, -1])
+            if not (sim > last_score or (sim == last_score and 0 <= pos < last_pos)):
+                continue
+            row = [(-float(s), int(p)) for p, s in zip(neighbours[other], scores[other]) if p >= 0]
+            row.append((-sim, pos))
+            row.sort()
+            del row[SIMILAR_SIZE:]
+            neighbours[other, :len(row)] = [p for _, p in row]
+            scores[other, :len(row)] = [-s for s, _ in row]
+
+
+def build_similar_table(cards: list, ngram_index, facets) -> SimilarTable:
+    """为整个卡池计算近邻表（候选取自 ngram_index 与 facets，须与 cards 对应）。"""
+    doc_terms = [_skill_terms(card.skill_segments) for card in cards]
+    terms, idf = _vocabulary(doc_terms)
+    table = SimilarTable(terms, idf, _stat_values(cards).max(axis=0, initial=0))
+    lengths, table._indices, table._data = _vectorize(
+        doc_terms, {term: col for col, term in enumerate(terms)}, idf
+    )
+    table._indptr = np.concatenate(([0], np.cumsum(lengths)))
+
+    doc_count = len(cards)
+    table._neighbours = np.full((doc_count, SIMILAR_SIZE), -1, dtype=np.int32)
+    table._scores = np.full((doc_count, SIMILAR_SIZE), -np.inf, dtype=np.float32)
+    if doc_count > 1:
+        table._fill_rows(np.arange(doc_count), cards, ngram_index, facets)
+    return table
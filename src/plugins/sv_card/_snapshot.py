@@ -0,0 +1,85 @@
+# plugins/sv_card/_snapshot.py
+"""影之诗超凡世界 卡池二进制快照。
+
+设计说明：
+    - 首次加载完整解析 JSON 并建好索引后，把"归一化卡牌 + 全部索引"pickle 到快照文件
+    - 快照文件由两段 pickle 组成：先是很小的头部（格式版本 + 源文件指纹），再是数据本体；
+      校验头部不需要反序列化整个卡池
+    - 源文件指纹 = (大小, mtime_ns, sha256)，任一不符即视为过期，回退到完整解析
+    - 写入先落临时文件再 os.replace，进程中途被杀也不会留下半个快照
+    - 反序列化期间暂停循环 GC：一次创建几十万个对象会反复触发分代回收，
+      735 张卡时读取耗时约为暂停后的 3 倍
+    - 位图 / 有序数组类索引对象很少，读取不到 1 ms，比重建（约 20 ms）快，照常写入；
+      主要开销是 n-gram 索引每个 gram 一个数组，由 NgramIndex.__getstate__ 打包成连续数组
+    - 本模块只做同步 IO，由 CardCache 放到线程池中调用
+"""
+
+import gc
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+# 快照格式版本：Card / 索引结构变化时递增，旧快照自动失效
+SNAPSHOT_VERSION = 22
+
+
+class FileFingerprint(NamedTuple):
+    """源文件指纹。"""
+
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+def file_fingerprint(path: Path) -> FileFingerprint:
+    """计算源文件指纹（会完整读取一次文件做哈希）。"""
+    stat = path.stat()
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return FileFingerprint(stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+
+
+def load_snapshot(path: Path, fingerprint: FileFingerprint) -> Optional[Any]:
+    """读取与 fingerprint 匹配的快照数据。
+
+    Returns:
+        快照数据本体；快照不存在、版本不符、指纹不符或损坏时返回 None
+    """
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            if header != (SNAPSHOT_VERSION, tuple(fingerprint)):
+                return None
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                return pickle.load(f)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # 快照损坏或类定义已变化：当作过期处理
+        return None
+
+
+def save_snapshot(path: Path, fingerprint: FileFingerprint, payload: Any):
+    """原子写入快照。"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                (SNAPSHOT_VERSION, tuple(fingerprint)), f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
@@ -0,0 +1,6 @@
+# tests/conftest.py
+"""测试公共配置：插件包导入时会注册 matcher，需要先初始化 NoneBot（不启动驱动）。"""
+
+import nonebot
+
+nonebot.init(driver="~none")
@@ -0,0 +1,71 @@
+# tests/test_sv_card_bm25.py
+"""sv_card 技能文本 BM25：词项统计与技能层同分排序。"""
+
+import pytest
+
+from src.plugins.sv_card._bm25 import SkillBM25, query_terms
+from src.plugins.sv_card._cache import (
+    CHS_CARDS_FILE,
+    _build_indexes,
+    _parse_cards,
+    _read_chs_file,
+)
+from src.plugins.sv_card._markup import EMPTY_SEGMENTS
+from src.plugins.sv_card._searcher import search_cards
+
+
+def _bm25(*texts: str) -> SkillBM25:
+    index = SkillBM25()
+    for pos, text in enumerate(texts):
+        index.add(pos, EMPTY_SEGMENTS._replace(base=text))
+    index.finish()
+    return index
+
+
+def test_query_terms():
+    assert query_terms("抽") == ["抽"]
+    assert query_terms("抽取抽取") == ["抽取", "取抽"]
+    assert query_terms("") == []
+
+
+def test_term_frequency_and_length():
+    index = _bm25("抽取 抽取", "抽取一张卡并造成伤害", "造成伤害", "回复生命")
+    scores = index.keyword_scores("抽取")
+    # 出现两次的短文档高于出现一次的长文档；不含词项的卡不出现
+    assert scores.keys() == {0, 1}
+    assert scores[0] > scores[1] > 0
+
+
+def test_rare_terms_weigh_more():
+    index = _bm25("造成伤害 回复", "造成伤害", "造成伤害", "回复生命")
+    scores = index.keyword_scores("伤害")
+    rare = index.keyword_scores("生命")
+    assert rare[3] > scores[1]
+
+
+@pytest.fixture(scope="module")
+def data() -> dict:
+    return _build_indexes(*_parse_cards(_read_chs_file(CHS_CARDS_FILE)))
+
+
+@pytest.mark.parametrize("query", ["抽取", "伤害", "守护"])
+def test_skill_tier_is_ordered_by_bm25(data, query):
+    results = search_cards(
+        query,
+        data["cards"],
+        limit=10000,
+        index=data["ngram_index"],
+        name_index=data["name_index"],
+        skill_bm25=data["skill_bm25"],
+    )
+    scores = data["skill_bm25"].keyword_scores(query)
+    positions = {card.id: pos for pos, card in enumerate(data["cards"])}
+    # 只看技能层（卡名不含关键词、中文技能文本含关键词）
+    tier = [
+        positions[card.id] for card in results
+        if query not in card.search_doc.name and query in card.search_doc.skill_text
+    ]
+    assert len(tier) > 10
+    keys = [(-scores.get(pos, 0.0), pos) for pos in tier]
+    # BM25 降序，同分按卡池顺序
+    assert keys == sorted(keys)
@@ -0,0 +1,39 @@
+# tests/test_sv_card_cursor.py
+"""sv_card /sv 分页游标：切页、TTL、LRU。"""
+
+from src.plugins.sv_card._cursor import CursorCache, SearchCursor
+
+IDS = tuple(str(i) for i in range(23))
+
+
+def test_pages():
+    cursor = SearchCursor("q", IDS, 1)
+    assert cursor.page_count == 3
+    assert cursor.page_ids(1) == IDS[:10]
+    assert cursor.page_ids(3) == IDS[20:]
+    assert SearchCursor("q", (), 1).page_count == 1
+
+
+def test_ttl_counts_from_last_access():
+    now = [0.0]
+    cache = CursorCache(ttl=10, clock=lambda: now[0])
+    cache.put("s", SearchCursor("q", IDS, 1))
+    now[0] = 8
+    assert cache.get("s") is not None
+    # 上次访问在 8 秒，到 16 秒仍未过期
+    now[0] = 16
+    assert cache.get("s") is not None
+    now[0] = 27
+    assert cache.get("s") is None
+    assert len(cache) == 0
+
+
+def test_lru_sessions():
+    cache = CursorCache(maxsize=2)
+    for session in ("a", "b"):
+        cache.put(session, SearchCursor(session, IDS, 1))
+    cache.get("a")
+    cache.put("c", SearchCursor("c", IDS, 1))
+    assert cache.get("b") is None
+    assert cache.get("a").query == "a"
+    assert cache.get("c").query == "c"
@@ -0,0 +1,36 @@
+# tests/test_sv_card_grid.py
+"""sv_card 多卡拼图：启动时的目录清理只删除本服务生成的文件。"""
+
+from src.plugins.sv_card._grid import CardGridComposer
+from src.plugins.sv_card._images import CardImageService
+
+
+def test_reset_dir_keeps_foreign_files(tmp_path):
+    root = tmp_path / "grids"
+    (root / "sub").mkdir(parents=True)
+    ours = [
+        root / f"{'a' * 40}.png",
+        root / f"{'0123456789' * 4}.webp",
+        root / f"{'b' * 40}.png.1234.tmp",
+    ]
+    foreign = [
+        root / "cards.json",
+        root / "notes.png",
+        root / f"{'C' * 40}.png",
+        root / f"{'d' * 40}.txt",
+        root / "sub" / f"{'e' * 40}.png",
+    ]
+    for path in ours + foreign:
+        path.write_bytes(b"x")
+
+    composer = CardGridComposer(root, CardImageService(tmp_path / "images", 1 << 20))
+    composer._reset_dir()
+
+    assert not any(path.exists() for path in ours)
+    assert all(path.exists() for path in foreign)
+
+
+def test_reset_dir_creates_missing_root(tmp_path):
+    root = tmp_path / "missing" / "grids"
+    CardGridComposer(root, CardImageService(tmp_path / "images", 1 << 20))._reset_dir()
+    assert root.is_dir()
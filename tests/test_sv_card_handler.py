@@ -0,0 +1,149 @@
+# tests/test_sv_card_handler.py
+"""sv_card /sv 命令分派与结果缓存（用真实卡池、假的 Bot / 事件，不发卡图）。"""
+
+import asyncio
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from src.plugins.sv_card import _handler
+from src.plugins.sv_card._cache import (
+    CHS_CARDS_FILE,
+    CardGeneration,
+    _build_indexes,
+    _parse_cards,
+    _read_chs_file,
+    card_cache,
+)
+from src.plugins.sv_card._cursor import CursorCache
+from src.plugins.sv_card._result_cache import result_cache
+
+
+class _Bot:
+    def __init__(self):
+        self.messages: list[str] = []
+
+    async def send(self, event, message):
+        self.messages.append(str(message))
+
+
+def _event(text: str):
+    return SimpleNamespace(
+        get_plaintext=lambda: f"/sv {text}", get_user_id=lambda: "10000", group_id=None
+    )
+
+
+async def _no_image(*args, **kwargs):
+    pass
+
+
+@pytest.fixture(scope="module")
+def generation() -> CardGeneration:
+    return CardGeneration(1, _build_indexes(*_parse_cards(_read_chs_file(CHS_CARDS_FILE))), None, None, None)
+
+
+@pytest.fixture
+def sv(generation, monkeypatch):
+    """执行一次 /sv <text>，返回机器人发出的消息。"""
+    monkeypatch.setattr(card_cache, "_generation", generation)
+    monkeypatch.setattr(_handler, "_send_card_grid", _no_image)
+    monkeypatch.setattr(_handler, "_send_card_image", _no_image)
+    result_cache.clear()
+
+    def run(text: str) -> list[str]:
+        bot = _Bot()
+        asyncio.run(_handler.handle_sv_command(bot, _event(text)))
+        return bot.messages
+
+    yield run
+    result_cache.clear()
+
+
+def test_boolean_operators_are_case_sensitive_in_cache(sv):
+    # 大写 OR 是布尔查询，小写 or 只是普通关键词：先后执行互不影响
+    for _ in range(2):
+        boolean = sv("守护 OR 突进")
+        plain = sv("守护 or 突进")
+        assert not boolean[0].startswith("❌")
+        assert plain[0].startswith("❌ 未找到")
+
+
+def test_repeated_query_is_served_from_cache(sv, generation, monkeypatch):
+    calls = []
+    search = _handler._search
+
+    def counting_search(query, gen):
+        calls.append(query)
+        return search(query, gen)
+
+    monkeypatch.setattr(_handler, "_search", counting_search)
+    first = sv("守护")
+    # 多余空白归一化后是同一个键
+    assert sv("  守护 ") == first
+    assert sv("#精灵 随从") == sv("#精灵  随从")
+    assert calls == ["守护", "#精灵 随从"]
+
+    # 换代后旧结果失效，重新搜索
+    monkeypatch.setattr(card_cache, "_generation", CardGeneration(2, generation.data, None, None, None))
+    assert sv("守护") == first
+    assert calls[-1] == "守护" and len(calls) == 3
+
+
+def _found(message: str) -> int:
+    """列表消息首行里的结果总数。"""
+    return int(re.search(r"找到 (\d+) 张", message).group(1))
+
+
+def test_id_prefix_browse(sv, generation):
+    expected = sorted(card.id for card in generation.cards if card.id.startswith("1001"))
+    assert [card.id for card in card_cache.get_cards_by_id_prefix("1001")] == expected
+    assert _found(sv("1001*")[0]) == len(expected)
+
+
+@pytest.mark.parametrize("query, prefix", [("set:3", "103"), ("set:3 精灵", "1031"), ("set:10003 #精灵", "1031")])
+def test_set_browse(sv, generation, query, prefix):
+    expected = [card for card in generation.cards if card.id.startswith(prefix)]
+    assert _found(sv(query)[0]) == len(expected)
+
+
+@pytest.mark.parametrize("query", ["set:3 随从", "set:3 守护"])
+def test_set_field_with_other_terms_is_a_search(sv, generation, query):
+    # 最后一个词不是职业：按布尔查询里的 set: 字段搜索，而不是报卡包浏览的用法错误
+    expected = _handler._search(query, generation)
+    assert expected and all(card.id[2] == "3" for card in expected)
+    assert _found(sv(query)[0]) == len(expected)
+
+
+def test_paging_uses_cursor(sv, generation, monkeypatch):
+    monkeypatch.setattr(_handler, "cursor_cache", CursorCache())
+    grids = []
+
+    async def record_grid(bot, event, card_ids, *args):
+        grids.append(card_ids)
+
+    monkeypatch.setattr(_handler, "_send_card_grid", record_grid)
+    ranked = [card.id for card in _handler._search("守护", generation)]
+    assert len(ranked) > 30
+    sv("守护")
+
+    # 翻页不再搜索
+    def no_search(*args):
+        raise AssertionError("paging must not search again")
+
+    monkeypatch.setattr(_handler, "_search", no_search)
+    sv("next")
+    sv("p3")
+    sv("prev")
+    assert grids == [tuple(ranked[i:i + 10]) for i in (0, 10, 20, 10)]
+    assert sv("p99")[0].startswith("❌")
+    assert len(grids) == 4
+
+
+def test_paging_without_cursor(sv, monkeypatch):
+    monkeypatch.setattr(_handler, "cursor_cache", CursorCache())
+    assert sv("next")[0].startswith("❌ 没有可以翻页")
+
+
+def test_unknown_set(sv):
+    assert sv("set:99")[0].startswith("❌ 用法")
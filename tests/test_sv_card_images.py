@@ -0,0 +1,181 @@
+# tests/test_sv_card_images.py
+"""sv_card 卡图服务：用本地 http.server 代替卡图站点。"""
+
+import asyncio
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from src.plugins.sv_card._images import CardImageService
+
+# 每个请求在服务端停留的时间（秒），让并发请求在服务端重叠
+SERVE_DELAY = 0.1
+
+
+def _image_bytes(card_id: str, fmt: str) -> bytes:
+    """按 card_id 生成颜色不同的纯色图（内容不同，摘要也不同）。"""
+    seed = sum(map(ord, card_id))
+    color = (seed * 37 % 256, seed * 91 % 256, seed * 53 % 256)
+    out = io.BytesIO()
+    Image.new("RGB", (40, 52), color).save(out, format=fmt)
+    return out.getvalue()
+
+
+class _CardSite:
+    """卡图站点替身：/<格式>/<card_id> 返回图片，card_id 以 404 开头时返回 404。"""
+
+    def __init__(self):
+        self.hits: dict[str, int] = {}
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with site._lock:
+                    site.hits[self.path] = site.hits.get(self.path, 0) + 1
+                    site.active += 1
+                    site.max_active = max(site.max_active, site.active)
+                try:
+                    time.sleep(SERVE_DELAY)
+                    _, fmt, card_id = self.path.split("/")
+                    if card_id.startswith("404"):
+                        self.send_error(404)
+                        return
+                    body = _image_bytes(card_id, fmt)
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with site._lock:
+                        site.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, fmt: str):
+        return lambda card_id, lang: f"http://127.0.0.1:{self.port}/{fmt}/{card_id}"
+
+    def reset(self):
+        self.hits.clear()
+        self.max_active = 0
+
+
+@pytest.fixture(scope="module")
+def site():
+    site = _CardSite()
+    yield site
+    site.server.shutdown()
+
+
+@pytest.fixture
+def make_service(site, tmp_path):
+    services = []
+
+    def make(fmt: str = "PNG", image_format: str = "png", **kwargs) -> CardImageService:
+        kwargs.setdefault("max_bytes", 1 << 20)
+        service = CardImageService(
+            tmp_path / "images",
+            image_format=image_format,
+            url_builder=site.url(fmt),
+            **kwargs,
+        )
+        services.append(service)
+        return service
+
+    site.reset()
+    yield make
+    for service in services:
+        service.close()
+
+
+def test_single_flight(site, make_service):
+    service = make_service()
+
+    async def main():
+        return await asyncio.gather(*(service.get_image("10001110") for _ in range(8)))
+
+    paths = asyncio.run(main())
+    assert site.hits == {"/PNG/10001110": 1}
+    assert len(set(paths)) == 1 and paths[0].is_file()
+
+
+def test_concurrency_limit(site, make_service):
+    service = make_service(concurrency=2)
+
+    async def main():
+        return await asyncio.gather(*(service.get_image(f"1000{i}110") for i in range(6)))
+
+    paths = asyncio.run(main())
+    assert all(path is not None for path in paths)
+    assert len(site.hits) == 6
+    assert site.max_active == 2
+
+
+def test_missing_image_is_remembered(site, make_service):
+    service = make_service()
+
+    async def main():
+        return [await service.get_image("40400000") for _ in range(3)]
+
+    assert asyncio.run(main()) == [None, None, None]
+    assert site.hits == {"/PNG/40400000": 1}
+    assert service.stats()["missing"] == 1
+
+
+def test_lru_eviction_by_bytes(site, make_service):
+    sizes = {card_id: len(_image_bytes(card_id, "PNG")) for card_id in ("1", "2", "3")}
+    # 能放下任意两张，放不下三张
+    service = make_service(max_bytes=sum(sizes.values()) - 1)
+
+    async def main():
+        first = await service.get_image("1")
+        second = await service.get_image("2")
+        # 访问 1 使其变为最近使用，淘汰的应是 2
+        assert await service.get_image("1") == first
+        await service.get_image("3")
+        return first, second
+
+    first, second = asyncio.run(main())
+    stats = service.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == sizes["1"] + sizes["3"] <= service.cache.max_bytes
+    assert first.is_file()
+    assert not second.is_file()
+    assert service.cache.lookup(service.cache_key("2")) is None
+
+
+def test_disk_hit_survives_restart(site, make_service):
+    async def fetch(service):
+        return await service.get_image("10001120")
+
+    path = asyncio.run(fetch(make_service()))
+    assert site.hits == {"/PNG/10001120": 1}
+
+    # 新实例从 index.json 恢复，直接返回本地文件，不再访问站点
+    restarted = make_service()
+    assert asyncio.run(fetch(restarted)) == path
+    assert site.hits == {"/PNG/10001120": 1}
+    assert restarted.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize(
+    "image_format, pil_format, suffix",
+    [("png", "PNG", ".png"), ("jpg", "JPEG", ".jpg"), ("webp", "WEBP", ".webp")],
+)
+def test_transcode_to_configured_format(site, make_service, image_format, pil_format, suffix):
+    service = make_service(fmt="WEBP", image_format=image_format)
+    path = asyncio.run(service.get_image("10001130"))
+    assert path.suffix == suffix
+    with Image.open(path) as img:
+        assert img.format == pil_format
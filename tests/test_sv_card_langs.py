@@ -0,0 +1,76 @@
+# tests/test_sv_card_langs.py
+"""sv_card 语言列：查询路由与后台预热。"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.plugins.sv_card._langs import LanguageStore, route_language
+
+
+@pytest.mark.parametrize(
+    "query, lang",
+    [("bqdzs", "en"), ("Fighter", "en"), ("파이터", "ko"), ("不屈的战士", None), ("ファイター", None)],
+)
+def test_route_language(query, lang):
+    assert route_language(query) == lang
+
+
+@pytest.fixture
+def generation():
+    cards = [SimpleNamespace(id="10001110"), SimpleNamespace(id="10001120")]
+    return SimpleNamespace(number=1, cards=cards)
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    source = tmp_path / "cards_en.json"
+    source.write_text(json.dumps({
+        "10001110": {"card_id": 10001110, "name": "Unbending Fighter", "skill_text": "Ward"},
+        "10001120": {"card_id": 10001120, "name": "Fairy Whisperer", "skill_text": "Fanfare"},
+    }), encoding="utf-8")
+
+    def make(default_lang: str = "en") -> LanguageStore:
+        return LanguageStore(
+            {"en": str(source)}, tmp_path / "langs", expire_hours=24, default_lang=default_lang
+        )
+
+    return make
+
+
+def test_warm_does_not_block(make_store, generation):
+    store = make_store()
+
+    async def main():
+        store.warm("en", generation)
+        # warm 只排进后台，返回时还没有加载好
+        assert store.stats() == {}
+        columns = await store.columns("en", generation)
+        return columns.search("fighter", 10)
+
+    assert asyncio.run(main()) == [0]
+    assert store.stats() == {"en": 2}
+
+
+def test_warm_default_language(make_store, generation):
+    async def warm(store):
+        store.warm_default(generation)
+        await asyncio.gather(*store._inflight.values())
+        return store.stats()
+
+    assert asyncio.run(warm(make_store("en"))) == {"en": 2}
+    # 主卡池已覆盖的默认语言不额外加载
+    assert asyncio.run(warm(make_store("chs"))) == {}
+
+
+def test_default_config_does_not_preload(generation):
+    store = LanguageStore.from_config()
+
+    async def main():
+        store.warm_default(generation)
+        return dict(store._inflight)
+
+    # 默认配置下启动不下载任何语言列，等到有人查询时再加载
+    assert asyncio.run(main()) == {}
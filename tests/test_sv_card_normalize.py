@@ -0,0 +1,20 @@
+# tests/test_sv_card_normalize.py
+"""sv_card 搜索文本归一化：引号折叠。"""
+
+import pytest
+
+from src.plugins.sv_card._normalize import normalize_text
+
+
+@pytest.mark.parametrize("text", ["「守护」", "『守护』", "“守护”", "‘守护’"])
+def test_quotes_fold_to_corner_brackets(text):
+    assert normalize_text(text) == "「守护」"
+
+
+@pytest.mark.parametrize("text", ["「", "』", "“"])
+def test_lone_quote_is_kept(text):
+    assert normalize_text(text) in ("「", "」")
+
+
+def test_tags_only_is_empty():
+    assert normalize_text("<color=red></color>") == ""
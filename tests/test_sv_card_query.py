@@ -0,0 +1,221 @@
+# tests/test_sv_card_query.py
+"""sv_card 布尔查询：语法（优先级、取反、短语、字段限定、错误）与执行结果。"""
+
+import re
+
+import pytest
+
+from src.plugins.sv_card._cache import (
+    CHS_CARDS_FILE,
+    _build_indexes,
+    _parse_cards,
+    _read_chs_file,
+)
+from src.plugins.sv_card._query import (
+    And,
+    Filter,
+    Not,
+    Or,
+    QuerySyntaxError,
+    Term,
+    boolean_search,
+    is_boolean_query,
+    parse_query,
+)
+from src.plugins.sv_card._searcher import search_cards
+
+# 取全部命中用的上限（大于卡池）
+ALL = 100000
+
+
+def _any(text: str) -> Term:
+    return Term("any", text)
+
+
+# ============== 语法 ==============
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        # NOT > AND > OR
+        ("a OR b c", Or((_any("a"), And((_any("b"), _any("c")))))),
+        ("a b OR c", Or((And((_any("a"), _any("b"))), _any("c")))),
+        ("(a OR b) c", And((Or((_any("a"), _any("b"))), _any("c")))),
+        ("a AND b", And((_any("a"), _any("b")))),
+        ("a & b | c", Or((And((_any("a"), _any("b"))), _any("c")))),
+        ("NOT a b", And((Not(_any("a")), _any("b")))),
+        ("NOT NOT a", Not(Not(_any("a")))),
+        ("a OR NOT b", Or((_any("a"), Not(_any("b"))))),
+        ("((a))", _any("a")),
+    ],
+)
+def test_precedence(query, expected):
+    assert parse_query(query) == expected
+
+
+def test_minus_negation():
+    assert is_boolean_query("守护 -中立")
+    assert parse_query("守护 -中立") == And((_any("守护"), Not(Filter("facet", ("class", "0")))))
+    assert parse_query("-突进") == Not(_any("突进"))
+
+
+@pytest.mark.parametrize("query", ["守护 -1", "-1", "守护 - 突进"])
+def test_minus_before_digit_or_space_is_not_negation(query):
+    # -1（数值）和孤立的 - 都是普通文本，不触发布尔查询
+    assert not is_boolean_query(query)
+    assert not any(isinstance(node, Not) for node in _walk(parse_query(query)))
+
+
+def test_minus_digit_inside_boolean_query():
+    assert parse_query("守护 -1 OR 突进") == Or((And((_any("守护"), _any("-1"))), _any("突进")))
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ('"抽取 2"', _any("抽取 2")),
+        ("“抽取 2”", _any("抽取 2")),
+        ("「不屈的战士」", _any("不屈的战士")),
+        ("『不屈的战士』", _any("不屈的战士")),
+        ('守护 "抽取 2"', And((_any("守护"), _any("抽取 2")))),
+    ],
+)
+def test_phrase(query, expected):
+    assert parse_query(query) == expected
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("name:不屈", Term("name", "不屈")),
+        ("名:不屈", Term("name", "不屈")),
+        ('name:"不屈 的"', Term("name", "不屈 的")),
+        ("skill:守护", Term("skill", "守护")),
+        ("技能：守护", Term("skill", "守护")),
+        ("class:精灵", Filter("facet", ("class", "1"))),
+        ("cost:3", Filter("facet", ("cost", 3))),
+        ("set:3", Filter("facet", ("set", 10003))),
+        ("set:10003", Filter("facet", ("set", 10003))),
+        ("kw:守护", Filter("facet", ("keyword", "守护"))),
+    ],
+)
+def test_field_prefix(query, expected):
+    assert parse_query(query) == expected
+
+
+@pytest.mark.parametrize(
+    "query, message",
+    [
+        ("(守护", "括号没有闭合"),
+        ("(守护 OR (突进)", "括号没有闭合"),
+        ("守护)", "多余的「)」"),
+        ("() 守护", "「)」前缺少查询词"),
+        ("OR", "「OR」前缺少查询词"),
+        ("OR 守护", "「OR」前缺少查询词"),
+        ("守护 OR", "查询在运算符之后意外结束"),
+        ("守护 AND", "查询在运算符之后意外结束"),
+        ("NOT", "查询在运算符之后意外结束"),
+        ("skill:", "空的查询词"),
+        ('skill:""', "空的查询词"),
+        ('"守护', "引号 \" 没有闭合"),
+        ("class:不存在", "无法识别的字段取值"),
+        ("", "查询为空"),
+    ],
+)
+def test_syntax_error(query, message):
+    with pytest.raises(QuerySyntaxError, match=re.escape(message)):
+        parse_query(query)
+
+
+def _walk(node):
+    yield node
+    if isinstance(node, Not):
+        yield from _walk(node.child)
+    elif isinstance(node, (And, Or)):
+        for child in node.children:
+            yield from _walk(child)
+
+
+# ============== 执行 ==============
+
+@pytest.fixture(scope="module")
+def data() -> dict:
+    return _build_indexes(*_parse_cards(_read_chs_file(CHS_CARDS_FILE)))
+
+
+def _docs(data: dict) -> dict:
+    return {card.id: card.search_doc for card in data["cards"]}
+
+
+def _boolean_ids(data: dict, query: str) -> set:
+    results = boolean_search(
+        query,
+        data["cards"],
+        data["ngram_index"],
+        data["facets"],
+        stats=data["stats"],
+        name_index=data["name_index"],
+        pinyin_index=data["pinyin_index"],
+        skill_bm25=data["skill_bm25"],
+        limit=ALL,
+    )
+    return {card.id for card in results}
+
+
+def _plain_ids(data: dict, query: str) -> set:
+    results = search_cards(
+        query,
+        data["cards"],
+        limit=ALL,
+        index=data["ngram_index"],
+        facets=data["facets"],
+        stats=data["stats"],
+        name_index=data["name_index"],
+        pinyin_index=data["pinyin_index"],
+        skill_bm25=data["skill_bm25"],
+    )
+    return {card.id for card in results}
+
+
+def test_or_binds_looser_than_and(data):
+    guard, rush, elf = (_plain_ids(data, q) for q in ("守护", "突进", "#精灵"))
+    assert guard and rush and elf
+    assert _boolean_ids(data, "守护 OR 突进 #精灵") == guard | (rush & elf)
+    assert _boolean_ids(data, "(守护 OR 突进) #精灵") == (guard | rush) & elf
+
+
+def test_not_and_minus(data):
+    guard, elf = _plain_ids(data, "守护"), _plain_ids(data, "#精灵")
+    expected = guard - elf
+    assert expected and expected != guard
+    assert _boolean_ids(data, "守护 NOT #精灵") == expected
+    assert _boolean_ids(data, "守护 -#精灵") == expected
+
+
+def test_minus_digit_matches_plain_query(data):
+    # 守护 -1 不是取反：两个词都要命中（-1 按普通文本匹配）
+    hits = _plain_ids(data, "守护 -1")
+    assert hits and hits == _plain_ids(data, "守护") & _plain_ids(data, "-1")
+
+
+def test_phrase_matches_substring(data):
+    hits = _boolean_ids(data, '"抽取2"')
+    docs = _docs(data)
+    assert hits and all("抽取2" in docs[card_id].skill_text for card_id in hits)
+    assert hits == _plain_ids(data, "抽取2")
+    # 短语整体匹配：带空格的短语不等于两个词的隐式 AND
+    assert _plain_ids(data, "不屈 战士")
+    assert not _boolean_ids(data, '"不屈 战士"')
+
+
+def test_field_prefix_limits_field(data):
+    name_hits = _boolean_ids(data, "name:守护")
+    skill_hits = _boolean_ids(data, "skill:守护")
+    docs = _docs(data)
+    assert name_hits and all(
+        "守护" in docs[card_id].name + docs[card_id].name_ja for card_id in name_hits
+    )
+    assert skill_hits and all(
+        "守护" in docs[card_id].skill_text + docs[card_id].skill_text_ja for card_id in skill_hits
+    )
+    assert name_hits | skill_hits <= _plain_ids(data, "守护")
@@ -0,0 +1,194 @@
+# tests/test_sv_card_refresh.py
+"""sv_card 增量刷新：_patch_card_data 打补丁的结果必须与整体重建一致。"""
+
+import copy
+import random
+
+import pytest
+
+from src.plugins.sv_card._cache import (
+    CHS_CARDS_FILE,
+    CardGeneration,
+    _build_indexes,
+    _card_digest,
+    _card_id_of,
+    _iter_raw_cards,
+    _parse_cards,
+    _patch_card_data,
+    _read_chs_file,
+)
+from src.plugins.sv_card._searcher import search_cards
+
+# 排序不依赖技能文本 BM25 的查询：结果顺序必须完全一致
+ORDERED_QUERIES = [
+    "不屈的战士", "天使", "测试", "#精灵", "#皇家 随从 金", "#龙族 3费",
+    "cost<=2 atk>=3", "life>=5 #主教", "kw:突进", "bqdzs", "tianshi",
+]
+
+# 技能层同分按 BM25 排序，补丁沿用全量构建时的 avgdl（见 _bm25.py），
+# 同分内的先后可能与重建不同：只比较完整命中集合
+SKILL_QUERIES = ["守护", "进化时", "抽取", "谢幕曲 2", "ev:守护", "sev:伤害"]
+
+
+def _search_ids(data: dict, query: str, limit: int = 50) -> list[str]:
+    results = search_cards(
+        query,
+        data["cards"],
+        limit=limit,
+        index=data["ngram_index"],
+        facets=data["facets"],
+        stats=data["stats"],
+        name_index=data["name_index"],
+        pinyin_index=data["pinyin_index"],
+        skill_bm25=data["skill_bm25"],
+    )
+    return [card.id for card in results]
+
+
+def _as_raw_data(raw_cards: list[dict]) -> dict:
+    """按数据文件的结构（card_id → 卡牌）组装，保持列表顺序。"""
+    return {str(raw["card_id"]): raw for raw in raw_cards}
+
+
+def _entries(raw_cards: list[dict]) -> list[tuple[str, dict, bytes]]:
+    return [(_card_id_of(raw), raw, _card_digest(raw)) for raw in raw_cards]
+
+
+def _assert_same(patched: dict, rebuilt: dict):
+    assert [card.id for card in patched["cards"]] == [card.id for card in rebuilt["cards"]]
+    assert patched["card_digests"] == rebuilt["card_digests"]
+    assert patched["cards_by_id"].keys() == rebuilt["cards_by_id"].keys()
+    assert {
+        key: [card.id for card in cards] for key, cards in patched["cards_by_name"].items()
+    } == {
+        key: [card.id for card in cards] for key, cards in rebuilt["cards_by_name"].items()
+    }
+    assert list(patched["id_index"].range("1")) == list(rebuilt["id_index"].range("1"))
+    patched_pinyin, rebuilt_pinyin = patched["pinyin_index"], rebuilt["pinyin_index"]
+    assert len(patched_pinyin) == len(rebuilt_pinyin)
+    for card in rebuilt["cards"][::5]:
+        for prefix in {"".join(card.name_pinyin)[:4], "".join(s[0] for s in card.name_pinyin)}:
+            assert patched_pinyin.lookup(prefix) == rebuilt_pinyin.lookup(prefix), prefix
+    for query in ORDERED_QUERIES:
+        assert _search_ids(patched, query) == _search_ids(rebuilt, query), query
+    everything = len(rebuilt["cards"])
+    for query in ORDERED_QUERIES + SKILL_QUERIES:
+        assert set(_search_ids(patched, query, everything)) == set(
+            _search_ids(rebuilt, query, everything)
+        ), query
+
+    # 近邻表补丁沿用全量构建时的词表与 idf（见 _similar.py），只要求与重建大体一致
+    patched_similar, rebuilt_similar = patched["similar"], rebuilt["similar"]
+    assert len(patched_similar) == len(rebuilt_similar) == everything
+    shared = total = 0
+    for pos, card in enumerate(rebuilt["cards"]):
+        neighbours = patched_similar.neighbours(pos)
+        assert all(rebuilt["cards"][other].name != card.name for other in neighbours)
+        expected = rebuilt_similar.neighbours(pos)
+        shared += len(set(neighbours) & set(expected))
+        total += len(expected)
+    assert shared >= 0.95 * total
+
+
+@pytest.fixture(scope="module")
+def raw_cards() -> list[dict]:
+    return list(_iter_raw_cards(_read_chs_file(CHS_CARDS_FILE)))
+
+
+@pytest.fixture(scope="module")
+def generation(raw_cards) -> CardGeneration:
+    return CardGeneration(1, _build_indexes(*_parse_cards(_as_raw_data(raw_cards))), None, None, None)
+
+
+def _refresh(generation: CardGeneration, raw_cards: list[dict]) -> tuple[dict, dict]:
+    patched, stats = _patch_card_data(generation, _entries(raw_cards))
+    rebuilt = _build_indexes(*_parse_cards(_as_raw_data(raw_cards)))
+    _assert_same(patched, rebuilt)
+    return patched, stats
+
+
+def test_modify(generation, raw_cards):
+    rng = random.Random(6)
+    new_cards = copy.deepcopy(raw_cards)
+    for raw in rng.sample(new_cards, 20):
+        raw["name"] = raw["name"] + "测试"
+        raw["skill_text"] = "【<color=Keyword>守护</color>】" + raw["skill_text"]
+        raw["cost"] = (raw["cost"] or 0) + 1
+    patched, stats = _refresh(generation, new_cards)
+    assert stats == {"changed": 20, "added": 0, "removed": 0}
+    # 未变化的卡复用旧对象
+    assert sum(a is b for a, b in zip(patched["cards"], generation.cards)) == len(raw_cards) - 20
+
+
+def test_append(generation, raw_cards):
+    new_cards = copy.deepcopy(raw_cards)
+    extra = copy.deepcopy(raw_cards[0])
+    extra["card_id"] = 10001099
+    extra["name"] = "监视测试"
+    new_cards.append(extra)
+    patched, stats = _refresh(generation, new_cards)
+    assert stats == {"changed": 0, "added": 1, "removed": 0}
+    assert patched["cards"][-1].id == "10001099"
+
+
+def test_remove(generation, raw_cards):
+    new_cards = [raw for i, raw in enumerate(raw_cards) if i % 50 != 7]
+    _, stats = _refresh(generation, new_cards)
+    assert stats["removed"] == len(raw_cards) - len(new_cards)
+
+
+def test_reorder(generation, raw_cards):
+    new_cards = copy.deepcopy(raw_cards)
+    random.Random(8).shuffle(new_cards)
+    new_cards[3]["skill_text"] += "抽取1张。"
+    _, stats = _refresh(generation, new_cards)
+    assert stats == {"changed": 1, "added": 0, "removed": 0}
+
+
+# 相似度用到的原始字段：全部换成另一张卡的值后两张卡特征相同（职业 / 类型另行保证）
+_SIMILAR_FIELDS = ("cost", "atk", "life", "skill_text", "evo_skill_text", "skill_text_ja", "tribes")
+
+
+def _skilled(generation: CardGeneration) -> int:
+    return next(pos for pos, card in enumerate(generation.cards) if len(card.skill_text) > 60)
+
+
+def test_similar_after_append(generation, raw_cards):
+    src = _skilled(generation)
+    before = generation.similar.neighbours(src)
+    new_cards = copy.deepcopy(raw_cards)
+    extra = copy.deepcopy(raw_cards[src])
+    extra["card_id"] = int(extra["card_id"]) + 9
+    extra["name"] += "复刻"
+    new_cards.append(extra)
+    patched, _ = _patch_card_data(generation, _entries(new_cards))
+    cards, similar = patched["cards"], patched["similar"]
+    added = len(cards) - 1
+    assert (cards[added].class_code, cards[added].type) == (cards[src].class_code, cards[src].type)
+    # 特征完全相同：互为第一近邻，其余近邻沿用原卡的
+    assert similar.neighbours(added) == [src] + before[:-1]
+    assert similar.neighbours(src) == [added] + before[:-1]
+
+
+def test_similar_after_modify(generation, raw_cards):
+    cards = generation.cards
+    target = _skilled(generation)
+    source = next(
+        pos for pos, card in enumerate(cards)
+        if pos != target and card.name != cards[target].name
+        and (card.class_code, card.type) == (cards[target].class_code, cards[target].type)
+        and len(card.skill_text) > 60 and target not in generation.similar.neighbours(pos)
+    )
+    new_cards = copy.deepcopy(raw_cards)
+    for field in _SIMILAR_FIELDS:
+        new_cards[target][field] = copy.deepcopy(raw_cards[source][field])
+    patched, stats = _patch_card_data(generation, _entries(new_cards))
+    assert stats["changed"] == 1
+    similar = patched["similar"]
+    assert similar.neighbours(target)[0] == source
+    assert target in similar.neighbours(source)
+    # 其余近邻表引用的都是有效的、不同名的卡
+    for pos, card in enumerate(patched["cards"]):
+        neighbours = similar.neighbours(pos)
+        assert len(set(neighbours)) == len(neighbours)
+        assert all(patched["cards"][other].name != card.name for other in neighbours)
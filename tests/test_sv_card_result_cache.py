@@ -0,0 +1,55 @@
+# tests/test_sv_card_result_cache.py
+"""sv_card /sv 结果缓存：LRU 淘汰、按数据代号失效、键归一化。"""
+
+from src.plugins.sv_card._result_cache import CachedResult, ResultCache
+
+
+def _result(name: str) -> CachedResult:
+    return CachedResult((name,), f"msg {name}")
+
+
+def test_lru_eviction_order():
+    cache = ResultCache(maxsize=2)
+    a, b, c = (cache.make_key(q, "search", 10, 1) for q in ("a", "b", "c"))
+    cache.put(a, _result("a"))
+    cache.put(b, _result("b"))
+    # 读 a 使其变为最近使用，再放入 c 时淘汰的是 b
+    assert cache.get(a) == _result("a")
+    cache.put(c, _result("c"))
+    assert cache.get(b) is None
+    assert cache.get(a) == _result("a")
+    assert cache.get(c) == _result("c")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_generation_change_clears_entries():
+    cache = ResultCache()
+    old = cache.make_key("天使", "search", 10, 1)
+    cache.put(old, _result("old"))
+    new = cache.make_key("天使", "search", 10, 2)
+    assert cache.get(new) is None
+    assert cache.stats()["size"] == 0
+    # 回到旧代号也读不到已清空的结果
+    assert cache.get(old) is None
+
+
+def test_key_normalization():
+    make_key = ResultCache.make_key
+    assert make_key("  天使   战士 ", "search", 10, 1) == make_key("天使 战士", "search", 10, 1)
+    assert make_key("ＡＢＣ", "search", 10, 1) == make_key("abc", "search", 10, 1)
+    assert make_key("天使", "search", 10, 1) != make_key("天使", "filter", 10, 1)
+    assert make_key("天使", "search", 10, 1) != make_key("天使", "search", 20, 1)
+    # 布尔运算符区分大小写，不与普通查询共用键
+    assert make_key("守护 OR 突进", "search", 10, 1) != make_key("守护 or 突进", "search", 10, 1)
+
+
+def test_stats():
+    cache = ResultCache()
+    key = cache.make_key("天使", "search", 10, 1)
+    assert cache.get(key) is None
+    cache.put(key, _result("x"))
+    cache.get(key)
+    cache.get(key)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 1, 1)
+    assert stats["hit_rate"] == 2 / 3
@@ -0,0 +1,28 @@
+# tests/test_sv_card_scripts.py
+"""sv_card 脚本冒烟测试：在独立进程里跑一遍（不经过 conftest 的 NoneBot 初始化）。"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+
+
+@pytest.mark.parametrize(
+    "script, args",
+    [
+        ("sv_card_benchmark.py", ["--sizes", "735", "--repeat", "1", "--no-memory"]),
+        ("sv_card_memory_report.py", []),
+    ],
+)
+def test_script_runs(script, args):
+    result = subprocess.run(
+        [sys.executable, str(SCRIPTS / script), *args],
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip()
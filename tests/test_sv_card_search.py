@@ -0,0 +1,107 @@
+# tests/test_sv_card_search.py
+"""sv_card 普通搜索：数值谓词、Top-K 排序。"""
+
+import pytest
+
+from src.plugins.sv_card._cache import (
+    CHS_CARDS_FILE,
+    _build_indexes,
+    _parse_cards,
+    _read_chs_file,
+)
+from src.plugins.sv_card._searcher import parse_stat_token, search_cards
+
+ALL = 10000
+
+
+@pytest.fixture(scope="module")
+def data() -> dict:
+    return _build_indexes(*_parse_cards(_read_chs_file(CHS_CARDS_FILE)))
+
+
+def _search(data: dict, query: str, limit: int = ALL) -> list:
+    return search_cards(
+        query,
+        data["cards"],
+        limit=limit,
+        index=data["ngram_index"],
+        facets=data["facets"],
+        stats=data["stats"],
+        name_index=data["name_index"],
+        pinyin_index=data["pinyin_index"],
+        skill_bm25=data["skill_bm25"],
+    )
+
+
+@pytest.mark.parametrize(
+    "token, expected",
+    [
+        ("cost<=1", ("cost", "<=", 1)),
+        ("费=2", ("cost", "=", 2)),
+        ("攻>=3", ("atk", ">=", 3)),
+        ("攻击≥3", ("atk", ">=", 3)),
+        ("hp<5", ("life", "<", 5)),
+        ("血!=2", ("life", "!=", 2)),
+        ("稀有度>2", ("rarity", ">", 2)),
+    ],
+)
+def test_parse_stat_token(token, expected):
+    assert parse_stat_token(token) == expected
+
+
+@pytest.mark.parametrize("token", ["cost", "cost<=", "cost<=x", "3费", "mana<=2", "<=2"])
+def test_parse_stat_token_rejects(token):
+    assert parse_stat_token(token) is None
+
+
+@pytest.mark.parametrize(
+    "query, predicate",
+    [
+        ("cost<=1", lambda c: c.cost <= 1),
+        ("费=2 攻>=3", lambda c: c.cost == 2 and c.atk >= 3),
+        ("COST<=3 atk>=3 #龙族", lambda c: c.cost <= 3 and c.atk >= 3 and c.class_name == "龙族"),
+    ],
+)
+def test_stat_predicates_match_scan(data, query, predicate):
+    expected = [card.id for card in data["cards"] if predicate(card)]
+    assert expected
+    assert [card.id for card in _search(data, query)] == expected
+
+
+def test_stat_predicate_with_keyword(data):
+    results = _search(data, "守护 cost<=2")
+    assert results and all(card.cost <= 2 for card in results)
+    assert {card.id for card in results} == {
+        card.id for card in _search(data, "守护") if card.cost <= 2
+    }
+
+
+# 宽泛关键词：命中数远多于 limit，Top-K 堆与分桶提前终止都会生效
+BROAD_QUERIES = ["随从", "龙", "守护", "抽取", "进化", "伤害", "回复", "long"]
+
+
+@pytest.mark.parametrize("query", BROAD_QUERIES)
+@pytest.mark.parametrize("limit", [1, 10, 20])
+def test_top_k_is_prefix_of_full_ranking(data, query, limit):
+    full = [card.id for card in _search(data, query)]
+    assert len(full) > limit
+    assert [card.id for card in _search(data, query, limit)] == full[:limit]
+
+
+@pytest.mark.parametrize("query", BROAD_QUERIES)
+def test_early_exit_matches_full_scan(data, query):
+    # 不给索引：逐卡打分、不分桶，作为排序的参照
+    scanned = search_cards(
+        query,
+        data["cards"],
+        limit=10,
+        pinyin_index=data["pinyin_index"],
+        skill_bm25=data["skill_bm25"],
+    )
+    assert [card.id for card in _search(data, query, 10)] == [card.id for card in scanned]
+
+
+@pytest.mark.parametrize("query", BROAD_QUERIES)
+def test_top_k_has_no_duplicates(data, query):
+    ids = [card.id for card in _search(data, query)]
+    assert len(ids) == len(set(ids))
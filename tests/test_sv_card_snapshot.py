@@ -0,0 +1,52 @@
+# tests/test_sv_card_snapshot.py
+"""sv_card 卡池快照：命中快照时的启动耗时与结果一致性。"""
+
+import time
+
+from src.plugins.sv_card._cache import (
+    CHS_CARDS_FILE,
+    _load_card_data,
+    _parse_cards,
+    _read_chs_file,
+)
+from src.plugins.sv_card._searcher import search_cards
+
+
+def _search_ids(data: dict, query: str) -> list[str]:
+    results = search_cards(
+        query,
+        data["cards"],
+        limit=50,
+        index=data["ngram_index"],
+        facets=data["facets"],
+        stats=data["stats"],
+        name_index=data["name_index"],
+        pinyin_index=data["pinyin_index"],
+        skill_bm25=data["skill_bm25"],
+    )
+    return [card.id for card in results]
+
+
+def test_snapshot_start_is_faster_than_parse(tmp_path):
+    snapshot = tmp_path / "cards.pkl"
+    built, _, from_snapshot = _load_card_data(CHS_CARDS_FILE, snapshot)
+    assert not from_snapshot and snapshot.exists()
+
+    # 只解析 JSON、不建索引，作为快照读取（含源文件哈希校验）必须胜过的下限
+    start = time.perf_counter()
+    _parse_cards(_read_chs_file(CHS_CARDS_FILE))
+    parse_time = time.perf_counter() - start
+
+    load_times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        loaded, _, from_snapshot = _load_card_data(CHS_CARDS_FILE, snapshot)
+        load_times.append(time.perf_counter() - start)
+        assert from_snapshot
+    assert min(load_times) < parse_time
+
+    for query in ["天使", "#皇家 随从 金", "cost<=2 atk>=3", "守护", "bqdzs"]:
+        assert _search_ids(loaded, query) == _search_ids(built, query)
+    assert loaded["fuzzy_index"].lookup("不屈的战土") == built["fuzzy_index"].lookup("不屈的战土")
+    assert loaded["ngram_index"].gram_count == built["ngram_index"].gram_count
+    assert loaded["similar"].neighbours(0) == built["similar"].neighbours(0)